@@ -15,6 +15,30 @@ DIPLOME_STORAGE_DIR = os.path.join(BASE_DIR, 'diplome_storage')
 
 PV_STORAGE_DIR = os.path.join(BASE_DIR, 'pv_storage')
 
+# PV jury scans are downscaled / re-encoded after upload (core/pv_images.py)
+PV_IMAGE_MAX_SIZE = int(os.getenv('PV_IMAGE_MAX_SIZE', 2400))  # px, long side
+PV_IMAGE_QUALITY = int(os.getenv('PV_IMAGE_QUALITY', 80))
+PV_IMAGE_FORMAT = os.getenv('PV_IMAGE_FORMAT', 'WEBP')  # or JPEG
+PV_THUMBNAIL_SIZES = (320, 960)
+# Upload limit of a PV scan, bytes (CHUNKED_UPLOAD_MAX_SIZE is sized for import files)
+PV_UPLOAD_MAX_SIZE = int(os.getenv('PV_UPLOAD_MAX_SIZE', 20 * 1024 * 1024))
+
+# Uploads waiting for a background import (deleted once imported)
+IMPORT_STORAGE_DIR = os.path.join(BASE_DIR, 'import_storage')
+
+# Parquet dataset written by `manage.py export_verifications_parquet`
+ANALYTICS_EXPORT_DIR = os.getenv('ANALYTICS_EXPORT_DIR', os.path.join(BASE_DIR, 'analytics_export'))
+
+# XLSX exports are built whole before being sent: larger ones must use CSV (core/exports.py)
+EXPORT_XLSX_MAX_ROWS = int(os.getenv('EXPORT_XLSX_MAX_ROWS', 100000))
+
+# Resumable chunked uploads (core/chunked_upload.py)
+CHUNKED_UPLOAD_DIR = os.path.join(BASE_DIR, 'upload_storage')
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_CHUNK_SIZE', 5 * 1024 * 1024))
+CHUNKED_UPLOAD_MAX_SIZE = int(os.getenv('CHUNKED_UPLOAD_MAX_SIZE', 1024 ** 3))
+CHUNKED_UPLOAD_EXPIRY_HOURS = int(os.getenv('CHUNKED_UPLOAD_EXPIRY_HOURS', 24))  # manage.py purge_uploads
+CHUNKED_UPLOAD_CLAIM_TIMEOUT = int(os.getenv('CHUNKED_UPLOAD_CLAIM_TIMEOUT', 600))  # seconds before a stalled chunk can be retried
+
 # Make sure directory exists (optional but good practice)
 if not os.path.exists(PV_STORAGE_DIR):
     os.makedirs(PV_STORAGE_DIR)
@@ -47,6 +71,51 @@ DIPLOMA_PRIVATE_KEY_PATH = os.path.join(
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
 
+# Uploaded PDF verification
+# Signature validation results are cached by the file SHA-256.
+# Bump SIGNATURE_TRUST_VERSION to drop every cached result (e.g. after a revocation).
+SIGNATURE_CACHE_TIMEOUT = int(os.getenv("SIGNATURE_CACHE_TIMEOUT", 60 * 60 * 24))
+SIGNATURE_TRUST_VERSION = os.getenv("SIGNATURE_TRUST_VERSION", "1")
+
+# Signature validation runs in a small per-process pool, anchored on the
+# institution certificate. Uploads beyond WORKERS + QUEUE get a 503.
+SIGNATURE_VALIDATION_WORKERS = int(os.getenv("SIGNATURE_VALIDATION_WORKERS", 2))
+SIGNATURE_VALIDATION_QUEUE = int(os.getenv("SIGNATURE_VALIDATION_QUEUE", 8))
+
+# Hard limit for PDFs uploaded to verify-file/ (bytes)
+VERIFY_PDF_MAX_SIZE = int(os.getenv("VERIFY_PDF_MAX_SIZE", 10 * 1024 * 1024))
+
+
+# Reverse proxies whose X-Forwarded-For is trusted (IPs or CIDRs, comma
+# separated). Used for the logged client IP and the rate-limit buckets.
+TRUSTED_PROXIES = [p.strip() for p in os.getenv("TRUSTED_PROXIES", "127.0.0.1,::1").split(",") if p.strip()]
+
+# Rate limiting of public endpoints (token buckets shared through the DB,
+# see core/throttling.py). When the database can't be reached, public
+# lookups are let through and authentication / upload routes are refused.
+RATELIMIT_FAIL_OPEN = os.getenv("RATELIMIT_FAIL_OPEN", "true").lower() == "true"
+RATELIMIT_SENSITIVE_FAIL_OPEN = os.getenv("RATELIMIT_SENSITIVE_FAIL_OPEN", "false").lower() == "true"
+
+
+# Raw Verification rows are rolled up daily and kept this many days
+# (manage.py rollup_verifications)
+VERIFICATION_RETENTION_DAYS = int(os.getenv("VERIFICATION_RETENTION_DAYS", 180))
+
+# Threads running background tasks (imports, emails) in each process, see core/background.py
+BACKGROUND_WORKERS = int(os.getenv("BACKGROUND_WORKERS", 2))
+
+# Filtered dashboard payloads (date range / filière / year) are cached this long
+DASHBOARD_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_CACHE_TIMEOUT", 60))
+
+
+# Offline verification bundle (mobile app)
+OFFLINE_BUNDLE_FP_RATE = float(os.getenv("OFFLINE_BUNDLE_FP_RATE", 1e-6))
+OFFLINE_BUNDLE_CHUNK_SIZE = 5000
+OFFLINE_BUNDLE_MAX_DELTA = 20000
+OFFLINE_BUNDLE_CACHE_TIMEOUT = 60 * 10
+OFFLINE_BUNDLE_RATE = os.getenv("OFFLINE_BUNDLE_RATE", "20/m")  # per client IP
+
+
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/6.0/howto/deployment/checklist/
 
@@ -68,6 +137,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'core',
     'corsheaders',
     'rest_framework',
@@ -97,9 +167,18 @@ REST_FRAMEWORK = {
     ],
     # 2. KEYS TO OPEN: Allow JWT (for Frontend) AND Session (for you in Browser)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWT claims trusted without loading the User (core/authentication.py)
+        'core.authentication.ClaimsJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
-    )
+    ),
+    # 3. Lists: joins declared on the serializer, ?filters, ?ordering=, ?fields=,
+    #    keyset cursor pages (clients follow `next`)
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetCursorPagination',
+    'DEFAULT_FILTER_BACKENDS': [
+        'core.filters.EagerLoadingFilter',
+        'core.filters.QueryParamFilter',
+        'core.filters.StableOrderingFilter',
+    ],
 }
 
 ROOT_URLCONF = 'backend.urls'
@@ -134,9 +213,27 @@ DATABASES = {
         'PASSWORD': 'admin', # Password for the user 
         'HOST': 'localhost', # The database server's address (e.g., 'localhost' or an IP) 
         'PORT': '5432', # The port number (default is 5432) 
+        # Persistent connections, checked before reuse
+        'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+        'CONN_HEALTH_CHECKS': True,
         } 
     }
 
+# Read replicas: "host:port,host:port" (same name / user / password as default).
+# Verification lookups, dashboard and exports read from them (core/db_router.py).
+# For local testing, a second PostgreSQL on another port works:
+#   DATABASE_REPLICAS=localhost:5433
+for i, hostport in enumerate(filter(None, os.getenv("DATABASE_REPLICAS", "").split(",")), start=1):
+    host, _, port = hostport.strip().partition(":")
+    DATABASES[f"replica{i}"] = {
+        **DATABASES["default"],
+        'HOST': host,
+        'PORT': port or '5432',
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.db_router.PrimaryReplicaRouter']
+
 
 # For deployed  configuration
 
@@ -192,20 +289,47 @@ SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
-    'BLACKLIST_AFTER_ROTATION': True
+    'BLACKLIST_AFTER_ROTATION': True,
+    # Tokens carry username / is_superuser / token version (core/authentication.py)
+    'TOKEN_OBTAIN_SERIALIZER': 'core.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.authentication.ClaimsTokenRefreshSerializer',
+}
+
+# Token versions (JWT revocation) are cached this long per user, in the "shared" cache
+TOKEN_VERSION_CACHE_TIMEOUT = int(os.getenv("TOKEN_VERSION_CACHE_TIMEOUT", 60))
+
+# "default" is per process; "shared" is seen by every worker (a revoked token must
+# stop working everywhere at once): Redis when REDIS_URL is set (needs the redis
+# package), otherwise a database table created by migration 0031
+REDIS_URL = os.getenv("REDIS_URL")
+CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    "shared": (
+        {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}
+        if REDIS_URL else
+        {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "core_shared_cache"}
+    ),
 }
 
 
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
-EMAIL_HOST = 'smtp.gmail.com'
-EMAIL_PORT = 587
-EMAIL_USE_TLS = True
+# EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=false: local SMTP stand-in
+# (e.g. `python -m aiosmtpd -n -l localhost:1025`) for development and tests
+EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
+EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
+EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'true').lower() == 'true'
+EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', 20))
 EMAIL_HOST_USER = os.getenv('EMAIL_USER')
 # IMPORTANT: This is NOT your login password. It is an "App Password".
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_PASSWORD')
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
 
+# Outbox (core/mailer.py): a failed email is retried after
+# OUTBOX_RETRY_DELAY * 2**(attempts - 1) seconds, at most OUTBOX_MAX_ATTEMPTS times
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', 5))
+OUTBOX_RETRY_DELAY = int(os.getenv('OUTBOX_RETRY_DELAY', 30))
+
 
 # ==========================================
 # SECURITY HEADERS (commented in developpement)
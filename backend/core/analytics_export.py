@@ -0,0 +1,228 @@
+"""
+Columnar (Parquet) export of the verification history, for analytics.
+
+One row per verification, joined with the diploma and filière dimensions.
+Files are zstd-compressed Parquet (low-cardinality columns such as statut
+or filiere are dictionary-encoded by the writer), in time partitions:
+
+    <output_dir>/month=2026-10/part-00001234-00056789.parquet
+
+Exports are incremental: `_state.json` in the output directory holds the
+last exported Verification id, so a daily run only reads the new rows.
+Starting before that id (--full, a lower --since-id) would write the same
+rows again under other file names, so the existing dataset is first moved
+aside to `<output_dir>-<timestamp>` (kept: it may hold purged rows) and
+the export starts in an empty directory.
+Raw rows are purged after VERIFICATION_RETENTION_DAYS (core/rollups.py):
+run the export more often than that.
+
+pyarrow is optional: HAS_PYARROW is False when it is not installed.
+"""
+import os
+import json
+import tempfile
+from collections import defaultdict
+
+from django.utils import timezone
+
+from .db_router import use_replica
+from .models import Verification
+from .rollups import ip_prefix
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAS_PYARROW = True
+except ImportError:
+    HAS_PYARROW = False
+
+
+STATE_FILE = "_state.json"
+BATCH_SIZE = 100000
+DOWNLOAD_BATCH_SIZE = 20000  # rows per row group for export_to_file
+
+FIELDS = [
+    "id",
+    "date_verification",
+    "adresse_ip",
+    "statut",
+    "diplome_id",
+    "diplome__numero_diplome",
+    "diplome__annee_obtention",
+    "diplome__type_diplome",
+    "diplome__est_annule",
+    "diplome__specialite_id",
+    "diplome__specialite__code_filiere",
+]
+
+
+def schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("date_verification", pa.timestamp("us", tz="UTC")),
+        ("adresse_ip", pa.string()),
+        ("ip_prefix", pa.string()),
+        ("statut", pa.string()),
+        ("diplome_id", pa.int64()),
+        ("numero_diplome", pa.int32()),
+        ("annee_obtention", pa.int32()),
+        ("type_diplome", pa.string()),
+        ("diplome_annule", pa.bool_()),
+        ("filiere_id", pa.int64()),
+        ("filiere", pa.string()),
+    ])
+
+
+# ===================== STATE =====================
+
+def read_state(output_dir):
+    try:
+        with open(os.path.join(output_dir, STATE_FILE)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"last_id": 0}
+
+
+def write_state(output_dir, state):
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(path + ".tmp", "w") as f:
+        json.dump(state, f)
+    os.replace(path + ".tmp", path)
+
+
+# ===================== WRITE =====================
+
+def _columns(rows):
+    cols = defaultdict(list)
+    for (pk, date, ip, statut, diplome_id, numero, annee, type_diplome,
+         annule, filiere_id, filiere) in rows:
+        cols["id"].append(pk)
+        cols["date_verification"].append(date)
+        cols["adresse_ip"].append(ip)
+        cols["ip_prefix"].append(ip_prefix(ip))
+        cols["statut"].append(statut)
+        cols["diplome_id"].append(diplome_id)
+        cols["numero_diplome"].append(numero)
+        cols["annee_obtention"].append(annee)
+        cols["type_diplome"].append(type_diplome)
+        cols["diplome_annule"].append(annule)
+        cols["filiere_id"].append(filiere_id)
+        cols["filiere"].append(filiere)
+    return cols
+
+
+def _table(rows):
+    return pa.Table.from_pydict(_columns(rows), schema=schema())
+
+
+def _batches(rows, size):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_table(rows, path):
+    """Write rows (tuples in FIELDS order) to one Parquet file, atomically."""
+    table = _table(rows)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        pq.write_table(table, tmp, compression="zstd")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _flush(output_dir, batch):
+    """Split a batch by month of date_verification, one file per partition."""
+    by_month = defaultdict(list)
+    for row in batch:
+        by_month[timezone.localtime(row[1]).strftime("%Y-%m")].append(row)
+
+    files = []
+    for month, rows in sorted(by_month.items()):
+        path = os.path.join(output_dir, f"month={month}", f"part-{rows[0][0]:08d}-{rows[-1][0]:08d}.parquet")
+        write_table(rows, path)
+        files.append(path)
+    return files
+
+
+def _archive(output_dir):
+    """Move the dataset aside (see the module docstring), return its new path."""
+    archived = f"{os.path.normpath(output_dir)}-{timezone.now():%Y%m%d-%H%M%S}"
+    os.replace(output_dir, archived)
+    os.makedirs(output_dir)
+    return archived
+
+
+def export_verifications(output_dir, since_id=None, batch_size=BATCH_SIZE):
+    """
+    Export verifications with id > since_id (default: last exported id) to
+    output_dir. Returns (rows exported, files written, last id, path of the
+    archived previous dataset or None).
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow n'est pas installé")
+
+    os.makedirs(output_dir, exist_ok=True)
+    state = read_state(output_dir)
+    last_id = state["last_id"] if since_id is None else since_id
+    archived = _archive(output_dir) if last_id < state["last_id"] else None
+
+    with use_replica():
+        rows = (
+            Verification.objects
+            .filter(id__gt=last_id)
+            .order_by("id")
+            .values_list(*FIELDS)
+            .iterator(chunk_size=10000)
+        )
+
+        total, files = 0, []
+        for batch in _batches(rows, batch_size):
+            files += _flush(output_dir, batch)
+            total, last_id = total + len(batch), batch[-1][0]
+            # Progress saved after each batch: an interrupted run resumes here
+            write_state(output_dir, {"last_id": last_id, "exported_at": timezone.now().isoformat()})
+
+    write_state(output_dir, {"last_id": last_id, "exported_at": timezone.now().isoformat()})
+    return total, files, last_id, archived
+
+
+def export_to_file(since_id, limit, batch_size=DOWNLOAD_BATCH_SIZE):
+    """
+    One Parquet file (temporary) with up to `limit` verifications after
+    since_id, for the download endpoint. Rows are streamed from a server-side
+    cursor and written as row groups of batch_size rows: memory stays bounded
+    whatever the limit. Returns (file, rows, last id).
+    """
+    if not HAS_PYARROW:
+        raise RuntimeError("pyarrow n'est pas installé")
+
+    tmp = tempfile.TemporaryFile(suffix=".parquet")
+    count, last_id = 0, since_id
+
+    with use_replica():
+        rows = (
+            Verification.objects
+            .filter(id__gt=since_id)
+            .order_by("id")
+            .values_list(*FIELDS)[:limit]
+            .iterator(chunk_size=10000)
+        )
+        with pq.ParquetWriter(tmp, schema(), compression="zstd") as writer:
+            for batch in _batches(rows, batch_size):
+                writer.write_table(_table(batch))
+                count, last_id = count + len(batch), batch[-1][0]
+
+    tmp.seek(0)
+    return tmp, count, last_id
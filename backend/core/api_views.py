@@ -4,9 +4,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.parsers import MultiPartParser, FormParser
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.contrib.auth.models import User
-from django.core.mail import send_mail
 
 from django.core.validators import validate_email
 from django.core.exceptions import ValidationError
@@ -14,22 +13,27 @@ from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import update_session_auth_hash
 from django.contrib.auth.hashers import check_password
 
-from django_ratelimit.decorators import ratelimit
+from core.throttling import client_ip, ratelimit
+from core.filters import parse_bool, parse_ip
+from core.db_router import use_replica
+from core.authentication import bump_token_version, tokens_for
 from django.utils.decorators import method_decorator
 import re
-from datetime import timedelta
-from django.db.models import Count, Avg, F, Func, Value, IntegerField
-from django.db.models.functions import TruncDate, Now, Cast
+from django.db.models import Avg, F, Func, Value, IntegerField
+from django.db.models.functions import Cast
 
 from django.http import FileResponse, HttpResponse
 from django.shortcuts import get_object_or_404
 from django.conf import settings
-from django.db import IntegrityError
 
-from django.db import transaction
+from django.db import transaction, connection
 from django.db.models import Max
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
 
 import os
+import json
+import shutil
 import uuid
 import hashlib
 import io
@@ -59,15 +63,21 @@ from PyPDF2 import PdfReader, PdfWriter
 
 # Security (optional)
 from core.security.pdf_signer import sign_pdf
-from pyhanko.sign.validation import validate_pdf_signature
-from pyhanko_certvalidator import ValidationContext
-from pyhanko.pdf_utils.reader import PdfFileReader
+from core.security.pdf_verifier import (
+    validate_signed_pdf,
+    validation_queue_depth,
+    ValidationBusy,
+)
+from core.upload_handlers import HashingUploadHandler
 from cryptography import x509
 from cryptography.hazmat.backends import default_backend
 
 
+from . import offline_bundle, counters, dashboard, student_import, background, exports, analytics_export, mailer, pv_images, chunked_upload
+from .search import search_students
+
 # Models & Serializers
-from .models import Diplome, Etudiant, Verification, Filiere, AnneeUniversitaire, StructureDiplome, PasswordHistory, EmailChangeRequest, PasswordResetRequest, PVJury
+from .models import Diplome, Etudiant, Verification, Filiere, AnneeUniversitaire, StructureDiplome, PasswordHistory, EmailChangeRequest, PasswordResetRequest, PVJury, AnnulationEvent, ImportJob
 from .serializers import (
     DiplomeSerializer,
     StructureDiplomeSerializer,
@@ -75,7 +85,8 @@ from .serializers import (
     FiliereSerializer,
     VerificationSerializer,
     AnneeUniversitaireSerializer,
-    PVJurySerializer
+    PVJurySerializer,
+    ImportJobSerializer
 )
 
 # Arabic support
@@ -168,66 +179,159 @@ def next_diplome_number(year):
         return (last or 0) + 1
 
 
+# Advisory lock key serializing writes to the annulation feed
+ANNULATION_FEED_LOCK = 4242030
+
+# Room for multipart boundaries/headers when checking Content-Length
+MULTIPART_OVERHEAD = 16 * 1024
+
+
 def get_client_ip(request):
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0].strip()
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
+    # Same trusted-proxy rule as the rate-limit buckets
+    return client_ip(request) or None
 
 # ===================== VIEWSETS =====================
 
 class EtudiantViewSet(viewsets.ModelViewSet):
     queryset = Etudiant.objects.all()
     serializer_class = EtudiantSerializer
+    filter_params = {
+        "filiere": ("filiere_id", int),
+        "annee_universitaire": ("annee_universitaire_id", int),
+    }
+    ordering_fields = ["id", "matricule", "nom_prenom_fr", "date_naissance"]
+    ordering = ["id"]
 
     @action(detail=False, methods=["post"])
     def import_excel(self, request):
-        file = request.FILES.get("file")
+        """file (multipart) or upload_id (completed chunked upload, see uploads/)"""
+        try:
+            file, upload = chunked_upload.request_file(request, "file")
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        try:
+            return self._import_excel(request, file, upload)
+        finally:
+            if upload is not None:
+                file.close()
+
+    def _import_excel(self, request, file, upload):
         filiere_id = request.data.get("filiere")
         annee_id = request.data.get("annee_universitaire")
         email_domain = request.data.get("email_domain", "@isms.esp.mr")
 
+        mode = request.data.get("mode", "insert")
+        cle = request.data.get("cle", "matricule")
+
         if not file or not filiere_id or not annee_id:
             return Response({"error": "file, filiere et annee_universitaire requis"}, status=400)
+        if mode not in ("insert", "upsert") or cle not in ("matricule", "nni"):
+            return Response({"error": "mode (insert/upsert) ou cle (matricule/nni) invalide"}, status=400)
 
         filiere = Filiere.objects.get(id=filiere_id)
         annee = AnneeUniversitaire.objects.get(id=annee_id)
-        df = pd.read_excel(file)
-        created = 0
-        skipped = []
 
-        for index, row in df.iterrows():
-            try:
-                Etudiant.objects.create(
-                    nom_prenom_fr=row["nom_prenom_fr"],
-                    nom_prenom_ar=row["nom_prenom_ar"],
-                    matricule=int(row["matricule"]),
-                    email=f"{row['matricule']}{email_domain}",
-                    nni=str(row["nni"]),
-                    date_naissance=row["date_naissance"],
-                    lieu_naissance_fr=row["lieu_naissance_fr"],
-                    lieu_naissance_ar=row["lieu_naissance_ar"],
-                    mention_fr=row["mention_fr"],
-                    mention_ar=row["mention_ar"],
-                    filiere=filiere,
-                    annee_universitaire=annee
-                )
-                created += 1
-            except IntegrityError:
-                skipped.append({"row": index + 2, "matricule": row["matricule"], "reason": "Déjà existant"})
+        try:
+            # Whole file checked before any write
+            encoding = student_import.csv_encoding(file)
+            validation = student_import.validate_rows(
+                student_import.iter_rows(file, file.name, encoding), email_domain, check_db=(mode == "insert")
+            )
+            if validation.errors:
+                return Response({
+                    "error": "Fichier invalide, aucun étudiant importé",
+                    "rows": validation.rows,
+                    "error_count": len(validation.errors),
+                    "errors": validation.report(),
+                }, status=400)
+
+            report = student_import.import_students(
+                student_import.iter_rows(file, file.name, encoding), filiere, annee, email_domain,
+                existing=validation.existing, mode=mode, key=cle,
+            )
+        except student_import.ImportFormatError as e:
+            return Response({"error": str(e)}, status=400)
 
-        return Response({"created": created, "skipped_count": len(skipped), "skipped": skipped})
+        if upload is not None:
+            chunked_upload.release(upload)
+        return Response(report)
+
+    @action(detail=False, methods=["post"])
+    def import_async(self, request):
+        """
+        Same parameters as import_excel (xlsx, csv or csv.gz, mode, cle, or upload_id).
+        The file is imported in the background: 202 + the job, to follow on import_jobs/<id>/.
+        """
+        try:
+            file, upload = chunked_upload.request_file(request, "file")
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        filiere_id = request.data.get("filiere")
+        annee_id = request.data.get("annee_universitaire")
+        email_domain = request.data.get("email_domain", "@isms.esp.mr")
+
+        mode = request.data.get("mode", "insert")
+        cle = request.data.get("cle", "matricule")
+
+        if not file or not filiere_id or not annee_id:
+            return Response({"error": "file, filiere et annee_universitaire requis"}, status=400)
+        if mode not in ("insert", "upsert") or cle not in ("matricule", "nni"):
+            return Response({"error": "mode (insert/upsert) ou cle (matricule/nni) invalide"}, status=400)
+        if not file.name.lower().endswith((".xlsx", ".csv", ".csv.gz", ".gz")):
+            return Response({"error": "Format non supporté (xlsx, csv ou csv.gz)"}, status=400)
+
+        filiere = get_object_or_404(Filiere, id=filiere_id)
+        annee = get_object_or_404(AnneeUniversitaire, id=annee_id)
+
+        os.makedirs(settings.IMPORT_STORAGE_DIR, exist_ok=True)
+        path = os.path.join(settings.IMPORT_STORAGE_DIR, f"{uuid.uuid4().hex}_{os.path.basename(file.name)}")
+        if upload is not None:
+            # Already assembled on disk: moved, not copied
+            file.close()
+            shutil.move(upload.fichier, path)
+            chunked_upload.release(upload)
+        else:
+            with open(path, "wb") as out:
+                for chunk in file.chunks():
+                    out.write(chunk)
+
+        with transaction.atomic():
+            job = ImportJob.objects.create(
+                fichier=path,
+                nom_fichier=file.name,
+                filiere=filiere,
+                annee_universitaire=annee,
+                email_domain=email_domain,
+                mode=mode,
+                cle=cle,
+                created_by=request.user,
+            )
+            background.submit(student_import.run_import_job, job.id)
+
+        return Response(ImportJobSerializer(job).data, status=202)
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """?q= (nom FR/AR, matricule ou NNI) &limit=&offset= -> résultats classés"""
+        q = request.query_params.get("q", "").strip()
+        if not q:
+            return Response({"error": "Paramètre q requis"}, status=400)
+        try:
+            limit = max(1, min(int(request.query_params.get("limit", 20)), 100))
+            offset = max(0, int(request.query_params.get("offset", 0)))
+        except ValueError:
+            return Response({"error": "limit / offset invalides"}, status=400)
+
+        rows, has_more = search_students(q, limit=limit, offset=offset)
+        results = self.get_serializer(rows, many=True).data
+        for data, etudiant in zip(results, rows):
+            data["score"] = round(etudiant.score, 3)
+
+        return Response({"results": results, "limit": limit, "offset": offset, "has_more": has_more})
 
     @action(detail=False, methods=["get"])
     def download_excel_template(self, request):
-        columns = [
-            "nom_prenom_fr", "nom_prenom_ar", "matricule", "nni",
-            "date_naissance", "lieu_naissance_fr", "lieu_naissance_ar",
-            "mention_fr", "mention_ar"
-        ]
-        df = pd.DataFrame(columns=columns)
+        df = pd.DataFrame(columns=student_import.COLUMNS)
         
         response = HttpResponse(content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
         response["Content-Disposition"] = 'attachment; filename="etudiants_template.xlsx"'
@@ -265,29 +369,60 @@ class EtudiantViewSet(viewsets.ModelViewSet):
 
 
 
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """Progress / report of the background imports (etudiants/import_async/)."""
+    queryset = ImportJob.objects.all()
+    serializer_class = ImportJobSerializer
+    ordering_fields = ["id", "created_at"]
+    ordering = ["-id"]
+
+
 class DiplomeViewSet(viewsets.ModelViewSet):
     queryset = Diplome.objects.all()
     serializer_class = DiplomeSerializer
+    filter_params = {
+        "filiere": ("specialite_id", int),
+        "annee": ("annee_obtention", int),
+        "est_annule": ("est_annule", parse_bool),
+        "etudiant": ("etudiant_id", int),
+    }
+    date_range_field = "date_televersement"
+    ordering_fields = ["id", "date_televersement", "annee_obtention", "numero_diplome"]
+    ordering = ["id"]
 
 
 class StructureDiplomeViewSet(viewsets.ModelViewSet):
     queryset = StructureDiplome.objects.all()
     serializer_class = StructureDiplomeSerializer
+    ordering_fields = ["id"]
+    ordering = ["id"]
 
 
 class FiliereViewSet(viewsets.ModelViewSet):
     queryset = Filiere.objects.all()
     serializer_class = FiliereSerializer
+    ordering_fields = ["id", "nom_filiere_fr"]
+    ordering = ["id"]
 
 
 class VerificationViewSet(viewsets.ModelViewSet):
     queryset = Verification.objects.all()
     serializer_class = VerificationSerializer
+    filter_params = {
+        "statut": ("statut", str),
+        "diplome": ("diplome_id", int),
+        "adresse_ip": ("adresse_ip", parse_ip),
+    }
+    date_range_field = "date_verification"
+    ordering_fields = ["id", "date_verification"]
+    ordering = ["id"]
 
 
 class AnneUniversitaireViewSet(viewsets.ModelViewSet):
     queryset = AnneeUniversitaire.objects.all()
     serializer_class = AnneeUniversitaireSerializer
+    ordering_fields = ["id", "code_annee"]
+    ordering = ["id"]
 
 
 # ===================== GENERATE DIPLOME =====================
@@ -627,22 +762,75 @@ class GenerateDiplomeByFiliereView(APIView):
     
 
 
+def record_annulation_event(diplome, action):
+    """
+    Append to the annulation feed. Must run inside the same transaction as
+    the Diplome update. On PostgreSQL writers are serialized with an advisory
+    lock so ids become visible in commit order (no cursor can skip an event).
+    """
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [ANNULATION_FEED_LOCK])
+
+    AnnulationEvent.objects.create(
+        diplome=diplome,
+        verification_uuid=diplome.verification_uuid,
+        hash_signature=diplome.hash_signature,
+        action=action,
+        raison=diplome.raison_annulation,
+    )
+
+
 class DiplomeAnnulationViewSet(viewsets.ViewSet):
     permission_classes = [IsAuthenticated]
 
     def get_object(self, pk):
-        return get_object_or_404(Diplome, pk=pk)
+        # Row lock: the est_annule check and the event are written by one request at a time
+        return get_object_or_404(Diplome.objects.select_for_update(), pk=pk)
 
-    @action(detail=True, methods=["post"])
-    def annuler(self, request, pk=None):
-        diplome = self.get_object(pk)
+    @action(detail=False, methods=["get"], permission_classes=[AllowAny])
+    def feed(self, request):
+        """
+        Annulation / reactivation events after `cursor`, in sequence order.
+        Clients store `next_cursor` and poll again with it.
 
-        if diplome.est_annule:
-            return Response(
-                {"error": "Diplôme déjà annulé"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        Public: uuid and hash are published as the SHA-256 digests of the
+        offline bundle ("uuid:<verification_uuid>", "hash:<hash_signature>"),
+        never in clear, and without the reason.
+        """
+        try:
+            cursor = int(request.query_params.get("cursor", 0))
+            limit = max(1, min(int(request.query_params.get("limit", 500)), 1000))
+        except ValueError:
+            return Response({"error": "cursor et limit doivent être des entiers"}, status=400)
+
+        # Primary key range scan
+        events = list(
+            AnnulationEvent.objects
+            .filter(id__gt=cursor)
+            .order_by("id")
+            .values("id", "verification_uuid", "hash_signature", "action", "created_at")[:limit + 1]
+        )
+        has_more = len(events) > limit
+        events = [
+            {
+                "id": e["id"],
+                "uuid": offline_bundle.digest(f"uuid:{e['verification_uuid']}"),
+                "hash": offline_bundle.digest(f"hash:{e['hash_signature']}"),
+                "action": e["action"],
+                "created_at": e["created_at"],
+            }
+            for e in events[:limit]
+        ]
 
+        return Response({
+            "events": events,
+            "next_cursor": events[-1]["id"] if events else cursor,
+            "has_more": has_more,
+        })
+
+    @action(detail=True, methods=["post"])
+    def annuler(self, request, pk=None):
         raison = request.data.get("raison_annulation")
         if not raison:
             return Response(
@@ -650,10 +838,19 @@ class DiplomeAnnulationViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        diplome.est_annule = True
-        diplome.annule_a = now()
-        diplome.raison_annulation = raison
-        diplome.save()
+        with transaction.atomic():
+            diplome = self.get_object(pk)
+            if diplome.est_annule:
+                return Response(
+                    {"error": "Diplôme déjà annulé"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+            diplome.est_annule = True
+            diplome.annule_a = now()
+            diplome.raison_annulation = raison
+            diplome.save()
+            record_annulation_event(diplome, "annule")
 
         return Response({
             "status": "annule",
@@ -662,18 +859,19 @@ class DiplomeAnnulationViewSet(viewsets.ViewSet):
 
     @action(detail=True, methods=["post"])
     def unannuler(self, request, pk=None):
-        diplome = self.get_object(pk)
-
-        if not diplome.est_annule:
-            return Response(
-                {"error": "Diplôme déjà actif"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        with transaction.atomic():
+            diplome = self.get_object(pk)
+            if not diplome.est_annule:
+                return Response(
+                    {"error": "Diplôme déjà actif"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        diplome.est_annule = False
-        diplome.annule_a = None
-        diplome.raison_annulation = ""
-        diplome.save()
+            diplome.est_annule = False
+            diplome.annule_a = None
+            diplome.raison_annulation = ""
+            diplome.save()
+            record_annulation_event(diplome, "reactive")
 
         return Response({
             "status": "unannule",
@@ -746,15 +944,14 @@ class ProfileView(APIView):
             )
             req.generate_code()
 
-            # SEND EMAIL 
+            # QUEUE EMAIL (sent in the background, core/mailer.py)
             # Note: Remove the print statement in production
             print(f"DEBUG CODE: {req.code}") 
-            send_mail(
+            mailer.queue_mail(
                 'Confirmez votre nouvel email',
                 f'Votre code de validation est : {req.code}',
                 'noreply@myapp.com',
                 [new_email],
-                fail_silently=False,
             )
 
             # Signal frontend to open OTP modal
@@ -824,10 +1021,11 @@ class ChangePasswordView(APIView):
         # 5. Add to History
         PasswordHistory.objects.create(user=user, password_hash=user.password)
 
-        # Keep session alive
+        # Revoke the other sessions' tokens, keep this one alive
+        bump_token_version(user)
         update_session_auth_hash(request, user)
 
-        return Response({"message": "Mot de passe modifié avec succès"})
+        return Response({"message": "Mot de passe modifié avec succès", **tokens_for(user)})
     
 
 
@@ -847,14 +1045,13 @@ class RequestPasswordResetView(APIView):
         PasswordResetRequest.objects.filter(user=user).delete()
         PasswordResetRequest.objects.create(user=user, code=code)
 
-        # Send Email
+        # Queue Email (sent in the background, core/mailer.py)
         print(f"DEBUG RESET CODE: {code}") # Remove in production
-        send_mail(
+        mailer.queue_mail(
             'Réinitialisation de mot de passe',
             f'Votre code de réinitialisation est : {code}',
             'noreply@myapp.com',
             [email],
-            fail_silently=False,
         )
         return Response({"message": "Code envoyé !"})
 
@@ -915,6 +1112,7 @@ class FinishPasswordResetView(APIView):
         
         PasswordHistory.objects.create(user=user, password_hash=user.password)
         reset_req.delete() # Consume code
+        bump_token_version(user) # Log out every session
 
         return Response({"message": "Mot de passe réinitialisé avec succès !"})
 
@@ -923,10 +1121,51 @@ class FinishPasswordResetView(APIView):
 class PVJuryViewSet(viewsets.ModelViewSet):
     queryset = PVJury.objects.all()
     serializer_class = PVJurySerializer
-    parser_classes = (MultiPartParser, FormParser)
+    parser_classes = (MultiPartParser, FormParser, JSONParser)
+    filter_params = {
+        "filiere": ("filiere_id", int),
+        "annee_universitaire": ("annee_universitaire_id", int),
+    }
+    ordering_fields = ["id", "date_upload"]
+    ordering = ["id"]
+
+    def create(self, request, *args, **kwargs):
+        """image_pv (multipart) or upload_id (completed chunked upload, see uploads/)"""
+        try:
+            file, upload = chunked_upload.request_file(request, "image_pv")
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        if upload is None:
+            return super().create(request, *args, **kwargs)
+
+        data = {k: v for k, v in request.data.items() if k != "upload_id"}
+        data["image_pv"] = file
+        with file:
+            serializer = self.get_serializer(data=data)
+            serializer.is_valid(raise_exception=True)
+            self.perform_create(serializer)
+        chunked_upload.release(upload)
+
+        return Response(serializer.data, status=status.HTTP_201_CREATED, headers=self.get_success_headers(serializer.data))
 
     def perform_create(self, serializer):
-        serializer.save(uploaded_by=self.request.user)
+        pv = serializer.save(uploaded_by=self.request.user)
+        # Downscale / WebP / thumbnails after the response (core/pv_images.py)
+        background.submit(pv_images.process_pv, pv.id)
+
+    def perform_update(self, serializer):
+        if "image_pv" not in serializer.validated_data:
+            serializer.save()
+            return
+        old_files = pv_images.stored_files(serializer.instance)
+        pv = serializer.save(traitement="pending", miniatures={})
+        # Replaced image and its thumbnails: removed once the new one is committed
+        transaction.on_commit(lambda: pv_images.delete_paths(old_files))
+        background.submit(pv_images.process_pv, pv.id)
+
+    def perform_destroy(self, instance):
+        pv_images.delete_files(instance)
+        instance.delete()
     
 
 
@@ -934,105 +1173,50 @@ class PVJuryViewSet(viewsets.ModelViewSet):
 class DashboardStatsView(APIView):
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
-        from .models import Verification, Diplome, Filiere, Etudiant, AnneeUniversitaire
-
-        verifications_by_day = (
-            Verification.objects
-            .annotate(day=TruncDate("date_verification"))
-            .values("day")
-            .annotate(total=Count("id"))
-            .order_by("day")
-        )
-
-        status_counts = (
-            Verification.objects
-            .values("statut")
-            .annotate(count=Count("id"))
-        )
-
-        diplome_by_filiere = (
-            Diplome.objects
-            .values("specialite__nom_filiere_fr")
-            .annotate(count=Count("id"))
-        )
-
-        diplome_by_year = (
-            Diplome.objects
-            .values("annee_obtention")
-            .annotate(count=Count("id"))
-            .order_by("annee_obtention")
-        )
-
-        annules = Diplome.objects.filter(est_annule=True).count()
-
-        # students per filiere -----------------
-        students_by_filiere = (
-            Etudiant.objects
-            .values("filiere__nom_filiere_fr")
-            .annotate(count=Count("id"))
-            .order_by("filiere__nom_filiere_fr")
-        )
-
-        # students per academic year -----------------
-        students_by_annee = (
-            Etudiant.objects
-            .values("annee_universitaire__code_annee")
-            .annotate(count=Count("id"))
-            .order_by("annee_universitaire__code_annee")
-        )
+    FILTERS = ("date_from", "date_to", "filiere", "annee_universitaire")
 
+    @use_replica()
+    def get(self, request):
+        try:
+            filters = self.parse_filters(request.query_params)
+        except ValueError:
+            return Response({"error": "Filtres invalides"}, status=400)
+
+        if filters:
+            # Filters pushed down into SQL (core/dashboard.py), short cache
+            key = "dashboard:" + ":".join(f"{k}={filters.get(k, '')}" for k in self.FILTERS)
+            stats = cache.get(key)
+            if stats is None:
+                try:
+                    stats = dashboard.filtered_stats(**filters)
+                except ValueError as e:
+                    return Response({"error": str(e)}, status=400)
+                cache.set(key, stats, getattr(settings, "DASHBOARD_CACHE_TIMEOUT", 60))
+        else:
+            # Pre-aggregated counters (see core/counters.py): bounded number of rows
+            stats = counters.dashboard_stats()
 
-        from datetime import date
-        today = date.today()
-        
-        # Get all birth dates
-        dates_naissance = Etudiant.objects.values_list('date_naissance', flat=True)
-        
-        ages = []
-        for d in dates_naissance:
-            if d:
-                # Calculate age in Python
-                age = today.year - d.year - ((today.month, today.day) < (d.month, d.day))
-                ages.append(age)
-
-        # Calculate Distribution
-        from collections import Counter
-        age_counts = Counter(ages)
-        
-        # Format for Recharts
-        age_distribution = [
-            {"age": age, "count": count} 
-            for age, count in sorted(age_counts.items())
-        ]
+        body = json.dumps(stats, cls=DjangoJSONEncoder, sort_keys=True)
+        etag = '"%s"' % hashlib.sha256(body.encode()).hexdigest()[:32]
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponse(status=304)
+        else:
+            response = Response(stats)
+        response["ETag"] = etag
+        response["Cache-Control"] = "private, no-cache"
+        # Per-process, per-instant metric: outside the hashed body
+        response["X-Signature-Queue-Depth"] = str(validation_queue_depth())
+        return response
 
-        # Calculate Average
-        avg_age = sum(ages) / len(ages) if ages else 0
-
-        # Optional useful extra statistics -----------------
-        totals = {
-            "students_total": Etudiant.objects.count(),
-            "diplomes_total": Diplome.objects.count(),
-            "verifications_total": Verification.objects.count(),
-            "verifications_last_7_days": Verification.objects.filter(
-                date_verification__gte=Now() - timedelta(days=7)
-            ).count(),
-        }
-
-        return Response({
-            "verifications_by_day": verifications_by_day,
-            "status_counts": status_counts,
-            "diplome_by_filiere": diplome_by_filiere,
-            "diplome_by_year": diplome_by_year,
-            "annules": annules,
-
-            # new
-            "students_by_filiere": students_by_filiere,
-            "students_by_annee": students_by_annee,
-            "age_distribution": age_distribution,
-            "avg_age": avg_age,
-            **totals,
-        })
+    def parse_filters(self, params):
+        filters = {}
+        for name in ("date_from", "date_to"):
+            if params.get(name):
+                filters[name] = datetime.strptime(params[name], "%Y-%m-%d").date()
+        for name in ("filiere", "annee_universitaire"):
+            if params.get(name):
+                filters[name] = int(params[name])
+        return filters
 
 
 
@@ -1063,7 +1247,12 @@ class PublicVerificationView(APIView):
 
 
         try:
-            diplome = Diplome.objects.get(verification_uuid=verification_uuid)
+            with use_replica():
+                diplome = (
+                    Diplome.objects
+                    .select_related("etudiant__filiere")
+                    .get(verification_uuid=verification_uuid)
+                )
 
             if diplome.est_annule:
                 Verification.objects.create(
@@ -1105,9 +1294,31 @@ class PublicVerificationView(APIView):
 class VerifyUploadedPdfView(APIView):
     permission_classes = [AllowAny]
 
-    @method_decorator(ratelimit(key="ip", rate="5/m", block=True))
+    def initialize_request(self, request, *args, **kwargs):
+        # Must be set before the body is parsed: hash + size check while spooling
+        request.upload_handlers = [
+            HashingUploadHandler(request, max_size=settings.VERIFY_PDF_MAX_SIZE)
+        ]
+        return super().initialize_request(request, *args, **kwargs)
+
+    @method_decorator(ratelimit(key="ip", rate="5/m", block=True, sensitive=True))
     def post(self, request):
+        too_large = Response(
+            {"valid": False, "error": "Fichier trop volumineux"},
+            status=413
+        )
+
+        # Reject early on the declared size, before reading the body
+        try:
+            content_length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            content_length = 0
+        if content_length > settings.VERIFY_PDF_MAX_SIZE + MULTIPART_OVERHEAD:
+            return too_large
+
         if "file" not in request.FILES:
+            if any(getattr(h, "too_large", False) for h in request.upload_handlers):
+                return too_large
             return Response(
                 {"valid": False, "error": "Aucun fichier fourni"},
                 status=400
@@ -1125,34 +1336,39 @@ class VerifyUploadedPdfView(APIView):
 
 
         try:
-            pdf_bytes = pdf_file.read()
-            reader = PdfFileReader(io.BytesIO(pdf_bytes))
-
-            if not reader.embedded_signatures:
+            if not pdf_file.size:
                 failed_verification()
                 return Response(
-                    {"valid": False, "error": "Signature absente"},
+                    {"valid": False, "error": "Fichier vide"},
                     status=400
                 )
 
-            sig = reader.embedded_signatures[0]
+            # Hashed chunk by chunk by HashingUploadHandler while spooling
+            pdf_hash = pdf_file.sha256
 
-            vc = ValidationContext()
-            sig_status = validate_pdf_signature(sig, vc)
+            # Signature check (memoized by file hash), off the request thread
+            try:
+                sig_result = validate_signed_pdf(pdf_file.temporary_file_path(), pdf_hash)
+            except ValidationBusy:
+                response = Response(
+                    {"valid": False, "error": "Service de vérification occupé, réessayez"},
+                    status=503
+                )
+                response["Retry-After"] = "5"
+                return response
 
-            if not sig_status.valid:
+            if not sig_result["valid"]:
                 failed_verification()
                 return Response(
-                    {"valid": False, "error": "Signature invalide"},
+                    {"valid": False, "error": sig_result["error"]},
                     status=400
                 )
 
             # 🔒 Bind PDF to database record
-            pdf_hash = hashlib.sha256(pdf_bytes).hexdigest()
-
-            diplome = Diplome.objects.filter(
-                hash_signature=pdf_hash
-            ).first()
+            with use_replica():
+                diplome = Diplome.objects.select_related("etudiant__filiere").filter(
+                    hash_signature=pdf_hash
+                ).first()
 
 
             if not diplome:
@@ -1198,6 +1414,195 @@ class VerifyUploadedPdfView(APIView):
 
 
 
+# ==== resumable chunked uploads (core/chunked_upload.py) ====
+def upload_error(e):
+    body = {"error": str(e)}
+    if e.offset is not None:
+        body["offset"] = e.offset
+    return Response(body, status=e.status)
+
+
+class ChunkedUploadView(APIView):
+    """POST uploads/ {filename, size, sha256} -> 201, then PUT the chunks on uploads/<id>/"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        try:
+            upload = chunked_upload.initiate(
+                request.user,
+                request.data.get("filename"),
+                request.data.get("size"),
+                request.data.get("sha256"),
+            )
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        return Response(chunked_upload.describe(upload), status=201)
+
+
+class ChunkedUploadDetailView(APIView):
+    """
+    GET uploads/<id>/ : offset to resume from
+    PUT uploads/<id>/ : raw chunk, headers Upload-Offset and optionally
+                        Upload-Checksum: sha256 <hex>
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, upload_id):
+        try:
+            upload = chunked_upload.get_upload(upload_id, request.user)
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        return Response(chunked_upload.describe(upload))
+
+    def put(self, request, upload_id):
+        try:
+            offset = int(request.headers.get("Upload-Offset", ""))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return Response({"error": "En-tête Upload-Offset requis"}, status=400)
+
+        checksum = None
+        algorithm, _, value = request.headers.get("Upload-Checksum", "").partition(" ")
+        if algorithm:
+            if algorithm.lower() != "sha256":
+                return Response({"error": "Upload-Checksum : seul sha256 est supporté"}, status=400)
+            checksum = value.strip().lower()
+
+        try:
+            # Body read from the stream (request.data is never parsed here)
+            upload = chunked_upload.write_chunk(upload_id, request.user, offset, request.stream, length, checksum)
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        return Response(chunked_upload.describe(upload))
+
+
+class ChunkedUploadCompleteView(APIView):
+    """POST uploads/<id>/complete/ : checks the size and sha256 of the assembled file"""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        try:
+            upload = chunked_upload.complete(upload_id, request.user)
+        except chunked_upload.UploadError as e:
+            return upload_error(e)
+        return Response(chunked_upload.describe(upload))
+
+# ==== exports (students, diplomas, verification logs) ====
+class ExportView(APIView):
+    """
+    exports/<etudiants|diplomes|verifications>/?file_type=csv|xlsx
+    filters: filiere, annee, annee_universitaire, est_annule, statut, date_from, date_to
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind):
+        if kind not in exports.EXPORTS:
+            return Response({"error": "Export inconnu"}, status=404)
+
+        file_type = request.query_params.get("file_type", "csv")
+        if file_type not in ("csv", "xlsx"):
+            return Response({"error": "file_type doit être csv ou xlsx"}, status=400)
+
+        try:
+            queryset = exports.build_queryset(kind, request.query_params)
+        except ValueError:
+            return Response({"error": "Filtres invalides"}, status=400)
+
+        filename = f"{kind}_{now():%Y%m%d_%H%M}"
+        if file_type == "xlsx":
+            if not exports.xlsx_allowed(queryset):
+                return Response({"error": "Trop de lignes pour un export XLSX, utilisez file_type=csv"}, status=400)
+            return exports.xlsx_response(kind, queryset, filename)
+        return exports.csv_response(kind, queryset, filename)
+
+
+class AnalyticsExportView(APIView):
+    """
+    analytics/verifications/?since_id=&limit=
+    Parquet file of the verifications after since_id (joined with diploma and
+    filière). X-Last-Id gives the since_id of the next call.
+    """
+    permission_classes = [IsAuthenticated]
+    MAX_ROWS = 500000
+
+    def get(self, request):
+        if not analytics_export.HAS_PYARROW:
+            return Response({"error": "Export Parquet indisponible (pyarrow non installé)"}, status=501)
+
+        try:
+            since_id = int(request.query_params.get("since_id", 0))
+            limit = min(int(request.query_params.get("limit", self.MAX_ROWS)), self.MAX_ROWS)
+        except ValueError:
+            return Response({"error": "since_id et limit doivent être des entiers"}, status=400)
+        if since_id < 0 or limit < 1:
+            return Response({"error": "since_id et limit doivent être des entiers"}, status=400)
+
+        tmp, count, last_id = analytics_export.export_to_file(since_id, limit)
+
+        response = FileResponse(
+            tmp,
+            as_attachment=True,
+            filename=f"verifications_{since_id + 1}_{last_id}.parquet",
+            content_type="application/vnd.apache.parquet",
+        )
+        response["X-Row-Count"] = str(count)
+        response["X-Last-Id"] = str(last_id)
+        return response
+
+
+
+# ==== offline verification bundle (mobile app) ====
+class OfflineBundleView(APIView):
+    permission_classes = [AllowAny]
+
+    @method_decorator(ratelimit(key="ip", rate=settings.OFFLINE_BUNDLE_RATE, block=True))
+    @use_replica()
+    def get(self, request):
+        since = request.query_params.get("since")
+        if since is not None:
+            try:
+                since = int(since)
+            except ValueError:
+                return Response({"error": "since invalide"}, status=400)
+
+        version, state = offline_bundle.current_state()
+        # Only published versions: an arbitrary since would build (and cache) a bundle per value
+        if since is not None and not 0 <= since <= version:
+            return Response({"error": "since invalide", "version": version}, status=400)
+        # Too old for a delta: full bundle, so since only spans the last OFFLINE_BUNDLE_MAX_DELTA versions
+        if since is not None and since < version - getattr(settings, "OFFLINE_BUNDLE_MAX_DELTA", 20000):
+            since = None
+        etag = f'"{state}-{since if since is not None else "full"}"'
+        if request.headers.get("If-None-Match") == etag:
+            response = HttpResponse(status=304)
+            response["ETag"] = etag
+            return response
+
+        timeout = getattr(settings, "OFFLINE_BUNDLE_CACHE_TIMEOUT", 60 * 10)
+        bundle = None
+
+        if since is not None:
+            key = f"offline_bundle:delta:{state}:{since}"
+            bundle = cache.get(key)
+            if bundle is None:
+                bundle = offline_bundle.build_delta_bundle(since)
+                if bundle is not None:
+                    cache.set(key, bundle, timeout)
+
+        # No "since", or the delta is too big: full bundle
+        if bundle is None:
+            key = f"offline_bundle:full:{state}"
+            bundle = cache.get(key)
+            if bundle is None:
+                bundle = offline_bundle.build_full_bundle()
+                cache.set(key, bundle, timeout)
+
+        response = Response(bundle)
+        response["ETag"] = etag
+        return response
+
+
+
 class UserMeView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -0,0 +1,114 @@
+# core/async_views.py
+"""
+Async (ASGI) versions of the public verification endpoints.
+
+Run under ASGI to use them without holding a thread per waiting client, e.g.
+    gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
+
+The synchronous DRF views in api_views.py stay available at their
+usual URLs.
+"""
+import re
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from .models import Diplome, Verification
+from .throttling import consume, client_ip_key, fail_open
+from .api_views import get_client_ip
+from .db_router import use_replica
+
+
+RATE = "5/m"
+
+NO_CACHE = "no-cache, no-store, must-revalidate"
+
+
+def _json(data, status=200):
+    response = JsonResponse(data, status=status, json_dumps_params={"ensure_ascii": False})
+    response["Cache-Control"] = NO_CACHE
+    return response
+
+
+async def _is_limited(request, group):
+    allowed = await sync_to_async(consume)(f"{group}:{client_ip_key(request)}", RATE, fail_open())
+    return not allowed
+
+
+async def _lookup(**filters):
+    # select_related: lazy FK loads are not allowed in async code
+    with use_replica():
+        return await (
+            Diplome.objects
+            .select_related("etudiant__filiere")
+            .filter(**filters)
+            .afirst()
+        )
+
+
+async def _verified_response(diplome, ip, include_email=True):
+    if diplome is None:
+        await Verification.objects.acreate(diplome=None, adresse_ip=ip, statut="failed")
+        return _json({"valid": False, "error": "Diplôme invalide"}, status=404)
+
+    if diplome.est_annule:
+        await Verification.objects.acreate(diplome=diplome, adresse_ip=ip, statut="failed")
+        return _json({
+            "valid": False,
+            "error": "Diplôme annulé",
+            "raison_annulation": diplome.raison_annulation,
+            "annule_a": diplome.annule_a,
+        }, status=410)
+
+    await Verification.objects.acreate(diplome=diplome, adresse_ip=ip, statut="succes")
+
+    etudiant = diplome.etudiant
+    data = {
+        "valid": True,
+        "nom": etudiant.nom_prenom_fr,
+        "matricule": etudiant.matricule,
+        "filiere": etudiant.filiere.nom_filiere_fr,
+        "date_emission": diplome.date_televersement,
+        "annee": diplome.annee_obtention,
+        "verification_uuid": diplome.verification_uuid,
+    }
+    if include_email:
+        data["email"] = etudiant.email
+    return _json(data)
+
+
+@require_GET
+async def public_verify(request, verification_uuid):
+    """Same contract as PublicVerificationView (verify/<uuid>/)."""
+    ip = get_client_ip(request)
+
+    if await _is_limited(request, "async.public_verify"):
+        await Verification.objects.acreate(diplome=None, adresse_ip=ip, statut="failed")
+        return _json({"error": "rate_limit_exceeded"}, status=429)
+
+    if not re.fullmatch(r"[0-9a-f]{32}", verification_uuid):
+        return _json({"valid": False}, status=400)
+
+    diplome = await _lookup(verification_uuid=verification_uuid)
+    return await _verified_response(diplome, ip)
+
+
+@require_GET
+async def verify_hash(request, pdf_hash):
+    """
+    Lookup by the SHA-256 of the signed PDF, computed client side
+    (web/src/utils/hashPdf.js). Only the registered signed file matches.
+    """
+    ip = get_client_ip(request)
+
+    if await _is_limited(request, "async.verify_hash"):
+        await Verification.objects.acreate(diplome=None, adresse_ip=ip, statut="failed")
+        return _json({"error": "rate_limit_exceeded"}, status=429)
+
+    pdf_hash = pdf_hash.lower()
+    if not re.fullmatch(r"[0-9a-f]{64}", pdf_hash):
+        return _json({"valid": False}, status=400)
+
+    diplome = await _lookup(hash_signature=pdf_hash)
+    return await _verified_response(diplome, ip, include_email=False)
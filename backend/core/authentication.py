@@ -0,0 +1,169 @@
+"""
+Stateless JWT authentication.
+
+Access tokens carry the user's id, username, is_superuser / is_staff and a
+token version (claim "ver"). ClaimsJWTAuthentication trusts these signed
+claims instead of loading the User row on every request: the view gets a
+ClaimsUser, a lazy object that answers id / username / is_superuser from
+the token and only loads the full User when anything else is used
+(email, save(), ORM lookups...).
+
+Revocation: each user has a TokenVersion. bump_token_version() (password
+change / reset) invalidates every token issued before, refresh tokens
+included. The current version is cached TOKEN_VERSION_CACHE_TIMEOUT seconds
+per user in the "shared" cache, which every worker reads, so a bump is seen
+everywhere as soon as it commits. Deactivated users are rejected the same way.
+
+Changing is_superuser, is_staff or is_active through User.save() bumps the
+version too (core/signals.py), so a demoted user can't keep the privileges
+of an older token. QuerySet.update() skips that signal: call
+bump_token_version() after updating those fields in bulk.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F
+from django.utils.functional import SimpleLazyObject, empty
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenVersion
+
+
+VERSION_CLAIM = "ver"
+
+
+# ===================== TOKEN VERSION =====================
+
+def _cache():
+    return caches["shared"]
+
+
+def _cache_key(user_id):
+    return f"auth:token_version:{user_id}"
+
+
+def token_version(user_id):
+    """Current token version of an active user, None if missing or inactive (cached)."""
+    key = _cache_key(user_id)
+    version = _cache().get(key, empty)
+    if version is empty:
+        rows = list(
+            User.objects.filter(pk=user_id, is_active=True)
+            .values_list("token_version__version", flat=True)
+        )
+        version = (rows[0] or 0) if rows else None
+        _cache().set(key, version, getattr(settings, "TOKEN_VERSION_CACHE_TIMEOUT", 60))
+    return version
+
+
+def bump_token_version(user):
+    """Revoke all the tokens issued so far to this user."""
+    tv, created = TokenVersion.objects.get_or_create(user_id=user.pk, defaults={"version": 1})
+    if not created:
+        TokenVersion.objects.filter(pk=tv.pk).update(version=F("version") + 1)
+    # Again after commit: a concurrent request may have cached the old version meanwhile
+    _cache().delete(_cache_key(user.pk))
+    transaction.on_commit(lambda: _cache().delete(_cache_key(user.pk)))
+
+
+def _check_version(token):
+    user_id = token.get(api_settings.USER_ID_CLAIM)
+    if user_id is None:
+        raise InvalidToken("Token sans identifiant utilisateur")
+
+    version = token_version(user_id)
+    if version is None:
+        raise AuthenticationFailed("Utilisateur introuvable ou inactif", code="user_not_found")
+    if token.get(VERSION_CLAIM, 0) != version:
+        raise AuthenticationFailed("Token révoqué, reconnectez-vous", code="token_revoked")
+    return user_id
+
+
+# ===================== USER =====================
+
+class ClaimsUser(SimpleLazyObject):
+    """
+    request.user built from the token claims. id, pk, username and
+    is_superuser / is_staff are read from the claims; any other attribute
+    loads the User (one query, then cached on the object).
+    """
+
+    def __init__(self, token):
+        user_id = int(token[api_settings.USER_ID_CLAIM])
+        super().__init__(lambda: User.objects.get(pk=user_id))
+        self.__dict__["_claims"] = {
+            "id": user_id,
+            "username": token.get("username", ""),
+            "is_superuser": bool(token.get("is_superuser", False)),
+            "is_staff": bool(token.get("is_staff", False)),
+        }
+
+    def _claim(name):
+        def get(self):
+            if self._wrapped is not empty:
+                return getattr(self._wrapped, name)
+            return self._claims[name]
+        return property(get)
+
+    id = _claim("id")
+    pk = _claim("id")
+    username = _claim("username")
+    is_superuser = _claim("is_superuser")
+    is_staff = _claim("is_staff")
+    del _claim
+
+    # The token was valid and the user active (checked with the version)
+    is_active = True
+    is_authenticated = True
+    is_anonymous = False
+
+    def __bool__(self):
+        return True
+
+    def __repr__(self):
+        return f"<ClaimsUser: {self._claims['username']} ({self._claims['id']})>"
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication without the per-request User query."""
+
+    def get_user(self, validated_token):
+        _check_version(validated_token)
+        # Tokens issued before the claims were added: regular lookup
+        if "username" not in validated_token:
+            return super().get_user(validated_token)
+        return ClaimsUser(validated_token)
+
+
+# ===================== TOKENS =====================
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """api/token/: adds the claims read by ClaimsJWTAuthentication."""
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.username
+        token["is_superuser"] = user.is_superuser
+        token["is_staff"] = user.is_staff
+        token[VERSION_CLAIM] = token_version(user.pk) or 0
+        return token
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """api/token/refresh/: refuses refresh tokens of a revoked version."""
+
+    def validate(self, attrs):
+        _check_version(self.token_class(attrs["refresh"]))
+        return super().validate(attrs)
+
+
+def tokens_for(user):
+    """New access / refresh pair (e.g. to keep the session after a password change)."""
+    refresh = ClaimsTokenObtainPairSerializer.get_token(user)
+    return {"refresh": str(refresh), "access": str(refresh.access_token)}
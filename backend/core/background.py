@@ -0,0 +1,37 @@
+# core/background.py
+"""
+Small in-process executor for long tasks started by a request (imports...).
+
+The task starts once the current transaction commits, in a worker thread
+with its own database connection. Tasks are also recorded in the database
+by their callers (e.g. ImportJob), so `manage.py run_import_jobs` can pick
+up whatever a restarted process left behind.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, "BACKGROUND_WORKERS", 2),
+    thread_name_prefix="background",
+)
+
+
+def _run(fn, args, kwargs):
+    close_old_connections()
+    try:
+        fn(*args, **kwargs)
+    except Exception:
+        logger.exception("Background task %s failed", getattr(fn, "__name__", fn))
+    finally:
+        connection.close()
+
+
+def submit(fn, *args, **kwargs):
+    """Run fn(*args, **kwargs) in the background after the current transaction commits."""
+    transaction.on_commit(lambda: _executor.submit(_run, fn, args, kwargs))
@@ -0,0 +1,282 @@
+"""
+Resumable chunked uploads (PV scans, student import files).
+
+    POST uploads/                {filename, size, sha256}   -> 201 {id, offset: 0, chunk_size, ...}
+    PUT  uploads/<id>/           raw bytes + Upload-Offset   -> {offset, ...}
+    GET  uploads/<id>/           where to resume             -> {offset, size, status, ...}
+    POST uploads/<id>/complete/  size and sha256 checked     -> {status: "complete", ...}
+
+Status: uploading -> completing (sha256 being checked) -> complete.
+
+Chunks are written directly at their offset in a single file under
+CHUNKED_UPLOAD_DIR (nothing to merge at the end), read from the request
+stream in small blocks: a chunk is never held in memory. A chunk must start
+at the current offset; otherwise 409 with the offset to resume from. No lock
+is held while a chunk streams in (see write_chunk). The
+optional header `Upload-Checksum: sha256 <hex>` checks the chunk itself; the
+whole file is checked against the announced sha256 on completion.
+
+A completed upload is used by passing `upload_id` instead of the file to
+pvs/ (image_pv), etudiants/import_excel/ or etudiants/import_async/. Uploads
+left unfinished are removed by `manage.py purge_uploads`.
+"""
+import hashlib
+import os
+import re
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import UploadedFile
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import ChunkedUpload
+
+
+READ_SIZE = 64 * 1024
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+class UploadError(Exception):
+    """Refused request; `offset` tells the client where to resume."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+def _chunk_size():
+    return getattr(settings, "CHUNKED_UPLOAD_CHUNK_SIZE", 5 * 1024 * 1024)
+
+
+def describe(upload):
+    return {
+        "id": str(upload.id),
+        "filename": upload.nom_fichier,
+        "size": upload.taille,
+        "offset": upload.recu,
+        "status": upload.status,
+        "chunk_size": _chunk_size(),
+    }
+
+
+def get_upload(upload_id, user, lock=False):
+    queryset = ChunkedUpload.objects.select_for_update() if lock else ChunkedUpload.objects
+    try:
+        return queryset.get(pk=upload_id, created_by_id=user.pk)
+    except (ChunkedUpload.DoesNotExist, ValidationError):
+        raise UploadError("Upload introuvable", status=404)
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# ===================== PROTOCOL =====================
+
+def initiate(user, filename, size, sha256):
+    filename = os.path.basename(filename or "").strip()
+    sha256 = (sha256 or "").strip().lower()
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError("filename, size et sha256 requis")
+
+    if not filename or not SHA256_RE.match(sha256):
+        raise UploadError("filename, size et sha256 (hex) requis")
+    if size < 1 or size > getattr(settings, "CHUNKED_UPLOAD_MAX_SIZE", 1024 ** 3):
+        raise UploadError("Taille de fichier non autorisée", status=413)
+
+    os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+    upload = ChunkedUpload(nom_fichier=filename[:255], taille=size, sha256=sha256, created_by_id=user.pk)
+    upload.fichier = os.path.join(settings.CHUNKED_UPLOAD_DIR, f"{upload.id.hex}.part")
+    open(upload.fichier, "wb").close()
+    upload.save()
+    return upload
+
+
+def _claim_timeout():
+    return timedelta(seconds=getattr(settings, "CHUNKED_UPLOAD_CLAIM_TIMEOUT", 600))
+
+
+def _release_claim(upload_id, token):
+    ChunkedUpload.objects.filter(pk=upload_id, claim=token).update(claim=None, claimed_at=None)
+
+
+def _write(path, offset, stream, length):
+    """Copy `length` bytes from `stream` at `offset`. Returns (bytes written, sha256 hex)."""
+    digest = hashlib.sha256()
+    received = 0
+    with open(path, "r+b") as f:
+        f.seek(offset)
+        try:
+            while received < length:
+                data = stream.read(min(READ_SIZE, length - received))
+                if not data:
+                    break
+                f.write(data)
+                digest.update(data)
+                received += len(data)
+        except OSError:
+            pass  # connection dropped: handled as an incomplete chunk
+    return received, digest.hexdigest()
+
+
+def write_chunk(upload_id, user, offset, stream, length, checksum=None):
+    """
+    Write `length` bytes read from `stream` at `offset` (must be the current offset).
+
+    No row lock or transaction is held while the body streams in: the chunk is
+    claimed with a conditional UPDATE (offset unchanged, nobody else writing),
+    then the new offset is committed with a second conditional UPDATE on the
+    claim token. A claim left by a dead request expires after
+    CHUNKED_UPLOAD_CLAIM_TIMEOUT. Bytes of a failed chunk are simply
+    overwritten by the retry; the file is trimmed to its size on completion.
+    """
+    if length is None or length < 1:
+        raise UploadError("Content-Length requis", status=411)
+    if length > _chunk_size():
+        raise UploadError(f"Morceau trop volumineux (max {_chunk_size()} octets)", status=413)
+
+    upload = get_upload(upload_id, user)
+    if upload.status != "uploading":
+        raise UploadError("Upload déjà terminé", status=409, offset=upload.recu)
+    if offset != upload.recu:
+        raise UploadError("Offset inattendu", status=409, offset=upload.recu)
+    if offset + length > upload.taille:
+        raise UploadError("Le morceau dépasse la taille annoncée", offset=upload.recu)
+
+    token = uuid.uuid4()
+    now = timezone.now()
+    claimed = ChunkedUpload.objects.filter(
+        Q(claim__isnull=True) | Q(claimed_at__lt=now - _claim_timeout()),
+        pk=upload.pk, status="uploading", recu=offset,
+    ).update(claim=token, claimed_at=now)
+    if not claimed:
+        upload.refresh_from_db()
+        if upload.status == "uploading" and upload.recu == offset:
+            raise UploadError("Ce morceau est déjà en cours d'envoi", status=409, offset=offset)
+        raise UploadError("Offset inattendu", status=409, offset=upload.recu)
+
+    try:
+        received, digest = _write(upload.fichier, offset, stream, length)
+    except BaseException:
+        _release_claim(upload.pk, token)
+        raise
+
+    error = None
+    if received != length:
+        error = "Morceau incomplet"
+    elif checksum and digest != checksum:
+        error = "Checksum du morceau invalide"
+    if error:
+        _release_claim(upload.pk, token)
+        raise UploadError(error, offset=offset)
+
+    committed = ChunkedUpload.objects.filter(pk=upload.pk, claim=token, recu=offset).update(
+        recu=offset + length, claim=None, claimed_at=None, updated_at=timezone.now(),
+    )
+    if not committed:
+        # Claim expired and the chunk was taken over by another request
+        upload.refresh_from_db()
+        raise UploadError("Offset inattendu", status=409, offset=upload.recu)
+    upload.recu = offset + length
+    return upload
+
+
+def complete(upload_id, user):
+    """
+    Check size and sha256 of the assembled file. A corrupted file is reset to offset 0.
+
+    Hashing a large file takes a while: the row is only locked to mark it
+    "completing" (claimed like a chunk, so no chunk or second completion can
+    start), the file is hashed without any lock, then the result is
+    committed with a conditional UPDATE on the claim token.
+    """
+    token = uuid.uuid4()
+    with transaction.atomic():
+        upload = get_upload(upload_id, user, lock=True)
+        if upload.status == "complete":
+            return upload
+        claim_live = upload.claim is not None and upload.claimed_at >= timezone.now() - _claim_timeout()
+        if upload.status == "completing" and claim_live:
+            raise UploadError("Vérification déjà en cours", status=409, offset=upload.recu)
+        if upload.recu != upload.taille or (upload.status == "uploading" and claim_live):
+            raise UploadError("Upload incomplet", status=409, offset=upload.recu)
+        upload.status, upload.claim, upload.claimed_at = "completing", token, timezone.now()
+        upload.save(update_fields=["status", "claim", "claimed_at", "updated_at"])
+
+    try:
+        # Drop what failed or superseded attempts may have left past the end
+        os.truncate(upload.fichier, upload.taille)
+        valid = _sha256(upload.fichier) == upload.sha256
+        if not valid:
+            open(upload.fichier, "wb").close()
+    except BaseException:
+        ChunkedUpload.objects.filter(pk=upload.pk, claim=token).update(
+            status="uploading", claim=None, claimed_at=None,
+        )
+        raise
+
+    if valid:
+        changes = {"status": "complete"}
+    else:
+        changes = {"status": "uploading", "recu": 0}
+    committed = ChunkedUpload.objects.filter(pk=upload.pk, claim=token, status="completing").update(
+        claim=None, claimed_at=None, updated_at=timezone.now(), **changes,
+    )
+    if not committed:
+        # Claim expired and another completion took over
+        upload.refresh_from_db()
+        raise UploadError("Vérification reprise par une autre requête", status=409, offset=upload.recu)
+
+    if valid:
+        upload.status, upload.claim, upload.claimed_at = "complete", None, None
+        return upload
+    raise UploadError("Checksum invalide : fichier corrompu, renvoyez-le", status=422, offset=0)
+
+
+# ===================== CONSUMERS =====================
+
+def request_file(request, field):
+    """
+    request.FILES[field], or else the completed upload named by upload_id.
+    Returns (file, upload); upload is None for a regular multipart file.
+    """
+    file = request.FILES.get(field)
+    upload_id = request.data.get("upload_id")
+    if file is not None or not upload_id:
+        return file, None
+
+    upload = get_upload(upload_id, request.user)
+    if upload.status != "complete":
+        raise UploadError("Upload non terminé", status=409, offset=upload.recu)
+    return UploadedFile(open(upload.fichier, "rb"), name=upload.nom_fichier, size=upload.taille), upload
+
+
+def release(upload):
+    """Delete a consumed (or abandoned) upload and its file."""
+    try:
+        os.remove(upload.fichier)
+    except FileNotFoundError:
+        pass
+    upload.delete()
+
+
+def purge(hours=None):
+    """Remove uploads untouched for CHUNKED_UPLOAD_EXPIRY_HOURS. Returns how many."""
+    hours = hours or getattr(settings, "CHUNKED_UPLOAD_EXPIRY_HOURS", 24)
+    stale = ChunkedUpload.objects.filter(updated_at__lt=timezone.now() - timedelta(hours=hours))
+    count = 0
+    for upload in stale.iterator():
+        release(upload)
+        count += 1
+    return count
@@ -0,0 +1,265 @@
+"""
+Pre-aggregated dashboard counters.
+
+Counters are kept up to date incrementally by the signals in
+core/signals.py (students, diplomas, cancellations). Bulk paths that skip
+signals (bulk_create / bulk_update) call the helpers below themselves.
+`manage.py recompute_dashboard_counters` rebuilds everything from scratch
+(repair / periodic refresh).
+
+Verifications are not counted per request (every public verification would
+update the same two hot rows): their counters cover the rolled-up days only
+and are refreshed by `manage.py rollup_verifications`; the raw rows not
+rolled up yet (today, at most a day or two) are added at read time.
+
+DashboardStatsView then reads a bounded number of rows (one per filière,
+year, day, ... ) whatever the number of students or verifications.
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.db import connection, transaction, IntegrityError
+from django.db.models import Count, DateField, F, Sum
+from django.db.models.functions import Cast
+
+from .models import DashboardCounter, Etudiant, Diplome, Filiere, AnneeUniversitaire
+from . import rollups
+from .dashboard import Age, age_distribution
+
+
+STUDENTS_BY_FILIERE = "students_by_filiere"
+STUDENTS_BY_ANNEE = "students_by_annee"
+STUDENTS_BY_BIRTHDATE = "students_by_birthdate"
+DIPLOMES_BY_FILIERE = "diplomes_by_filiere"
+DIPLOMES_BY_YEAR = "diplomes_by_year"
+DIPLOMES_ANNULES = "diplomes_annules"
+VERIFICATIONS_BY_DAY = "verifications_by_day"
+VERIFICATIONS_BY_STATUT = "verifications_by_statut"
+
+# pg_advisory_xact_lock key of the rebuilds
+COUNTERS_LOCK = 4242035
+
+
+# ===================== WRITES =====================
+
+def bump(name, key, delta=1):
+    """Atomically add `delta` to counter (name, key), creating it if needed."""
+    if not delta:
+        return
+    key = "" if key is None else str(key)
+
+    updated = DashboardCounter.objects.filter(name=name, key=key).update(value=F("value") + delta)
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            DashboardCounter.objects.create(name=name, key=key, value=delta)
+    except IntegrityError:
+        # Created concurrently
+        DashboardCounter.objects.filter(name=name, key=key).update(value=F("value") + delta)
+
+
+def bump_many(name, counts, sign=1):
+    """Apply a {key: n} Counter (e.g. built while bulk inserting)."""
+    for key, n in counts.items():
+        bump(name, key, sign * n)
+
+
+def student_keys(filiere_id, annee_id, date_naissance):
+    return {
+        STUDENTS_BY_FILIERE: filiere_id,
+        STUDENTS_BY_ANNEE: annee_id,
+        STUDENTS_BY_BIRTHDATE: date_naissance.isoformat() if date_naissance else None,
+    }
+
+
+def diplome_keys(specialite_id, annee_obtention, est_annule):
+    keys = {
+        DIPLOMES_BY_FILIERE: specialite_id,
+        DIPLOMES_BY_YEAR: annee_obtention,
+    }
+    if est_annule:
+        keys[DIPLOMES_ANNULES] = ""
+    return keys
+
+
+def apply_change(old_keys, new_keys):
+    """
+    Move one row from old_keys to new_keys (dicts name -> key).
+    old_keys=None means created, new_keys=None means deleted.
+    """
+    old_keys = old_keys or {}
+    new_keys = new_keys or {}
+    for name in set(old_keys) | set(new_keys):
+        old, new = old_keys.get(name), new_keys.get(name)
+        if old == new:
+            continue
+        if old is not None:
+            bump(name, old, -1)
+        if new is not None:
+            bump(name, new, +1)
+
+
+def students_created(rows):
+    """Counters for students inserted with bulk_create (list of Etudiant)."""
+    per_name = defaultdict(Counter)
+    for e in rows:
+        for name, key in student_keys(e.filiere_id, e.annee_universitaire_id, e.date_naissance).items():
+            if key is not None:
+                per_name[name][key] += 1
+    for name, counts in per_name.items():
+        bump_many(name, counts)
+
+
+# ===================== RECOMPUTE =====================
+
+def _lock():
+    """Serialize rebuilds (a second one waits instead of hitting the unique constraint)."""
+    if connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s)", [COUNTERS_LOCK])
+
+
+@transaction.atomic
+def recompute_all():
+    """Rebuild every counter from the source tables (full scans, on the primary)."""
+    _lock()
+    rows = []
+
+    def add(name, queryset, field):
+        for r in queryset:
+            key = r[field]
+            if key is None:
+                continue
+            rows.append(DashboardCounter(
+                name=name,
+                key=key.isoformat() if isinstance(key, date) else str(key),
+                value=r["n"],
+            ))
+
+    add(STUDENTS_BY_FILIERE, Etudiant.objects.values("filiere_id").annotate(n=Count("id")), "filiere_id")
+    add(STUDENTS_BY_ANNEE, Etudiant.objects.values("annee_universitaire_id").annotate(n=Count("id")), "annee_universitaire_id")
+    add(STUDENTS_BY_BIRTHDATE, Etudiant.objects.values("date_naissance").annotate(n=Count("id")), "date_naissance")
+    add(DIPLOMES_BY_FILIERE, Diplome.objects.values("specialite_id").annotate(n=Count("id")), "specialite_id")
+    add(DIPLOMES_BY_YEAR, Diplome.objects.values("annee_obtention").annotate(n=Count("id")), "annee_obtention")
+
+    annules = Diplome.objects.filter(est_annule=True).count()
+    if annules:
+        rows.append(DashboardCounter(name=DIPLOMES_ANNULES, key="", value=annules))
+
+    rows += _verification_rows()
+
+    DashboardCounter.objects.all().delete()
+    DashboardCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _verification_rows():
+    """Verification counters of the rolled-up days (VerificationDaily)."""
+    rows = []
+    for r in rollups.rolled_rows().values("day").annotate(n=Sum("total")).order_by():
+        rows.append(DashboardCounter(name=VERIFICATIONS_BY_DAY, key=r["day"].isoformat(), value=r["n"]))
+    for r in rollups.rolled_rows().values("statut").annotate(n=Sum("total")).order_by():
+        rows.append(DashboardCounter(name=VERIFICATIONS_BY_STATUT, key=r["statut"], value=r["n"]))
+    return rows
+
+
+@transaction.atomic
+def refresh_verification_counters():
+    """Rebuild the verification counters after new days were rolled up."""
+    _lock()
+    rows = _verification_rows()
+    DashboardCounter.objects.filter(name__in=[VERIFICATIONS_BY_DAY, VERIFICATIONS_BY_STATUT]).delete()
+    DashboardCounter.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+# ===================== READS =====================
+
+def snapshot():
+    """{name: {key: value}} for every counter (one query)."""
+    data = defaultdict(dict)
+    for name, key, value in DashboardCounter.objects.values_list("name", "key", "value"):
+        if value:
+            data[name][key] = value
+    return data
+
+
+def age_stats():
+    """
+    Age distribution + average, computed in SQL over the birthdate counters
+    (one row per distinct birthdate, not per student).
+    """
+    birthdates = (
+        DashboardCounter.objects
+        .filter(name=STUDENTS_BY_BIRTHDATE, value__gt=0)
+        .annotate(age=Age(Cast("key", DateField())))
+    )
+    rows = birthdates.values("age").annotate(count=Sum("value")).order_by("age")
+    totals = birthdates.aggregate(weighted=Sum(F("age") * F("value")), students=Sum("value"))
+    avg = totals["weighted"] / totals["students"] if totals["students"] else 0
+    return age_distribution(rows), avg
+
+
+def dashboard_stats():
+    """Payload of DashboardStatsView built from the counters."""
+    # Filled by migration 0027 and kept up to date since: never rebuilt on a read
+    data = snapshot()
+
+    filieres = dict(Filiere.objects.values_list("id", "nom_filiere_fr"))
+    annees = dict(AnneeUniversitaire.objects.values_list("id", "code_annee"))
+
+    def by_id(name, labels):
+        totals = Counter()
+        for k, v in data[name].items():
+            if int(k) in labels:
+                totals[labels[int(k)]] += v
+        return totals
+
+    # Rolled-up days from the counters + raw rows not rolled up yet
+    per_day = Counter(data[VERIFICATIONS_BY_DAY])
+    per_statut = Counter(data[VERIFICATIONS_BY_STATUT])
+    tail_days, tail_statuts = rollups.raw_tail()
+    for day, n in tail_days.items():
+        per_day[day.isoformat()] += n
+    per_statut.update(tail_statuts)
+
+    by_day = sorted(per_day.items())
+    last_week = date.today().toordinal() - 7
+    age_distribution, avg_age = age_stats()
+
+    students_by_filiere = by_id(STUDENTS_BY_FILIERE, filieres)
+    students_by_annee = by_id(STUDENTS_BY_ANNEE, annees)
+
+    return {
+        "verifications_by_day": [{"day": day, "total": n} for day, n in by_day],
+        "status_counts": [{"statut": s, "count": n} for s, n in per_statut.items()],
+        "diplome_by_filiere": [
+            {"specialite__nom_filiere_fr": label, "count": n}
+            for label, n in by_id(DIPLOMES_BY_FILIERE, filieres).items()
+        ],
+        "diplome_by_year": [
+            {"annee_obtention": int(year), "count": n}
+            for year, n in sorted(data[DIPLOMES_BY_YEAR].items(), key=lambda kv: int(kv[0]))
+        ],
+        "annules": data[DIPLOMES_ANNULES].get("", 0),
+
+        "students_by_filiere": [
+            {"filiere__nom_filiere_fr": label, "count": n}
+            for label, n in sorted(students_by_filiere.items())
+        ],
+        "students_by_annee": [
+            {"annee_universitaire__code_annee": label, "count": n}
+            for label, n in sorted(students_by_annee.items())
+        ],
+        "age_distribution": age_distribution,
+        "avg_age": avg_age,
+
+        "students_total": sum(data[STUDENTS_BY_FILIERE].values()),
+        "diplomes_total": sum(data[DIPLOMES_BY_YEAR].values()),
+        "verifications_total": sum(per_statut.values()),
+        "verifications_last_7_days": sum(
+            n for day, n in by_day if date.fromisoformat(day).toordinal() >= last_week
+        ),
+    }
@@ -0,0 +1,100 @@
+"""
+Filtered dashboard statistics, aggregated in SQL.
+
+DashboardStatsView serves unfiltered requests from the counters
+(core/counters.py). When a date range or a filière / year filter is given,
+the payload is built here instead, with the filters pushed down into the
+GROUP BY queries (indexes from 0016) and into the verification rollups.
+Ages are computed by the database (AGE()), never row by row in Python.
+"""
+from datetime import date, timedelta
+
+from django.db.models import Avg, Count, Func, IntegerField
+
+from .models import Etudiant, Diplome, AnneeUniversitaire
+from . import rollups
+
+
+class Age(Func):
+    """Age in full years at CURRENT_DATE (PostgreSQL)."""
+    template = "CAST(EXTRACT(YEAR FROM AGE(CURRENT_DATE, %(expressions)s)) AS integer)"
+    output_field = IntegerField()
+
+
+def age_distribution(rows):
+    """[{age, count}] (already grouped by SQL), unknown birthdates left out."""
+    return [{"age": r["age"], "count": r["count"]} for r in rows if r["age"] is not None]
+
+
+def annee_obtention(annee_id):
+    """
+    Diploma year matching an AnneeUniversitaire ('2024-2025' -> 2025), -1
+    (matches nothing) for a malformed code. ValueError if the id is unknown.
+    """
+    code = AnneeUniversitaire.objects.filter(id=annee_id).values_list("code_annee", flat=True).first()
+    if code is None:
+        raise ValueError(f"Année universitaire inconnue : {annee_id}")
+    end = code.rpartition("-")[2]
+    return int(end) if end.isdigit() else -1
+
+
+def filtered_stats(date_from=None, date_to=None, filiere=None, annee_universitaire=None):
+    """
+    Same payload as counters.dashboard_stats(), restricted by the filters.
+    ValueError for an unknown annee_universitaire.
+    """
+    students = Etudiant.objects.all()
+    diplomes = Diplome.objects.all()
+    verif_filters = {"date_from": date_from, "date_to": date_to}
+
+    if filiere:
+        students = students.filter(filiere_id=filiere)
+        diplomes = diplomes.filter(specialite_id=filiere)
+        verif_filters["filiere"] = filiere
+
+    if annee_universitaire:
+        year = annee_obtention(annee_universitaire)
+        students = students.filter(annee_universitaire_id=annee_universitaire)
+        diplomes = diplomes.filter(annee_obtention=year)
+        verif_filters["annee_obtention"] = year
+
+    by_day = rollups.verifications_by_day(**verif_filters)
+    statuses = rollups.status_counts(**verif_filters)
+
+    ages = (
+        students
+        .annotate(age=Age("date_naissance"))
+        .values("age")
+        .annotate(count=Count("id"))
+        .order_by("age")
+    )
+    avg_age = students.aggregate(avg=Avg(Age("date_naissance")))["avg"] or 0
+
+    last_week = date.today() - timedelta(days=7)
+
+    return {
+        "verifications_by_day": [{"day": r["day"].isoformat(), "total": r["total"]} for r in by_day],
+        "status_counts": statuses,
+        "diplome_by_filiere": list(
+            diplomes.values("specialite__nom_filiere_fr").annotate(count=Count("id")).order_by()
+        ),
+        "diplome_by_year": list(
+            diplomes.values("annee_obtention").annotate(count=Count("id")).order_by("annee_obtention")
+        ),
+        "annules": diplomes.filter(est_annule=True).count(),
+
+        "students_by_filiere": list(
+            students.values("filiere__nom_filiere_fr").annotate(count=Count("id")).order_by("filiere__nom_filiere_fr")
+        ),
+        "students_by_annee": list(
+            students.values("annee_universitaire__code_annee").annotate(count=Count("id"))
+            .order_by("annee_universitaire__code_annee")
+        ),
+        "age_distribution": age_distribution(ages),
+        "avg_age": avg_age,
+
+        "students_total": students.count(),
+        "diplomes_total": diplomes.count(),
+        "verifications_total": sum(r["count"] for r in statuses),
+        "verifications_last_7_days": sum(r["total"] for r in by_day if r["day"] >= last_week),
+    }
@@ -0,0 +1,63 @@
+# core/db_router.py
+"""
+Primary / read-replica routing.
+
+Everything goes to `default` (the primary) unless the code runs inside
+use_replica(): then reads are spread over the replica aliases declared
+in settings (DATABASE_REPLICAS). Writes always go to the primary, so
+read-your-writes flows (generation, cancellation, imports...) simply do
+not opt in.
+
+    with use_replica():
+        diplome = Diplome.objects.get(verification_uuid=...)
+
+    @use_replica()
+    def get(self, request): ...
+
+Objects loaded from a replica keep loading their relations from it.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def use_replica():
+    token = _replica_reads.set(True)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith("replica")]
+
+
+class PrimaryReplicaRouter:
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if self.replicas and _replica_reads.get():
+            return random.choice(self.replicas)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Same data on every alias
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -0,0 +1,211 @@
+"""
+Streamed exports (CSV / XLSX) of students, diplomas and verification logs.
+
+Rows are read with values_list().iterator(): on PostgreSQL this is a
+server-side cursor fetching CHUNK_SIZE rows at a time.
+
+- CSV is written row by row into a StreamingHttpResponse: memory stays flat
+  whatever the number of rows. Use it for large exports.
+- XLSX uses openpyxl write-only mode: cells go to a temporary sheet file,
+  but the shared strings table (every distinct text value) stays in memory
+  and the whole workbook is written before the first byte is sent. Exports
+  above EXPORT_XLSX_MAX_ROWS rows are refused (xlsx_allowed()).
+
+Reads go to a replica when one is configured (core/db_router.py).
+"""
+import csv
+import tempfile
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.http import StreamingHttpResponse, FileResponse
+from django.utils import timezone
+from openpyxl import Workbook
+
+from .db_router import use_replica
+from .filters import parse_bool, parse_date, day_start
+from .models import Etudiant, Diplome, Verification, AnneeUniversitaire
+
+
+CHUNK_SIZE = 2000
+
+
+def _end_year(code_annee):
+    """2025 for "2024-2025"; None when the code is malformed."""
+    end = (code_annee or "").rpartition("-")[2]
+    return int(end) if end.isdigit() else None
+
+
+def _statut_diplome(est_annule):
+    return "annulé" if est_annule else "valide"
+
+
+# Per export: model, (header, field[, formatter]) columns, query-string filters, date field
+EXPORTS = {
+    "etudiants": {
+        "model": Etudiant,
+        "columns": [
+            ("id", "id"),
+            ("matricule", "matricule"),
+            ("nni", "nni"),
+            ("nom_prenom_fr", "nom_prenom_fr"),
+            ("nom_prenom_ar", "nom_prenom_ar"),
+            ("date_naissance", "date_naissance"),
+            ("lieu_naissance_fr", "lieu_naissance_fr"),
+            ("lieu_naissance_ar", "lieu_naissance_ar"),
+            ("email", "email"),
+            ("filiere", "filiere__code_filiere"),
+            ("annee_universitaire", "annee_universitaire__code_annee"),
+            ("mention_fr", "mention_fr"),
+            ("mention_ar", "mention_ar"),
+        ],
+        "filters": {
+            "filiere": ("filiere_id", int),
+            "annee_universitaire": ("annee_universitaire_id", int),
+        },
+        "date_field": None,
+    },
+    "diplomes": {
+        "model": Diplome,
+        "columns": [
+            ("numero_diplome", "numero_diplome"),
+            ("annee_obtention", "annee_obtention"),
+            ("type_diplome", "type_diplome"),
+            ("matricule", "etudiant__matricule"),
+            ("nom_prenom_fr", "etudiant__nom_prenom_fr"),
+            ("filiere", "specialite__code_filiere"),
+            ("hash_signature", "hash_signature"),
+            ("verification_uuid", "verification_uuid"),
+            ("date_televersement", "date_televersement"),
+            ("statut", "est_annule", _statut_diplome),
+            ("annule_a", "annule_a"),
+            ("raison_annulation", "raison_annulation"),
+        ],
+        "filters": {
+            "filiere": ("specialite_id", int),
+            "annee": ("annee_obtention", int),
+            "est_annule": ("est_annule", None),
+        },
+        "date_field": "date_televersement",
+    },
+    "verifications": {
+        "model": Verification,
+        "columns": [
+            ("id", "id"),
+            ("date_verification", "date_verification"),
+            ("adresse_ip", "adresse_ip"),
+            ("statut", "statut"),
+            ("numero_diplome", "diplome__numero_diplome"),
+            ("annee_obtention", "diplome__annee_obtention"),
+            ("matricule", "diplome__etudiant__matricule"),
+            ("filiere", "diplome__specialite__code_filiere"),
+        ],
+        "filters": {
+            "filiere": ("diplome__specialite_id", int),
+            "annee": ("diplome__annee_obtention", int),
+            "statut": ("statut", str),
+        },
+        "date_field": "date_verification",
+    },
+}
+
+
+def build_queryset(kind, params):
+    """values_list queryset of an export, filtered by the query string (ValueError if invalid)."""
+    spec = EXPORTS[kind]
+    filters = {}
+
+    for param, (lookup, cast) in spec["filters"].items():
+        value = params.get(param)
+        if value in (None, ""):
+            continue
+        filters[lookup] = (cast or parse_bool)(value)
+
+    # Diplomas and verifications can also be filtered by academic year id
+    if kind != "etudiants" and params.get("annee_universitaire"):
+        code = (
+            AnneeUniversitaire.objects
+            .filter(id=int(params["annee_universitaire"]))
+            .values_list("code_annee", flat=True).first()
+        )
+        year_lookup = spec["filters"]["annee"][0]
+        year = _end_year(code)
+        filters[year_lookup] = -1 if year is None else year  # unknown year: no rows
+
+    field = spec["date_field"]
+    if field:
+        if params.get("date_from"):
+            filters[f"{field}__gte"] = day_start(parse_date(params["date_from"]))
+        if params.get("date_to"):
+            filters[f"{field}__lt"] = day_start(parse_date(params["date_to"]) + timedelta(days=1))
+
+    fields = [c[1] for c in spec["columns"]]
+    queryset = spec["model"].objects.filter(**filters).order_by("id").values_list(*fields)
+
+    # Pin the alias now: the response is consumed after the view returned
+    with use_replica():
+        return queryset.using(queryset.db)
+
+
+def _cell(value):
+    if isinstance(value, datetime):
+        return timezone.localtime(value).replace(tzinfo=None) if timezone.is_aware(value) else value
+    return value
+
+
+def iter_rows(kind, queryset):
+    """Header, then one list of cell values per row."""
+    columns = EXPORTS[kind]["columns"]
+    yield [c[0] for c in columns]
+
+    formatters = [c[2] if len(c) > 2 else None for c in columns]
+    for row in queryset.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            _cell(fmt(value) if fmt else value)
+            for value, fmt in zip(row, formatters)
+        ]
+
+
+class _Echo:
+    """File-like object whose write() just returns the line (for csv.writer)."""
+
+    def write(self, value):
+        return value
+
+
+def csv_response(kind, queryset, filename):
+    writer = csv.writer(_Echo())
+
+    def lines():
+        yield "\ufeff"  # BOM: Excel opens the file as UTF-8 (Arabic names)
+        for row in iter_rows(kind, queryset):
+            yield writer.writerow(["" if v is None else v for v in row])
+
+    response = StreamingHttpResponse(lines(), content_type="text/csv; charset=utf-8")
+    response["Content-Disposition"] = f'attachment; filename="{filename}.csv"'
+    return response
+
+
+def xlsx_allowed(queryset):
+    """At most EXPORT_XLSX_MAX_ROWS rows (counted without reading past the limit)."""
+    limit = getattr(settings, "EXPORT_XLSX_MAX_ROWS", 100000)
+    return queryset[:limit + 1].count() <= limit
+
+
+def xlsx_response(kind, queryset, filename):
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet(kind)
+    for row in iter_rows(kind, queryset):
+        ws.append(row)
+
+    # Deleted when the response closes it
+    tmp = tempfile.TemporaryFile(suffix=".xlsx")
+    wb.save(tmp)
+    tmp.seek(0)
+
+    return FileResponse(
+        tmp,
+        as_attachment=True,
+        filename=f"{filename}.xlsx",
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
@@ -0,0 +1,97 @@
+# core/filters.py
+"""
+Query-string filtering and ordering for the ModelViewSets.
+
+A view declares what can be filtered, mapped onto indexed columns:
+
+    filter_params = {"filiere": ("filiere_id", int)}
+    date_range_field = "date_verification"   # ?date_from=&date_to= (YYYY-MM-DD)
+    ordering_fields = ["id", "date_verification"]
+    ordering = ["id"]
+
+Anything else in the query string is ignored. Invalid values give a 400.
+
+EagerLoadingFilter applies the `select_related` / `prefetch_related`
+tuples declared on the serializer, so list and detail endpoints fetch the
+relations the serializer reads in the same query instead of one per row.
+"""
+import ipaddress
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend, OrderingFilter
+
+
+def parse_bool(value):
+    value = value.lower()
+    if value in ("1", "true", "oui"):
+        return True
+    if value in ("0", "false", "non"):
+        return False
+    raise ValueError(value)
+
+
+def parse_ip(value):
+    # ValueError on a malformed address instead of a DataError from the inet column
+    return str(ipaddress.ip_address(value.strip()))
+
+
+def parse_date(value):
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class EagerLoadingFilter(BaseFilterBackend):
+
+    def filter_queryset(self, request, queryset, view):
+        serializer_class = view.get_serializer_class()
+        select = getattr(serializer_class, "select_related", ())
+        prefetch = getattr(serializer_class, "prefetch_related", ())
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+class QueryParamFilter(BaseFilterBackend):
+
+    def filter_queryset(self, request, queryset, view):
+        params = request.query_params
+        filters = {}
+
+        try:
+            for param, (lookup, cast) in getattr(view, "filter_params", {}).items():
+                value = params.get(param)
+                if value not in (None, ""):
+                    filters[lookup] = cast(value)
+
+            field = getattr(view, "date_range_field", None)
+            if field:
+                # Half-open range on the raw column: stays index friendly
+                if params.get("date_from"):
+                    filters[f"{field}__gte"] = day_start(parse_date(params["date_from"]))
+                if params.get("date_to"):
+                    filters[f"{field}__lt"] = day_start(parse_date(params["date_to"]) + timedelta(days=1))
+        except ValueError:
+            raise ValidationError({"error": "Filtres invalides"})
+
+        return queryset.filter(**filters) if filters else queryset
+
+
+class StableOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter restricted to `ordering_fields`, with `id` appended as a
+    tie-breaker so equal values (same date, same year...) keep a stable
+    order between requests and between cursor pages.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view) or ["id"])
+        if not any(f.lstrip("-") in ("id", "pk") for f in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
@@ -0,0 +1,140 @@
+"""
+Outbound email queue.
+
+The API never talks to SMTP: queue_mail() stores an OutboundEmail and, once
+the transaction commits, a background thread (core/background.py) sends the
+due messages. `manage.py send_emails --loop` is the long-running worker that
+also retries failures and picks up whatever a restarted process left behind.
+
+Messages are sent over one SMTP connection per run (one TLS handshake for
+the whole batch). A failed message is retried after OUTBOX_RETRY_DELAY *
+2**(attempts - 1) seconds, and marked failed after OUTBOX_MAX_ATTEMPTS.
+
+Workers claim rows with SELECT ... FOR UPDATE SKIP LOCKED, so several of
+them (threads or processes) never send the same message twice.
+"""
+import logging
+import smtplib
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.utils import timezone
+
+from . import background
+from .models import OutboundEmail
+
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 50
+
+
+def _max_attempts():
+    return getattr(settings, "OUTBOX_MAX_ATTEMPTS", 5)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, "OUTBOX_RETRY_DELAY", 30) * 2 ** (attempts - 1))
+
+
+def queue_mail(subject, message, from_email, recipient_list):
+    """Queue an email (same arguments as send_mail); it is sent after commit."""
+    email = OutboundEmail.objects.create(
+        sujet=subject,
+        corps=message,
+        expediteur=from_email or "",
+        destinataires=list(recipient_list),
+    )
+    background.submit(send_pending)
+    return email
+
+
+# ===================== WORKER =====================
+
+def _claim(limit):
+    """Mark up to `limit` due messages as being sent; returns them."""
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status="pending", next_attempt_at__lte=timezone.now())
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[:limit]
+        )
+        OutboundEmail.objects.filter(id__in=ids).update(status="sending", claimed_at=timezone.now())
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by("id"))
+
+
+def _failed(email, error):
+    email.attempts += 1
+    email.last_error = str(error)[:1000]
+    if email.attempts >= _max_attempts():
+        email.status = "failed"
+        logger.error("Email #%s abandoned after %s attempts: %s", email.id, email.attempts, error)
+    else:
+        email.status = "pending"
+        email.next_attempt_at = timezone.now() + _retry_delay(email.attempts)
+    email.save(update_fields=["attempts", "last_error", "status", "next_attempt_at"])
+
+
+def send_pending(connection=None, limit=BATCH_SIZE):
+    """
+    Send the due messages over one SMTP connection (opened here unless
+    given). Returns (sent, failed).
+    """
+    own_connection = connection is None
+    connection = connection or get_connection(fail_silently=False)
+    sent = failed = 0
+
+    try:
+        while True:
+            batch = _claim(limit)
+            if not batch:
+                break
+
+            for i, email in enumerate(batch):
+                try:
+                    connection.open()  # no-op while the connection is alive
+                except (smtplib.SMTPException, OSError) as e:
+                    # Server unreachable: retry the whole batch later
+                    for email in batch[i:]:
+                        _failed(email, e)
+                    return sent, failed + len(batch) - i
+
+                message = EmailMessage(
+                    email.sujet,
+                    email.corps,
+                    email.expediteur or settings.DEFAULT_FROM_EMAIL,
+                    email.destinataires,
+                    connection=connection,
+                )
+                try:
+                    message.send()
+                except (smtplib.SMTPException, OSError) as e:
+                    failed += 1
+                    _failed(email, e)
+                    # The session may be broken: reconnect for the next message
+                    connection.close()
+                    continue
+
+                email.status = "sent"
+                email.attempts += 1
+                email.sent_at = timezone.now()
+                email.save(update_fields=["status", "attempts", "sent_at"])
+                sent += 1
+    finally:
+        if own_connection:
+            connection.close()
+
+    return sent, failed
+
+
+def requeue_stale(minutes=15):
+    """Put back messages left "sending" by a worker that died mid-batch."""
+    return (
+        OutboundEmail.objects
+        .filter(status="sending", claimed_at__lt=timezone.now() - timedelta(minutes=minutes))
+        .update(status="pending")
+    )
@@ -0,0 +1,157 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils.timezone import now
+
+from core.models import Verification, Etudiant, Diplome, Filiere, AnneeUniversitaire
+
+
+# --seed only runs on a database whose name contains one of these (or with --i-know)
+SCRATCH_NAMES = ("test", "scratch", "bench")
+
+SEED_SQL = {
+    # Students spread over the existing filières / years.
+    # nom_recherche = core.text.search_value() of the two names (already normalized here).
+    # empreinte is left blank (PostgreSQL has no built-in sha1()): an upsert
+    # import would simply rewrite these rows.
+    "students": """
+        INSERT INTO core_etudiant (
+            nom_prenom_fr, nom_prenom_ar, matricule, email, nni, date_naissance,
+            lieu_naissance_fr, lieu_naissance_ar, filiere_id, mention_fr, mention_ar,
+            annee_universitaire_id, nom_recherche, empreinte
+        )
+        SELECT
+            s.nom_fr, s.nom_ar, s.matricule, NULL, s.nni, s.date_naissance,
+            'Nouakchott', 'نواكشوط', s.filiere_id, 'Bien', 'حسن', s.annee_id,
+            lower(s.nom_fr) || ' ' || s.nom_ar, ''
+        FROM (
+            SELECT
+                'Bench ' || g AS nom_fr, 'بنش ' || g AS nom_ar,
+                %(base)s + g AS matricule, 'B' || (%(base)s + g) AS nni,
+                DATE '1995-01-01' + (g %% 3650) AS date_naissance,
+                (%(filieres)s::int[])[1 + g %% %(nf)s] AS filiere_id,
+                (%(annees)s::int[])[1 + g %% %(na)s] AS annee_id
+            FROM generate_series(1, %(n)s) AS g
+        ) s
+    """,
+    # One Licence per seeded student
+    "diplomas": """
+        INSERT INTO core_diplome (
+            etudiant_id, numero_diplome, specialite_id, type_diplome, annee_obtention,
+            fichier_pdf, hash_signature, verification_uuid, date_televersement,
+            est_annule, raison_annulation
+        )
+        SELECT
+            e.id, 1000000 + e.id, e.filiere_id, 'Licence', 3000,
+            '', md5('h' || e.id) || md5('s' || e.id), md5('u' || e.id), now(),
+            (e.id %% 50 = 0), ''
+        FROM core_etudiant e
+        WHERE e.matricule > %(base)s
+    """,
+    # Verifications over the last year, in insertion (time) order
+    "verifications": """
+        INSERT INTO core_verification (diplome_id, date_verification, adresse_ip, statut)
+        SELECT
+            NULL,
+            now() - interval '365 days' + (g * (interval '365 days' / %(n)s)),
+            ('10.' || (g %% 250) || '.' || (g %% 200) || '.1')::inet,
+            CASE WHEN g %% 7 = 0 THEN 'failed' ELSE 'succes' END
+        FROM generate_series(1, %(n)s) AS g
+    """,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN ANALYZE the hot query paths (dashboard, batch generation, "
+        "duplicate check, list filters). Run before and after migrating to compare plans. "
+        "--seed fills a scratch database with synthetic rows first (refused "
+        "unless the database name contains test/scratch/bench, or --i-know)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Synthetic students/diplomas to insert")
+        parser.add_argument("--seed-verifications", type=int, default=0, help="Synthetic verification rows to insert")
+        parser.add_argument(
+            "--i-know", action="store_true",
+            help="Seed even though the database name does not look like a scratch database",
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("PostgreSQL uniquement")
+
+        if options["seed"] or options["seed_verifications"]:
+            name = connection.settings_dict["NAME"]
+            if not options["i_know"] and not any(w in name.lower() for w in SCRATCH_NAMES):
+                raise CommandError(
+                    f"La base « {name} » ne ressemble pas à une base de test : "
+                    "les lignes synthétiques y resteraient. Relancez avec --i-know pour confirmer."
+                )
+            self.seed(options["seed"], options["seed_verifications"])
+
+        for title, queryset in self.queries():
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n== {title}"))
+            self.stdout.write(queryset.explain(analyze=True, buffers=True))
+
+    def seed(self, n_students, n_verifications):
+        filieres = list(Filiere.objects.values_list("id", flat=True))
+        annees = list(AnneeUniversitaire.objects.values_list("id", flat=True))
+
+        with connection.cursor() as cursor:
+            if n_students:
+                if not filieres or not annees:
+                    raise CommandError("Créez au moins une filière et une année universitaire")
+                base = 900000000 + Etudiant.objects.count()
+                params = {
+                    "base": base, "n": n_students,
+                    "filieres": filieres, "nf": len(filieres),
+                    "annees": annees, "na": len(annees),
+                }
+                cursor.execute(SEED_SQL["students"], params)
+                cursor.execute(SEED_SQL["diplomas"], {"base": base})
+                self.stdout.write(f"{n_students} étudiants / diplômes insérés")
+
+            if n_verifications:
+                cursor.execute(SEED_SQL["verifications"], {"n": n_verifications})
+                self.stdout.write(f"{n_verifications} vérifications insérées")
+
+            cursor.execute("ANALYZE core_etudiant, core_diplome, core_verification")
+
+    def queries(self):
+        week_ago = now() - timedelta(days=7)
+        # Latest student: its rows sit at the end of the tables (worst case for a scan)
+        etudiant = Etudiant.objects.order_by("-id").first()
+        filiere_id = etudiant.filiere_id if etudiant else 0
+        annee_id = etudiant.annee_universitaire_id if etudiant else 0
+
+        return [
+            ("verifications by day (dashboard)",
+             Verification.objects
+             .annotate(day=TruncDate("date_verification"))
+             .values("day").annotate(total=Count("id")).order_by("day")),
+            ("verifications, last 7 days",
+             Verification.objects.filter(date_verification__gte=week_ago)
+             .values("statut").annotate(total=Count("id"))),
+            ("status counts",
+             Verification.objects.values("statut").annotate(count=Count("id"))),
+            ("failed verifications, last 7 days",
+             Verification.objects.filter(statut="failed", date_verification__gte=week_ago)),
+            ("students of a filière / year (batch generation)",
+             Etudiant.objects.filter(filiere_id=filiere_id, annee_universitaire_id=annee_id)),
+            ("duplicate diploma check",
+             Diplome.objects.filter(
+                 etudiant_id=etudiant.id if etudiant else 0,
+                 annee_obtention=3000,
+                 type_diplome="Licence",
+             )[:1]),
+            ("diplomas of a filière / year (list filter)",
+             Diplome.objects.filter(specialite_id=filiere_id, annee_obtention=3000).order_by("-id")[:100]),
+            ("cancelled diplomas (list filter)",
+             Diplome.objects.filter(est_annule=True).order_by("-id")[:100]),
+            ("verifications from one IP, last 7 days",
+             Verification.objects.filter(adresse_ip="10.1.1.1", date_verification__gte=week_ago)),
+        ]
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import analytics_export
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the verification history (with diploma / filière columns) to "
+        "zstd Parquet files partitioned by month. Incremental: only rows after "
+        "the last exported id are read. Meant to run daily (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=getattr(settings, "ANALYTICS_EXPORT_DIR", None),
+            help="Dataset directory (default: ANALYTICS_EXPORT_DIR)",
+        )
+        parser.add_argument("--since-id", type=int, help="Start after this id instead of the saved state")
+        parser.add_argument("--full", action="store_true", help="Re-export everything (same as --since-id 0)")
+        parser.add_argument("--batch-size", type=int, default=analytics_export.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        if not analytics_export.HAS_PYARROW:
+            raise CommandError("pyarrow n'est pas installé (pip install pyarrow)")
+        if not options["output_dir"]:
+            raise CommandError("--output-dir requis")
+
+        since_id = 0 if options["full"] else options["since_id"]
+        total, files, last_id, archived = analytics_export.export_verifications(
+            options["output_dir"], since_id=since_id, batch_size=options["batch_size"],
+        )
+
+        if archived:
+            self.stdout.write(f"Export précédent déplacé dans {archived}")
+
+        for path in files:
+            self.stdout.write(path)
+        self.stdout.write(self.style.SUCCESS(f"{total} vérifications exportées (dernier id : {last_id})"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from core.models import PVJury
+from core.pv_images import process_pv
+
+
+class Command(BaseCommand):
+    help = (
+        "Optimise the PV jury images not processed yet (downscale, WebP, "
+        "thumbnails): PVs uploaded before the feature, or left by a restart."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--retry-failed", action="store_true", help="Also retry PVs whose processing failed")
+
+    def handle(self, *args, **options):
+        statuses = ["pending"]
+        if options["retry_failed"]:
+            statuses.append("failed")
+
+        ids = list(PVJury.objects.filter(traitement__in=statuses).order_by("id").values_list("id", flat=True))
+        for pv_id in ids:
+            process_pv(pv_id)
+            pv = PVJury.objects.filter(pk=pv_id).first()
+            if pv is not None:
+                self.stdout.write(f"PV #{pv_id} : {pv.get_traitement_display()}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} PV traité(s)"))
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from core.chunked_upload import purge
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the chunked uploads (and their partial files) untouched for "
+        "CHUNKED_UPLOAD_EXPIRY_HOURS: abandoned or never consumed. Run it from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, help="Override CHUNKED_UPLOAD_EXPIRY_HOURS")
+
+    def handle(self, *args, **options):
+        count = purge(options["hours"])
+        self.stdout.write(self.style.SUCCESS(f"{count} upload(s) supprimé(s)"))
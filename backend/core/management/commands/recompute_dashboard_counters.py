@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from core.counters import recompute_all
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the dashboard counters from scratch (repair after bulk "
+        "changes made outside the app, or as a periodic refresher)."
+    )
+
+    def handle(self, *args, **options):
+        n = recompute_all()
+        self.stdout.write(self.style.SUCCESS(f"{n} compteurs recalculés"))
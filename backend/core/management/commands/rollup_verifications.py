@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import counters, rollups
+from core.throttling import purge_stale_buckets
+
+
+class Command(BaseCommand):
+    help = (
+        "Roll up complete days of verifications into VerificationDaily, then "
+        "delete (or archive then delete) raw rows older than the retention window. "
+        "Meant to run daily (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention-days", type=int,
+            default=getattr(settings, "VERIFICATION_RETENTION_DAYS", 180),
+            help="Keep raw rows this many days (0 disables the purge)",
+        )
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--archive-dir", help="Write purged rows to gzipped CSV files here first")
+
+    def handle(self, *args, **options):
+        for day, total in rollups.rollup_pending_days():
+            self.stdout.write(f"{day}: {total} vérifications agrégées")
+        # Dashboard: rolled days now come from the counters, not the raw tail
+        counters.refresh_verification_counters()
+
+        if options["retention_days"] > 0:
+            deleted = rollups.purge_raw_verifications(
+                options["retention_days"],
+                batch_size=options["batch_size"],
+                archive_dir=options["archive_dir"],
+            )
+            self.stdout.write(f"{deleted} vérifications brutes supprimées")
+
+        buckets = purge_stale_buckets()
+        self.stdout.write(self.style.SUCCESS(f"Terminé ({buckets} compteurs de limitation expirés supprimés)"))
@@ -0,0 +1,36 @@
+import os
+
+from django.core.management.base import BaseCommand
+
+from core.models import ImportJob
+from core.student_import import run_import_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Run the student imports still waiting in ImportJob (e.g. left behind by "
+        "a restarted process). --requeue also restarts interrupted imports."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requeue", action="store_true", help="Also rerun jobs stuck in validation / import")
+
+    def handle(self, *args, **options):
+        statuses = ["pending"]
+        if options["requeue"]:
+            statuses += ["validating", "running"]
+
+        for job in ImportJob.objects.filter(status__in=statuses).order_by("id"):
+            if not os.path.exists(job.fichier):
+                ImportJob.objects.filter(pk=job.pk).update(status="failed", error="Fichier introuvable")
+                self.stdout.write(self.style.WARNING(f"#{job.id} {job.nom_fichier} : fichier introuvable"))
+                continue
+
+            try:
+                run_import_job(job.id)
+            except Exception as e:
+                self.stdout.write(self.style.ERROR(f"#{job.id} {job.nom_fichier} : {e}"))
+                continue
+
+            job.refresh_from_db()
+            self.stdout.write(f"#{job.id} {job.nom_fichier} : {job.get_status_display()}")
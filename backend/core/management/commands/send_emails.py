@@ -0,0 +1,53 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand
+
+from core import mailer
+
+
+REQUEUE_INTERVAL = 60  # seconds
+
+
+class Command(BaseCommand):
+    help = (
+        "Send the queued emails (OutboundEmail). With --loop, keeps running and "
+        "polls the outbox, reusing the SMTP connection between polls."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Run as a worker instead of a single pass")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between polls (--loop)")
+        parser.add_argument(
+            "--stale-minutes", type=int, default=15,
+            help='Requeue messages left "sending" for longer than this (checked every minute with --loop)',
+        )
+
+    def requeue(self, minutes):
+        requeued = mailer.requeue_stale(minutes)
+        if requeued:
+            self.stdout.write(self.style.WARNING(f"{requeued} email(s) remis en file"))
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        last_requeue = None
+        try:
+            while True:
+                # Also while looping: a worker that crashed or timed out mid-batch
+                if last_requeue is None or time.monotonic() - last_requeue >= REQUEUE_INTERVAL:
+                    self.requeue(options["stale_minutes"])
+                    last_requeue = time.monotonic()
+
+                sent, failed = mailer.send_pending(connection)
+                if sent or failed:
+                    self.stdout.write(f"{sent} envoyé(s), {failed} échec(s)")
+                else:
+                    # Idle: don't keep a connection the server will drop anyway
+                    connection.close()
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
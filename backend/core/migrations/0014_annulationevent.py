@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def seed_current_annulations(apps, schema_editor):
+    # Diplomas already cancelled get an initial event so the feed is complete
+    Diplome = apps.get_model("core", "Diplome")
+    AnnulationEvent = apps.get_model("core", "AnnulationEvent")
+
+    events = [
+        AnnulationEvent(
+            diplome_id=d.id,
+            verification_uuid=d.verification_uuid,
+            hash_signature=d.hash_signature,
+            action="annule",
+            raison=d.raison_annulation,
+        )
+        for d in Diplome.objects.filter(est_annule=True).order_by("annule_a", "id")
+    ]
+    AnnulationEvent.objects.bulk_create(events, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_pvjury'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AnnulationEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('verification_uuid', models.CharField(max_length=32)),
+                ('hash_signature', models.CharField(max_length=64)),
+                ('action', models.CharField(choices=[('annule', 'Annulé'), ('reactive', 'Réactivé')], max_length=10)),
+                ('raison', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('diplome', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='annulation_events', to='core.diplome')),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.RunPython(seed_current_annulations, migrations.RunPython.noop),
+    ]
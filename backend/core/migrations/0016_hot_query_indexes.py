@@ -0,0 +1,33 @@
+# Generated by Django 6.0 on 2026-10-19 11:20
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0015_ratelimitbucket'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='etudiant',
+            index=models.Index(fields=['filiere', 'annee_universitaire'], name='etudiant_filiere_annee_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='diplome',
+            index=models.Index(fields=['etudiant', 'annee_obtention', 'type_diplome'], name='diplome_etu_annee_type_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='verification',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['date_verification'], name='verif_date_brin'),
+        ),
+        AddIndexConcurrently(
+            model_name='verification',
+            index=models.Index(fields=['statut', 'date_verification'], name='verif_statut_date_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_hot_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VerificationDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('statut', models.CharField(max_length=20)),
+                ('ip_prefix', models.CharField(blank=True, max_length=50)),
+                ('total', models.PositiveIntegerField(default=0)),
+                ('diplome', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='verifications_daily', to='core.diplome')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'statut'], name='verif_daily_day_statut_idx')],
+            },
+        ),
+    ]
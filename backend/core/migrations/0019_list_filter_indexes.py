@@ -0,0 +1,28 @@
+# Generated by Django 6.0 on 2026-10-19 15:05
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0018_dashboardcounter'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='diplome',
+            index=models.Index(fields=['specialite', 'annee_obtention'], name='diplome_spec_annee_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='diplome',
+            index=models.Index(condition=models.Q(('est_annule', True)), fields=['id'], name='diplome_annule_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='diplome',
+            index=models.Index(fields=['date_televersement'], name='diplome_date_idx'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 6.0 on 2026-10-19 15:40
+
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+from core.text import search_value
+
+
+def fill_nom_recherche(apps, schema_editor):
+    Etudiant = apps.get_model('core', 'Etudiant')
+    last_id = 0
+    while True:
+        batch = list(
+            Etudiant.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'nom_prenom_fr', 'nom_prenom_ar')[:2000]
+        )
+        if not batch:
+            break
+        for e in batch:
+            e.nom_recherche = search_value(e.nom_prenom_fr, e.nom_prenom_ar)
+        Etudiant.objects.bulk_update(batch, ['nom_recherche'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0019_list_filter_indexes'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='etudiant',
+            name='nom_recherche',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_nom_recherche, migrations.RunPython.noop),
+        AddIndexConcurrently(
+            model_name='etudiant',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['nom_recherche'], name='etudiant_recherche_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
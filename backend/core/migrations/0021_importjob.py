@@ -0,0 +1,36 @@
+# Generated by Django 6.0 on 2026-10-19 16:30
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_etudiant_nom_recherche'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fichier', models.CharField(max_length=400)),
+                ('nom_fichier', models.CharField(max_length=255)),
+                ('email_domain', models.CharField(max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('validating', 'Validation'), ('running', 'Import en cours'), ('done', 'Terminé'), ('invalid', 'Fichier invalide'), ('failed', 'Échec')], default='pending', max_length=20)),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True)),
+                ('processed_rows', models.PositiveIntegerField(default=0)),
+                ('report', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('annee_universitaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.anneeuniversitaire')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('filiere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='core.filiere')),
+            ],
+        ),
+    ]
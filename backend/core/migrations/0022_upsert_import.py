@@ -0,0 +1,60 @@
+# Generated by Django 6.0 on 2026-10-19 17:10
+
+import hashlib
+
+from django.db import migrations, models
+
+
+# Frozen copy of core.models.student_fingerprint() as of this migration
+FINGERPRINT_FIELDS = [
+    "nom_prenom_fr", "nom_prenom_ar", "matricule", "nni", "email", "date_naissance",
+    "lieu_naissance_fr", "lieu_naissance_ar", "mention_fr", "mention_ar",
+    "filiere_id", "annee_universitaire_id",
+]
+
+
+def student_fingerprint(etudiant):
+    values = "\x1f".join(
+        "" if getattr(etudiant, f) is None else str(getattr(etudiant, f))
+        for f in FINGERPRINT_FIELDS
+    )
+    return hashlib.sha1(values.encode("utf-8")).hexdigest()
+
+
+def fill_empreinte(apps, schema_editor):
+    Etudiant = apps.get_model('core', 'Etudiant')
+    last_id = 0
+    while True:
+        batch = list(Etudiant.objects.filter(id__gt=last_id).order_by('id')[:2000])
+        if not batch:
+            break
+        for e in batch:
+            e.empreinte = student_fingerprint(e)
+        Etudiant.objects.bulk_update(batch, ['empreinte'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_importjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='etudiant',
+            name='empreinte',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+        migrations.RunPython(fill_empreinte, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name='importjob',
+            name='mode',
+            field=models.CharField(choices=[('insert', 'Ajout'), ('upsert', 'Mise à jour')], default='insert', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='importjob',
+            name='cle',
+            field=models.CharField(choices=[('matricule', 'Matricule'), ('nni', 'NNI')], default='matricule', max_length=10),
+        ),
+    ]
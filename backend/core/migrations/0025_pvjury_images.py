@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0024_tokenversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pvjury',
+            name='traitement',
+            field=models.CharField(choices=[('pending', 'En attente'), ('done', 'Optimisée'), ('failed', 'Échec')], default='pending', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='pvjury',
+            name='miniatures',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
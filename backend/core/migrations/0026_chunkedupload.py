@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-19 19:40
+
+import django.db.models.deletion
+import uuid
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0025_pvjury_images'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChunkedUpload',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('nom_fichier', models.CharField(max_length=255)),
+                ('taille', models.BigIntegerField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('recu', models.BigIntegerField(default=0)),
+                ('fichier', models.CharField(max_length=400)),
+                ('status', models.CharField(choices=[('uploading', 'En cours'), ('complete', 'Terminé')], default='uploading', max_length=10)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-19 20:30
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+
+def backfill(apps, schema_editor):
+    """
+    Fill DashboardCounter once, on the primary, instead of on the first
+    dashboard load. Same figures as core.counters.recompute_all(); existing
+    rows are replaced (verification counters now cover rolled-up days only).
+    """
+    Etudiant = apps.get_model("core", "Etudiant")
+    Diplome = apps.get_model("core", "Diplome")
+    VerificationDaily = apps.get_model("core", "VerificationDaily")
+    DashboardCounter = apps.get_model("core", "DashboardCounter")
+
+    rows = []
+
+    def add(name, queryset, field, value="n"):
+        for r in queryset.order_by():
+            key = r[field]
+            if key is None:
+                continue
+            rows.append(DashboardCounter(
+                name=name,
+                key=key.isoformat() if hasattr(key, "isoformat") else str(key),
+                value=r[value],
+            ))
+
+    add("students_by_filiere", Etudiant.objects.values("filiere_id").annotate(n=Count("id")), "filiere_id")
+    add("students_by_annee", Etudiant.objects.values("annee_universitaire_id").annotate(n=Count("id")), "annee_universitaire_id")
+    add("students_by_birthdate", Etudiant.objects.values("date_naissance").annotate(n=Count("id")), "date_naissance")
+    add("diplomes_by_filiere", Diplome.objects.values("specialite_id").annotate(n=Count("id")), "specialite_id")
+    add("diplomes_by_year", Diplome.objects.values("annee_obtention").annotate(n=Count("id")), "annee_obtention")
+    add("verifications_by_day", VerificationDaily.objects.values("day").annotate(n=Sum("total")), "day")
+    add("verifications_by_statut", VerificationDaily.objects.values("statut").annotate(n=Sum("total")), "statut")
+
+    annules = Diplome.objects.filter(est_annule=True).count()
+    if annules:
+        rows.append(DashboardCounter(name="diplomes_annules", key="", value=annules))
+
+    DashboardCounter.objects.all().delete()
+    DashboardCounter.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0026_chunkedupload'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
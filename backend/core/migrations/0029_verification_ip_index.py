@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-19 21:25
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('core', '0028_chunkedupload_claim'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='verification',
+            index=models.Index(fields=['adresse_ip', 'date_verification'], name='verif_ip_date_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-19 21:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0029_verification_ip_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='annulationevent',
+            name='diplome',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='annulation_events', to='core.diplome'),
+        ),
+    ]
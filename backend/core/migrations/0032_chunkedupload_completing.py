@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 23:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0031_shared_cache_table'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='chunkedupload',
+            name='status',
+            field=models.CharField(choices=[('uploading', 'En cours'), ('completing', 'Vérification'), ('complete', 'Terminé')], default='uploading', max_length=10),
+        ),
+    ]
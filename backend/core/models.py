@@ -1,20 +1,41 @@
-from django.db import models
+from django.db import models, connection, transaction
+from django.contrib.postgres.indexes import BrinIndex, GinIndex
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
 from django.contrib.auth.models import User
 from django.conf import settings
 from django.contrib.auth import get_user_model
 import uuid
+import hashlib
 import random
 import string
 from django.utils import timezone
 from datetime import timedelta
 
+from .text import search_value
+
 
 def generate_hex_uuid():
     return uuid.uuid4().hex
 
 
+# Columns covered by Etudiant.empreinte (compared by the upsert import)
+FINGERPRINT_FIELDS = [
+    "nom_prenom_fr", "nom_prenom_ar", "matricule", "nni", "email", "date_naissance",
+    "lieu_naissance_fr", "lieu_naissance_ar", "mention_fr", "mention_ar",
+    "filiere_id", "annee_universitaire_id",
+]
+
+
+def student_fingerprint(etudiant):
+    """SHA-1 of the imported columns: equal fingerprints = nothing to update."""
+    values = "\x1f".join(
+        "" if getattr(etudiant, f) is None else str(getattr(etudiant, f))
+        for f in FINGERPRINT_FIELDS
+    )
+    return hashlib.sha1(values.encode("utf-8")).hexdigest()
+
+
 annee_validator = RegexValidator(
     regex=r"^\d{4}-\d{4}$",
     message="Le format doit être YYYY-YYYY (ex: 2024-2025)"
@@ -70,12 +91,36 @@ class Etudiant(models.Model):
         related_name="diplomes"
     )
 
+    # Normalised French + Arabic names (core/text.py), for the search endpoint
+    nom_recherche = models.TextField(blank=True, default="", editable=False)
+    # student_fingerprint() of the row, kept up to date by save()
+    empreinte = models.CharField(max_length=40, blank=True, default="", editable=False)
+
+    class Meta:
+        indexes = [
+            # batch generation / filters by filière + year
+            models.Index(fields=["filiere", "annee_universitaire"], name="etudiant_filiere_annee_idx"),
+            GinIndex(fields=["nom_recherche"], name="etudiant_recherche_trgm", opclasses=["gin_trgm_ops"]),
+        ]
+
+    def save(self, *args, **kwargs):
+        self.nom_recherche = search_value(self.nom_prenom_fr, self.nom_prenom_ar)
+        self.empreinte = student_fingerprint(self)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, "nom_recherche", "empreinte"}
+        super().save(*args, **kwargs)
+
 
     def __str__(self):
         return f"{self.nom_prenom_fr}"
 
 
 
+# pg_advisory_xact_lock key serializing Diplome inserts (see Diplome.save)
+DIPLOME_INSERT_LOCK = 4242029
+
+
 class Diplome(models.Model):
     etudiant = models.ForeignKey(Etudiant, on_delete=models.CASCADE, related_name="Diplomes")
     numero_diplome = models.IntegerField(null=False, blank=False)
@@ -97,7 +142,26 @@ class Diplome(models.Model):
                 name="unique_diplome_per_year"
             )
         ]
+        indexes = [
+            # duplicate check before generation
+            models.Index(fields=["etudiant", "annee_obtention", "type_diplome"], name="diplome_etu_annee_type_idx"),
+            # list filters (filière + year, cancelled only, upload date range)
+            models.Index(fields=["specialite", "annee_obtention"], name="diplome_spec_annee_idx"),
+            models.Index(fields=["id"], condition=models.Q(est_annule=True), name="diplome_annule_idx"),
+            models.Index(fields=["date_televersement"], name="diplome_date_idx"),
+        ]
+
 
+    def save(self, *args, **kwargs):
+        if not self._state.adding or connection.vendor != "postgresql":
+            return super().save(*args, **kwargs)
+        # Inserts are serialized until commit, so ids become visible in id
+        # order: the offline bundle deltas (id > version) never skip a diploma
+        # whose transaction committed after a higher id was published.
+        with transaction.atomic(using=kwargs.get("using")):
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT pg_advisory_xact_lock(%s)", [DIPLOME_INSERT_LOCK])
+            super().save(*args, **kwargs)
 
     def get_verification_url(self):
         return f"http://localhost:3000/verify/{self.verification_uuid}/"
@@ -166,6 +230,15 @@ class Verification(models.Model):
     adresse_ip = models.GenericIPAddressField(null=True, blank=True)
     statut = models.CharField(max_length=20, choices=[("succes", "Succès"), ("echec", "Échec")])
 
+    class Meta:
+        indexes = [
+            # append-only timestamp: BRIN stays tiny and serves date ranges
+            BrinIndex(fields=["date_verification"], name="verif_date_brin"),
+            models.Index(fields=["statut", "date_verification"], name="verif_statut_date_idx"),
+            # ?adresse_ip= filter of the verifications list
+            models.Index(fields=["adresse_ip", "date_verification"], name="verif_ip_date_idx"),
+        ]
+
 
 
 User = get_user_model()
@@ -217,10 +290,199 @@ class PVJury(models.Model):
     image_pv = models.ImageField(upload_to='pvs_jury/')
     date_upload = models.DateTimeField(auto_now_add=True)
     uploaded_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True)
+    # Background optimisation (core/pv_images.py): image_pv is replaced by the
+    # downscaled version, miniatures = {"<size>": "<storage name>"}
+    traitement = models.CharField(
+        max_length=10,
+        choices=[("pending", "En attente"), ("done", "Optimisée"), ("failed", "Échec")],
+        default="pending",
+    )
+    miniatures = models.JSONField(default=dict, blank=True)
 
     class Meta:
         # One PV per Filiere per Year
         unique_together = ('filiere', 'annee_universitaire')
 
     def __str__(self):
-        return f"PV {self.filiere} - {self.annee_universitaire}"
\ No newline at end of file
+        return f"PV {self.filiere} - {self.annee_universitaire}"
+
+
+class AnnulationEvent(models.Model):
+    """
+    Append-only log of annulations / reactivations.
+    The auto-increment id is the feed cursor (monotonic sequence).
+    """
+    ACTION_CHOICES = [("annule", "Annulé"), ("reactive", "Réactivé")]
+
+    id = models.BigAutoField(primary_key=True)
+    # SET_NULL: deleting a diploma must not rewrite the feed clients already follow
+    diplome = models.ForeignKey(
+        Diplome, on_delete=models.SET_NULL, null=True, blank=True, related_name="annulation_events"
+    )
+    verification_uuid = models.CharField(max_length=32)
+    hash_signature = models.CharField(max_length=64)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    raison = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.action} - {self.verification_uuid}"
+
+
+
+class RateLimitBucket(models.Model):
+    """
+    Token bucket shared by every worker/node (see core/throttling.py).
+    Updated with a single atomic upsert per check.
+    """
+    key = models.CharField(max_length=200, primary_key=True)
+    tokens = models.FloatField()
+    updated_at = models.FloatField()  # epoch seconds
+    allowed = models.BooleanField(default=True)  # result of the last check
+
+    def __str__(self):
+        return self.key
+
+
+
+class VerificationDaily(models.Model):
+    """
+    Daily rollup of Verification rows (see core/rollups.py).
+    Raw rows older than the retention window are deleted once rolled up.
+    """
+    day = models.DateField()
+    diplome = models.ForeignKey(Diplome, on_delete=models.SET_NULL, related_name="verifications_daily", null=True, blank=True)
+    statut = models.CharField(max_length=20)
+    ip_prefix = models.CharField(max_length=50, blank=True)  # /24 (IPv4) or /48 (IPv6)
+    total = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["day", "statut"], name="verif_daily_day_statut_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.statut} ({self.total})"
+
+
+
+class DashboardCounter(models.Model):
+    """One pre-aggregated dashboard figure, e.g. (students_by_filiere, <filiere id>)."""
+    name = models.CharField(max_length=50)
+    key = models.CharField(max_length=100, blank=True)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["name", "key"], name="unique_dashboard_counter")
+        ]
+
+    def __str__(self):
+        return f"{self.name}[{self.key}] = {self.value}"
+
+
+
+class ImportJob(models.Model):
+    """Background student import (core/student_import.py, run_import_job)."""
+    STATUS_CHOICES = [
+        ("pending", "En attente"),
+        ("validating", "Validation"),
+        ("running", "Import en cours"),
+        ("done", "Terminé"),
+        ("invalid", "Fichier invalide"),
+        ("failed", "Échec"),
+    ]
+
+    fichier = models.CharField(max_length=400)  # absolute path of the stored upload
+    nom_fichier = models.CharField(max_length=255)
+    filiere = models.ForeignKey(Filiere, on_delete=models.CASCADE)
+    annee_universitaire = models.ForeignKey(AnneeUniversitaire, on_delete=models.CASCADE)
+    email_domain = models.CharField(max_length=100)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True)
+    # "insert": existing students are skipped; "upsert": updated, matched on `cle`
+    mode = models.CharField(max_length=10, choices=[("insert", "Ajout"), ("upsert", "Mise à jour")], default="insert")
+    cle = models.CharField(max_length=10, choices=[("matricule", "Matricule"), ("nni", "NNI")], default="matricule")
+
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    total_rows = models.PositiveIntegerField(null=True, blank=True)  # known after validation
+    processed_rows = models.PositiveIntegerField(default=0)
+    report = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Import {self.nom_fichier} ({self.status})"
+
+
+class OutboundEmail(models.Model):
+    """Outbox: emails queued by the API and sent by core/mailer.py."""
+    STATUS_CHOICES = [
+        ("pending", "En attente"),
+        ("sending", "Envoi en cours"),
+        ("sent", "Envoyé"),
+        ("failed", "Échec"),
+    ]
+
+    sujet = models.CharField(max_length=255)
+    corps = models.TextField()
+    expediteur = models.CharField(max_length=255, blank=True)  # empty: DEFAULT_FROM_EMAIL
+    destinataires = models.JSONField()  # list of addresses
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Worker query: pending messages that are due
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.sujet} -> {', '.join(self.destinataires)} ({self.status})"
+
+
+class TokenVersion(models.Model):
+    """JWT revocation: tokens carry the version they were issued with (core/authentication.py)."""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="token_version")
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.user_id} v{self.version}"
+
+
+class ChunkedUpload(models.Model):
+    """Resumable upload, assembled chunk by chunk on disk (core/chunked_upload.py)."""
+    STATUS_CHOICES = [
+        ("uploading", "En cours"),
+        ("completing", "Vérification"),  # sha256 being checked (chunked_upload.complete)
+        ("complete", "Terminé"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    nom_fichier = models.CharField(max_length=255)
+    taille = models.BigIntegerField()  # announced total size, bytes
+    sha256 = models.CharField(max_length=64)  # announced checksum, checked on completion
+    recu = models.BigIntegerField(default=0)  # bytes received = offset of the next chunk
+    fichier = models.CharField(max_length=400)  # absolute path of the partial file
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="uploading")
+    claim = models.UUIDField(null=True, blank=True)  # token of the request writing the next chunk
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.nom_fichier} ({self.recu}/{self.taille})"
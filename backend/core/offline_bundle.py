@@ -0,0 +1,207 @@
+"""
+Offline verification bundle for the mobile app.
+
+The bundle lets the app check a scanned QR code (verification_uuid) or a
+PDF hash (hash_signature) without network access:
+
+- a Bloom filter over every issued diploma ("uuid:<verification_uuid>"
+  and "hash:<hash_signature>"),
+- the cancelled diplomas, as hex SHA-256 of "uuid:<verification_uuid>",
+- a detached signature made with the institutional key.
+
+The endpoint is public, so the bundle never lists a verification_uuid or
+a hash_signature in clear: either one opens the diploma and the student's
+details on verify/. The client hashes what it scans and compares.
+
+Bloom filter layout (to reimplement on the client):
+    h  = SHA-256(item as UTF-8)
+    h1 = big-endian uint64 of h[0:8]
+    h2 = big-endian uint64 of h[8:16] | 1
+    bit_i = ((h1 + i * h2) mod 2**64) mod m    for i in 0..k-1
+    bit n is stored in byte n // 8, at position n % 8 (LSB first)
+
+`version` is the highest Diplome id included. A client holding version V
+asks for `?since=V` and receives only the diplomas issued after V, as
+SHA-256 digests of the same "uuid:" / "hash:" items (plus the current
+cancellation list), instead of a new filter. A `since` more than
+OFFLINE_BUNDLE_MAX_DELTA versions old gets the full bundle. Diplome
+inserts are serialized until commit (Diplome.save, advisory lock), so ids
+become visible in commit order and `id > V` never misses a diploma.
+
+`revocation_cursor` is the position in the annulation feed
+(diplomes-annulation/feed/) the cancellation list corresponds to, so the
+client can follow cancellations between bundles from that cursor.
+"""
+import json
+import math
+import base64
+import hashlib
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Max, Count
+from django.utils.timezone import now
+
+from .models import Diplome, AnnulationEvent
+from core.security.pdf_signer import sign_bytes
+
+
+BUNDLE_FORMAT = 2
+
+
+# ===================== BLOOM FILTER =====================
+
+def digest(item):
+    """One-way form of a bundle item ("uuid:..." / "hash:..."), as published."""
+    return hashlib.sha256(item.encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    def __init__(self, capacity, fp_rate):
+        capacity = max(int(capacity), 1)
+        self.m = max(int(math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))), 64)
+        self.k = min(max(int(round(self.m / capacity * math.log(2))), 1), 32)
+        self.bits = np.zeros((self.m + 7) // 8, dtype=np.uint8)
+
+    def add_many(self, items):
+        """Add a chunk of strings (vectorized over the chunk)."""
+        if not items:
+            return
+
+        digests = [hashlib.sha256(item.encode("utf-8")).digest() for item in items]
+        h1 = np.array([int.from_bytes(d[0:8], "big") for d in digests], dtype=np.uint64)
+        h2 = np.array([int.from_bytes(d[8:16], "big") | 1 for d in digests], dtype=np.uint64)
+
+        # uint64 arithmetic wraps modulo 2**64, as in the spec above
+        i = np.arange(self.k, dtype=np.uint64)
+        with np.errstate(over="ignore"):
+            positions = (h1[:, None] + i[None, :] * h2[:, None]) % np.uint64(self.m)
+
+        positions = positions.ravel()
+        np.bitwise_or.at(
+            self.bits,
+            (positions >> np.uint64(3)).astype(np.int64),
+            (np.uint8(1) << (positions & np.uint64(7)).astype(np.uint8)),
+        )
+
+    def to_dict(self):
+        return {
+            "m": self.m,
+            "k": self.k,
+            "bits": base64.b64encode(self.bits.tobytes()).decode("ascii"),
+        }
+
+
+# ===================== BUNDLE =====================
+
+def _cancelled_digests():
+    return [
+        digest(f"uuid:{u}")
+        for u in (
+            Diplome.objects
+            .filter(est_annule=True)
+            .order_by("id")
+            .values_list("verification_uuid", flat=True)
+            .iterator(chunk_size=5000)
+        )
+    ]
+
+
+def _revocation_cursor():
+    return AnnulationEvent.objects.aggregate(m=Max("id"))["m"] or 0
+
+
+def current_state():
+    """
+    (current version, cheap fingerprint of what a bundle would contain).
+    The fingerprint is the cache key / ETag, so bundles are only rebuilt when needed.
+    """
+    agg = Diplome.objects.aggregate(version=Max("id"), total=Count("id"))
+    version = agg["version"] or 0
+    return version, f"{version}-{agg['total']}-{_revocation_cursor()}"
+
+
+def _sign(payload):
+    """Canonical JSON of the payload, signed with the institutional key."""
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    algorithm, signature, cert_fingerprint = sign_bytes(canonical.encode("utf-8"))
+    return {
+        "payload": payload,
+        "signature": {
+            "algorithm": algorithm,
+            "value": base64.b64encode(signature).decode("ascii"),
+            "cert_sha256": cert_fingerprint,
+        },
+    }
+
+
+def build_full_bundle():
+    """
+    Full bundle. Diplomas are streamed in id order in chunks, so memory
+    is bounded by the filter size, not by the number of rows.
+    """
+    chunk_size = getattr(settings, "OFFLINE_BUNDLE_CHUNK_SIZE", 5000)
+    total = Diplome.objects.count()
+    bloom = BloomFilter(total * 2, getattr(settings, "OFFLINE_BUNDLE_FP_RATE", 1e-6))
+
+    version = 0
+    chunk = []
+    rows = (
+        Diplome.objects
+        .order_by("id")
+        .values_list("id", "verification_uuid", "hash_signature")
+        .iterator(chunk_size=chunk_size)
+    )
+    for pk, verification_uuid, hash_signature in rows:
+        version = pk
+        chunk.append(f"uuid:{verification_uuid}")
+        chunk.append(f"hash:{hash_signature}")
+        if len(chunk) >= chunk_size * 2:
+            bloom.add_many(chunk)
+            chunk = []
+    bloom.add_many(chunk)
+
+    revocation_cursor = _revocation_cursor()
+
+    return _sign({
+        "format": BUNDLE_FORMAT,
+        "type": "full",
+        "version": version,
+        "generated_at": now().isoformat(),
+        "count": total,
+        "bloom": bloom.to_dict(),
+        "annules": _cancelled_digests(),
+        "revocation_cursor": revocation_cursor,
+    })
+
+
+def build_delta_bundle(since):
+    """
+    Delta from version `since`: explicit list of diplomas issued since then
+    and the current cancellation list. Returns None when the delta would be
+    larger than OFFLINE_BUNDLE_MAX_DELTA (client should take a full bundle).
+    """
+    max_delta = getattr(settings, "OFFLINE_BUNDLE_MAX_DELTA", 20000)
+
+    new_rows = list(
+        Diplome.objects
+        .filter(id__gt=since)
+        .order_by("id")
+        .values_list("id", "verification_uuid", "hash_signature")[:max_delta + 1]
+    )
+    if len(new_rows) > max_delta:
+        return None
+
+    version = new_rows[-1][0] if new_rows else since
+    revocation_cursor = _revocation_cursor()
+
+    return _sign({
+        "format": BUNDLE_FORMAT,
+        "type": "delta",
+        "since": since,
+        "version": version,
+        "generated_at": now().isoformat(),
+        "added": [{"uuid": digest(f"uuid:{u}"), "hash": digest(f"hash:{h}")} for _, u, h in new_rows],
+        "annules": _cancelled_digests(),
+        "revocation_cursor": revocation_cursor,
+    })
@@ -0,0 +1,130 @@
+# core/pagination.py
+"""
+Server-side pagination for the list endpoints.
+
+Cursor pagination: each page is a keyset query on the ordering column and
+`id` (StableOrderingFilter always appends it), e.g.
+
+    WHERE (col > last_col) OR (col = last_col AND id > last_id)
+    ORDER BY col, id LIMIT n
+
+so page 10 000 costs the same as page 1, rows with equal values are never
+skipped or repeated, and rows inserted meanwhile never shift the pages.
+
+Every list is paginated (100 rows by default, ?page_size= up to 500);
+clients follow `next` until it is null. Ordering by a
+nullable column is refused: NULLs can't be compared in a keyset.
+"""
+import json
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    # Fallback when the view declares no ordering
+    ordering = "id"
+
+    def get_ordering(self, request, queryset, view):
+        ordering = list(super().get_ordering(request, queryset, view))
+        if not any(f.lstrip("-") in ("id", "pk") for f in ordering):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        # The keyset is the ordering up to the first unique column
+        keys = []
+        for field in ordering:
+            keys.append(field)
+            if field.lstrip("-") in ("id", "pk"):
+                break
+        for field in keys:
+            name = field.lstrip("-")
+            try:
+                nullable = queryset.model._meta.get_field(name).null
+            except FieldDoesNotExist:
+                nullable = False
+            if nullable:
+                raise ValidationError({"error": f"Tri impossible sur {name} (valeurs manquantes)"})
+        return keys
+
+    def _get_position_from_instance(self, instance, ordering):
+        names = [field.lstrip("-") for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[name] for name in names]
+        else:
+            values = [getattr(instance, name) for name in names]
+        return json.dumps([str(value) for value in values])
+
+    def _keyset_filter(self, position, reverse):
+        """Rows strictly after `position` in the ordering (before it when `reverse`)."""
+        try:
+            values = json.loads(position)
+        except ValueError:
+            values = None
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise ValidationError({"error": "Curseur invalide"})
+
+        condition = Q()
+        equal = {}
+        for field, value in zip(self.ordering, values):
+            name = field.lstrip("-")
+            descending = field.startswith("-")
+            lookup = "lt" if descending != reverse else "gt"
+            condition |= Q(**equal, **{f"{name}__{lookup}": value})
+            equal[name] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            offset, reverse, current_position = 0, False, None
+        else:
+            offset, reverse, current_position = self.cursor
+
+        if reverse:
+            queryset = queryset.order_by(*[f[1:] if f.startswith("-") else f"-{f}" for f in self.ordering])
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # Positions are unique (they end with id): the offset is always 0
+        if current_position is not None:
+            queryset = queryset.filter(self._keyset_filter(current_position, reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = current_position is not None
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = current_position is not None
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
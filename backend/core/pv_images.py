@@ -0,0 +1,128 @@
+"""
+PV jury scans: optimised once, in the background, after upload.
+
+- orientation applied from EXIF, then all metadata dropped (EXIF, GPS, ICC)
+- downscaled to PV_IMAGE_MAX_SIZE px on the long side (still legible when
+  printed A4), re-encoded as WebP (or JPEG) at PV_IMAGE_QUALITY
+- one thumbnail per PV_THUMBNAIL_SIZES, for the list pages
+
+The optimised image replaces the original upload in image_pv; thumbnails are
+stored next to it and listed in PVJury.miniatures. JPEG camera photos are
+decoded at reduced scale directly (Image.draft), which is much faster than
+decoding the full resolution first.
+"""
+import io
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from .models import PVJury
+
+
+logger = logging.getLogger(__name__)
+
+
+def _settings():
+    fmt = getattr(settings, "PV_IMAGE_FORMAT", "WEBP").upper()
+    return {
+        "max_size": getattr(settings, "PV_IMAGE_MAX_SIZE", 2400),
+        "quality": getattr(settings, "PV_IMAGE_QUALITY", 80),
+        "thumbnails": getattr(settings, "PV_THUMBNAIL_SIZES", (320, 960)),
+        "format": fmt,
+        "ext": ".webp" if fmt == "WEBP" else ".jpg",
+    }
+
+
+def _flatten(img):
+    """Composite transparent images onto white: convert() alone turns transparency black."""
+    if img.mode == "P" and "transparency" in img.info:
+        img = img.convert("RGBA")
+    if img.mode not in ("RGBA", "LA", "PA"):
+        return img
+    grayscale = img.mode == "LA"
+    flat = Image.new("RGBA", img.size, (255, 255, 255, 255))
+    flat.alpha_composite(img.convert("RGBA"))
+    return flat.convert("L" if grayscale else "RGB")
+
+
+def _open(f, max_size):
+    img = Image.open(f)
+    # JPEG: let the decoder downscale by a power of two (at least max_size kept)
+    img.draft(img.mode, (max_size, max_size))
+    img = _flatten(ImageOps.exif_transpose(img))
+    # Scans are often grayscale: keep one channel, smaller files
+    return img.convert("L" if img.mode in ("1", "L", "I", "I;16") else "RGB")
+
+
+def _encode(img, conf):
+    buf = io.BytesIO()
+    options = {"quality": conf["quality"]}
+    if conf["format"] == "WEBP":
+        options["method"] = 6
+    else:
+        options.update(optimize=True, progressive=True)
+    # No exif= / icc_profile= passed: metadata is not written
+    img.save(buf, conf["format"], **options)
+    return ContentFile(buf.getvalue())
+
+
+def _resized(img, size):
+    copy = img.copy()
+    copy.thumbnail((size, size), Image.Resampling.LANCZOS)
+    return copy
+
+
+def process_pv(pv_id):
+    """Optimise the image of a PV and build its thumbnails."""
+    pv = PVJury.objects.filter(pk=pv_id).first()
+    if pv is None or not pv.image_pv:
+        return
+
+    conf = _settings()
+    original = pv.image_pv.name
+    base = os.path.splitext(original)[0]
+
+    try:
+        with default_storage.open(original, "rb") as f:
+            img = _open(f, conf["max_size"])
+
+        name = default_storage.save(base + conf["ext"], _encode(_resized(img, conf["max_size"]), conf))
+        miniatures = {}
+        for size in conf["thumbnails"]:
+            miniatures[str(size)] = default_storage.save(
+                f"pvs_jury/miniatures/{os.path.basename(base)}_{size}{conf['ext']}",
+                _encode(_resized(img, size), conf),
+            )
+    except Exception:
+        logger.exception("PV #%s: image processing failed", pv_id)
+        PVJury.objects.filter(pk=pv_id).update(traitement="failed")
+        return
+
+    updated = (
+        PVJury.objects
+        .filter(pk=pv_id, image_pv=original)  # not replaced / deleted meanwhile
+        .update(image_pv=name, miniatures=miniatures, traitement="done")
+    )
+    # Replaced: drop the original upload (and older thumbnails); otherwise ours
+    stale = [original, *pv.miniatures.values()] if updated else [name, *miniatures.values()]
+    for path in stale:
+        default_storage.delete(path)
+
+
+def stored_files(pv):
+    """Storage names of the image and thumbnails of a PV."""
+    return [path for path in [pv.image_pv.name, *pv.miniatures.values()] if path]
+
+
+def delete_paths(paths):
+    for path in paths:
+        default_storage.delete(path)
+
+
+def delete_files(pv):
+    """Remove the image and thumbnails of a PV (on delete)."""
+    delete_paths(stored_files(pv))
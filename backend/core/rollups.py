@@ -0,0 +1,218 @@
+"""
+Daily rollups and retention for the Verification table.
+
+- rollup_pending_days() compacts every complete day after the last rolled
+  day into VerificationDaily rows (per diplôme, statut and IP prefix).
+- purge_raw_verifications() deletes (optionally archives) raw rows older
+  than the retention window, in batches, and never touches a day that has
+  not been rolled up yet.
+- The dashboard helpers read rollups for rolled days and raw rows after
+  (raw_tail() for the counters-based dashboard, core/counters.py).
+"""
+import os
+import csv
+import gzip
+import ipaddress
+from collections import Counter
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import Verification, VerificationDaily
+
+
+# ===================== HELPERS =====================
+
+def ip_prefix(ip):
+    """'41.188.12.7' -> '41.188.12.0/24', IPv6 -> /48. Empty if unknown."""
+    if not ip:
+        return ""
+    try:
+        addr = ipaddress.ip_address(ip)
+    except ValueError:
+        return ""
+    length = 24 if addr.version == 4 else 48
+    return str(ipaddress.ip_network(f"{addr}/{length}", strict=False))
+
+
+def _day_start(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def last_rolled_day():
+    return VerificationDaily.objects.aggregate(m=Max("day"))["m"]
+
+
+def rolled_rows():
+    """Rollup rows with verifications in them (not the empty-day markers)."""
+    return VerificationDaily.objects.filter(total__gt=0)
+
+
+def raw_start():
+    """First instant whose verifications are still only in the raw table."""
+    last = last_rolled_day()
+    return _day_start(last + timedelta(days=1)) if last else None
+
+
+# ===================== ROLLUP =====================
+
+def rollup_day(day):
+    """(Re)build the rollup rows of one day from the raw table."""
+    start = _day_start(day)
+    rows = (
+        Verification.objects
+        .filter(date_verification__gte=start, date_verification__lt=start + timedelta(days=1))
+        .values("diplome_id", "statut", "adresse_ip")
+        .annotate(n=Count("id"))
+    )
+
+    totals = Counter()
+    for row in rows.iterator(chunk_size=5000):
+        totals[(row["diplome_id"], row["statut"], ip_prefix(row["adresse_ip"]))] += row["n"]
+
+    rollup = [
+        VerificationDaily(day=day, diplome_id=d, statut=s, ip_prefix=p, total=n)
+        for (d, s, p), n in totals.items()
+    ]
+    # A day without verifications still gets a (zero) row: last_rolled_day()
+    # moves past it. Reads skip zero rows (rolled_rows()).
+    rollup = rollup or [VerificationDaily(day=day, statut="", total=0)]
+
+    with transaction.atomic():
+        VerificationDaily.objects.filter(day=day).delete()
+        VerificationDaily.objects.bulk_create(rollup, batch_size=1000)
+    return sum(totals.values())
+
+
+def rollup_pending_days():
+    """Roll up every complete day (before today) not rolled yet."""
+    last = last_rolled_day()
+    if last:
+        day = last + timedelta(days=1)
+    else:
+        first = Verification.objects.aggregate(m=Min("date_verification"))["m"]
+        if first is None:
+            return []
+        day = timezone.localtime(first).date()
+
+    today = timezone.localdate()
+    done = []
+    while day < today:
+        done.append((day, rollup_day(day)))
+        day += timedelta(days=1)
+    return done
+
+
+# ===================== RETENTION =====================
+
+def _archive(path, rows):
+    new_file = not os.path.exists(path)
+    with gzip.open(path, "at", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(["id", "diplome_id", "date_verification", "adresse_ip", "statut"])
+        for r in rows:
+            writer.writerow([r["id"], r["diplome_id"], r["date_verification"].isoformat(), r["adresse_ip"], r["statut"]])
+
+
+def purge_raw_verifications(retention_days, batch_size=5000, archive_dir=None):
+    """
+    Delete raw verifications older than `retention_days`, batch by batch.
+    Only days already rolled up are eligible. Returns the number deleted.
+    """
+    cutoff = _day_start(timezone.localdate() - timedelta(days=retention_days))
+    rolled_until = raw_start()
+    if rolled_until is None:
+        return 0
+    cutoff = min(cutoff, rolled_until)
+
+    archive_path = None
+    if archive_dir:
+        os.makedirs(archive_dir, exist_ok=True)
+        archive_path = os.path.join(archive_dir, f"verifications_{timezone.localdate():%Y%m%d}.csv.gz")
+
+    deleted = 0
+    while True:
+        batch = list(
+            Verification.objects
+            .filter(date_verification__lt=cutoff)
+            .order_by("id")
+            .values("id", "diplome_id", "date_verification", "adresse_ip", "statut")[:batch_size]
+        )
+        if not batch:
+            break
+        if archive_path:
+            _archive(archive_path, batch)
+        deleted += Verification.objects.filter(id__in=[r["id"] for r in batch]).delete()[0]
+    return deleted
+
+
+# ===================== DASHBOARD READS =====================
+
+def _windows(date_from=None, date_to=None, filiere=None, annee_obtention=None):
+    """
+    (rollup queryset, raw queryset) covering the requested window without
+    overlap: rolled days come from VerificationDaily, later days from raw rows.
+    """
+    rolled = rolled_rows()
+    raw = Verification.objects.all()
+
+    start = raw_start()
+    if start:
+        raw = raw.filter(date_verification__gte=start)
+
+    if date_from:
+        rolled = rolled.filter(day__gte=date_from)
+        raw = raw.filter(date_verification__gte=_day_start(date_from))
+    if date_to:
+        rolled = rolled.filter(day__lte=date_to)
+        raw = raw.filter(date_verification__lt=_day_start(date_to + timedelta(days=1)))
+    if filiere:
+        rolled = rolled.filter(diplome__specialite_id=filiere)
+        raw = raw.filter(diplome__specialite_id=filiere)
+    if annee_obtention:
+        rolled = rolled.filter(diplome__annee_obtention=annee_obtention)
+        raw = raw.filter(diplome__annee_obtention=annee_obtention)
+
+    return rolled, raw
+
+
+def verifications_by_day(**filters):
+    """[{day, total}] from rollups + raw rows not rolled yet."""
+    rolled, raw = _windows(**filters)
+
+    per_day = Counter()
+    for row in rolled.values("day").annotate(total=Sum("total")):
+        per_day[row["day"]] += row["total"]
+    for row in raw.annotate(day=TruncDate("date_verification")).values("day").annotate(total=Count("id")):
+        per_day[row["day"]] += row["total"]
+
+    return [{"day": day, "total": total} for day, total in sorted(per_day.items())]
+
+
+def status_counts(**filters):
+    """[{statut, count}] from rollups + raw rows not rolled yet."""
+    rolled, raw = _windows(**filters)
+
+    counts = Counter()
+    for row in rolled.values("statut").annotate(n=Sum("total")):
+        counts[row["statut"]] += row["n"]
+    for row in raw.values("statut").annotate(n=Count("id")):
+        counts[row["statut"]] += row["n"]
+
+    return [{"statut": statut, "count": n} for statut, n in counts.items()]
+
+
+def raw_tail():
+    """Raw rows not rolled up yet, as ({day: n}, {statut: n}) (one GROUP BY)."""
+    _, raw = _windows()
+
+    per_day, per_statut = Counter(), Counter()
+    rows = raw.annotate(day=TruncDate("date_verification")).values("day", "statut").annotate(n=Count("id"))
+    for row in rows:
+        per_day[row["day"]] += row["n"]
+        per_statut[row["statut"]] += row["n"]
+    return per_day, per_statut
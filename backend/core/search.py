@@ -0,0 +1,48 @@
+# core/search.py
+"""
+Bilingual (French / Arabic) student search.
+
+Etudiant.nom_recherche holds both names normalised by text.normalize_name() and
+is indexed with a pg_trgm GIN index (migration 0020). The query is
+normalised the same way, so "Mohamed", "mohamed" and "MOHAMED", or
+"أحمد", "احمد" and "أَحْمَد", all match the same rows.
+"""
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db.models import Q, Value, FloatField, Case, When, ExpressionWrapper
+
+from .models import Etudiant
+from .text import normalize_name
+
+
+def search_students(query, limit=20, offset=0):
+    """
+    Ranked students for `query`: exact matricule / NNI first, then name
+    matches ordered by trigram word similarity. Returns (rows, has_more).
+    """
+    query = query.strip()
+    term = normalize_name(query)
+    if not term:
+        return [], False
+
+    exact = Q(nni=query)
+    if query.isdigit():
+        exact |= Q(matricule=int(query))
+
+    # Both name lookups are served by the GIN trigram index,
+    # the identifiers by their unique indexes
+    by_name = Q(nom_recherche__contains=term) | Q(nom_recherche__trigram_word_similar=term)
+
+    rank = ExpressionWrapper(
+        Case(When(exact, then=Value(1.0)), default=Value(0.0), output_field=FloatField())
+        + TrigramWordSimilarity(Value(term), "nom_recherche"),
+        output_field=FloatField(),
+    )
+
+    rows = list(
+        Etudiant.objects
+        .filter(exact | by_name)
+        .annotate(score=rank)
+        .select_related("filiere", "annee_universitaire")
+        .order_by("-score", "id")[offset:offset + limit + 1]
+    )
+    return rows[:limit], len(rows) > limit
@@ -1,9 +1,12 @@
 import os
+import hashlib
 
 from pyhanko.sign import signers
 from pyhanko.sign.signers import SimpleSigner
 from pyhanko.pdf_utils.incremental_writer import IncrementalPdfFileWriter
 from pyhanko.keys.pemder import load_private_key_from_pemder, load_cert_from_pemder
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, ec, padding
 
 
 # ===================== PATHS =====================
@@ -59,3 +62,24 @@ def sign_pdf(unsigned_pdf_path: str, signed_pdf_path: str):
                 signer=signer,
                 output=outf
             )
+
+
+# ===================== SIGN DATA (offline bundles) =====================
+
+def sign_bytes(data: bytes):
+    """
+    Detached signature of arbitrary bytes with the institutional key.
+    Returns (algorithm, signature_bytes, cert_sha256_fingerprint).
+    """
+    with open(PRIVATE_KEY_PATH, "rb") as f:
+        key = serialization.load_pem_private_key(f.read(), password=None)
+
+    cert_fingerprint = hashlib.sha256(load_cert_from_pemder(CERT_PATH).dump()).hexdigest()
+
+    if isinstance(key, rsa.RSAPrivateKey):
+        return "RSA-PKCS1v15-SHA256", key.sign(data, padding.PKCS1v15(), hashes.SHA256()), cert_fingerprint
+
+    if isinstance(key, ec.EllipticCurvePrivateKey):
+        return "ECDSA-SHA256", key.sign(data, ec.ECDSA(hashes.SHA256())), cert_fingerprint
+
+    raise ValueError("Type de clé non supporté")
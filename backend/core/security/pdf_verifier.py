@@ -0,0 +1,254 @@
+
+import os
+import io
+import mmap
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.timezone import now
+
+from pyhanko.sign.validation import validate_pdf_signature
+from pyhanko_certvalidator import ValidationContext
+from pyhanko.pdf_utils.reader import PdfFileReader
+from pyhanko.keys.pemder import load_cert_from_pemder
+
+from core.security.pdf_signer import CERT_PATH
+
+
+logger = logging.getLogger(__name__)
+
+
+# ===================== TRUST =====================
+
+_trust_lock = threading.Lock()
+_trust = {"key": None, "fingerprint": None, "roots": None}
+
+
+def _load_roots():
+    """Institution certificate, parsed once per trust configuration."""
+    if not os.path.exists(CERT_PATH):
+        return []
+    return [load_cert_from_pemder(CERT_PATH)]
+
+
+def _build_context(roots):
+    """
+    ValidationContext anchored on the institution certificate.
+    Built for each validation: a context is not thread-safe (it caches
+    paths and revocation data as it goes) and pins its validation time
+    when it is created, so it is never shared between pool threads.
+    """
+    if not roots:
+        return ValidationContext()
+    return ValidationContext(trust_roots=roots, allow_fetching=False)
+
+
+def _trust_state():
+    """
+    Returns (fingerprint, trust roots) for this process.
+    Reloaded when the certificate file changes or when
+    SIGNATURE_TRUST_VERSION changes.
+    """
+    version = str(getattr(settings, "SIGNATURE_TRUST_VERSION", "1"))
+    mtime = os.path.getmtime(CERT_PATH) if os.path.exists(CERT_PATH) else None
+    key = (version, mtime)
+
+    with _trust_lock:
+        if _trust["key"] != key:
+            if mtime is None:
+                cert_hash = "none"
+            else:
+                with open(CERT_PATH, "rb") as f:
+                    cert_hash = hashlib.sha256(f.read()).hexdigest()[:16]
+
+            _trust["key"] = key
+            _trust["fingerprint"] = f"{version}-{cert_hash}"
+            _trust["roots"] = _load_roots()
+
+        return _trust["fingerprint"], _trust["roots"]
+
+
+# ===================== RESULT CACHE =====================
+
+CACHE_PREFIX = "pdfsig"
+
+
+def trust_fingerprint() -> str:
+    """
+    Identifies the current trust configuration.
+    Changing the institution certificate (or bumping SIGNATURE_TRUST_VERSION)
+    changes this value, so every cached result is ignored.
+    """
+    return _trust_state()[0]
+
+
+# ===================== VALIDATION POOL =====================
+
+class ValidationBusy(Exception):
+    """Too many validations already queued in this process."""
+
+
+_pool = ThreadPoolExecutor(
+    max_workers=getattr(settings, "SIGNATURE_VALIDATION_WORKERS", 2),
+    thread_name_prefix="pdf-validation",
+)
+_pending_lock = threading.Lock()
+_pending = 0
+
+
+def validation_queue_depth() -> int:
+    """Validations queued or running in this process (metric)."""
+    return _pending
+
+
+def _submit(fn, *args):
+    global _pending
+
+    limit = (
+        getattr(settings, "SIGNATURE_VALIDATION_WORKERS", 2)
+        + getattr(settings, "SIGNATURE_VALIDATION_QUEUE", 8)
+    )
+
+    with _pending_lock:
+        if _pending >= limit:
+            logger.warning("PDF validation queue full (depth=%d)", _pending)
+            raise ValidationBusy()
+        _pending += 1
+
+    def _done(_future):
+        global _pending
+        with _pending_lock:
+            _pending -= 1
+
+    future = _pool.submit(fn, *args)
+    future.add_done_callback(_done)
+    return future
+
+
+# ===================== MEMORY-MAPPED INPUT =====================
+
+class MappedFile(io.RawIOBase):
+    """
+    Read-only, seekable stream over an mmap.
+    Lets pyHanko read a spooled upload straight from the page cache
+    instead of a copied bytes buffer.
+    """
+
+    def __init__(self, mapped):
+        self._mm = mapped
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._mm.tell()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        self._mm.seek(offset, whence)
+        return self._mm.tell()
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            return self._mm.read()
+        return self._mm.read(size)
+
+    def readline(self, size=-1):
+        line = self._mm.readline()
+        if size is not None and size >= 0 and len(line) > size:
+            self._mm.seek(size - len(line), io.SEEK_CUR)
+            line = line[:size]
+        return line
+
+    def readinto(self, buffer):
+        pos = self._mm.tell()
+        n = min(len(buffer), len(self._mm) - pos)
+        with memoryview(self._mm) as view:
+            buffer[:n] = view[pos:pos + n]
+        self._mm.seek(pos + n)
+        return n
+
+
+@contextmanager
+def open_mapped(path):
+    """Memory-map a file on disk and yield it as a MappedFile."""
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            stream = MappedFile(mm)
+            try:
+                yield stream
+            finally:
+                stream.close()
+
+
+# ===================== VALIDATION =====================
+
+def _run_validation(pdf_stream, vc) -> dict:
+    """Full CMS validation through pyHanko (expensive)."""
+    reader = PdfFileReader(pdf_stream)
+
+    if not reader.embedded_signatures:
+        return {"valid": False, "error": "Signature absente", "signer_fingerprint": None}
+
+    sig = reader.embedded_signatures[0]
+
+    sig_status = validate_pdf_signature(sig, vc)
+
+    # Once anchored on the institution certificate, a signature that
+    # doesn't chain to it is rejected even if it is cryptographically intact.
+    valid = bool(sig_status.valid)
+    if os.path.exists(CERT_PATH):
+        valid = valid and bool(sig_status.trusted)
+
+    signer_fingerprint = None
+    if sig.signer_cert is not None:
+        signer_fingerprint = hashlib.sha256(sig.signer_cert.dump()).hexdigest()
+
+    return {
+        "valid": valid,
+        "error": None if valid else "Signature invalide",
+        "signer_fingerprint": signer_fingerprint,
+    }
+
+
+def _validate_file(path, roots) -> dict:
+    # Runs in the pool, with its own mapping and its own context
+    with open_mapped(path) as pdf_stream:
+        return _run_validation(pdf_stream, _build_context(roots))
+
+
+def validate_signed_pdf(path: str, pdf_hash: str) -> dict:
+    """
+    Validate the embedded signature of the PDF stored at `path`.
+
+    Results are memoized by the SHA-256 of the file, so a diploma that is
+    uploaded again skips pyHanko until the entry expires
+    (SIGNATURE_CACHE_TIMEOUT) or the trust configuration changes.
+    Cache misses are validated in the bounded process-wide pool.
+
+    Raises ValidationBusy when the pool is saturated: work is refused
+    up front rather than abandoned half-way, since a running validation
+    can't be cancelled.
+    Returns a dict: valid, error, signer_fingerprint, validated_at, cached.
+    """
+    fingerprint, roots = _trust_state()
+    key = f"{CACHE_PREFIX}:{fingerprint}:{pdf_hash}"
+
+    result = cache.get(key)
+    if result is not None:
+        return {**result, "cached": True}
+
+    result = _submit(_validate_file, path, roots).result()
+
+    result["validated_at"] = now().isoformat()
+
+    cache.set(key, result, getattr(settings, "SIGNATURE_CACHE_TIMEOUT", 60 * 60 * 24))
+
+    return {**result, "cached": False}
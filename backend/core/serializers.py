@@ -1,43 +1,114 @@
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from django.conf import settings
 from django.core.exceptions import ValidationError as DjangoValidationError
-from .models import Diplome, Etudiant, Filiere, Verification, AnneeUniversitaire, StructureDiplome, PVJury
+from django.core.files.storage import default_storage
+from django.db import models
+from .models import Diplome, Etudiant, Filiere, Verification, AnneeUniversitaire, StructureDiplome, PVJury, ImportJob
 import re
 
 
-class EtudiantSerializer(serializers.ModelSerializer):
+# ===================== LIST HELPERS =====================
+
+class FastListSerializer(serializers.ListSerializer):
+    """
+    Read path for large lists: plain columns (char / int / bool / float and
+    FK ids) are copied straight from the instance; only the other fields
+    (dates, files, method fields...) go through DRF's to_representation.
+    """
+    PLAIN = (serializers.CharField, serializers.IntegerField, serializers.BooleanField, serializers.FloatField)
+
+    def _plan(self):
+        model = self.child.Meta.model
+        columns = {f.name: f for f in model._meta.concrete_fields}
+        plan = []
+        for field in self.child._readable_fields:
+            column = columns.get(field.source)
+            attr = None
+            if column is not None:
+                if isinstance(field, serializers.PrimaryKeyRelatedField):
+                    attr = column.attname
+                elif type(field) in self.PLAIN or isinstance(field, (serializers.EmailField, serializers.IPAddressField)):
+                    attr = field.source
+            plan.append((field.field_name, attr, field))
+        return plan
+
+    def to_representation(self, data):
+        iterable = data.all() if isinstance(data, models.manager.BaseManager) else data
+        plan = self._plan()
+        rows = []
+        for obj in iterable:
+            row = {}
+            for name, attr, field in plan:
+                if attr is not None:
+                    row[name] = getattr(obj, attr)
+                    continue
+                try:
+                    value = field.get_attribute(obj)
+                except SkipField:
+                    continue
+                row[name] = None if value is None else field.to_representation(value)
+            rows.append(row)
+        return rows
+
+
+class SparseFieldsMixin:
+    """?fields=id,nom_prenom_fr : only serialize the listed fields (GET only)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method != "GET":
+            return
+        wanted = request.query_params.get("fields")
+        if wanted:
+            keep = {f.strip() for f in wanted.split(",") if f.strip()}
+            for name in set(self.fields) - keep:
+                self.fields.pop(name)
+
+
+class EtudiantSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Etudiant
-        fields = "__all__"
+        exclude = ["nom_recherche", "empreinte"]
         read_only_fields = ['id']
+        list_serializer_class = FastListSerializer
 
 
-class DiplomeSerializer(serializers.ModelSerializer):
+class DiplomeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Diplome
         fields = "__all__"
         read_only_fields = ['id']
+        list_serializer_class = FastListSerializer
 
 
-class StructureDiplomeSerializer(serializers.ModelSerializer):
+class StructureDiplomeSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = StructureDiplome
         fields = "__all__"
         read_only_fields = ["id"]
+        list_serializer_class = FastListSerializer
 
 
-class FiliereSerializer(serializers.ModelSerializer):
+class FiliereSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Filiere
         fields = "__all__"
         read_only_fields = ['id']
+        list_serializer_class = FastListSerializer
 
 
-class VerificationSerializer(serializers.ModelSerializer):
+class VerificationSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     diplome = serializers.SerializerMethodField()
     etudiant = serializers.SerializerMethodField()  # Fixed: was referencing get_etudiant
 
+    # Joined by core.filters.EagerLoadingFilter (get_diplome / get_etudiant)
+    select_related = ("diplome__etudiant__filiere",)
+
     class Meta:
         model = Verification
+        list_serializer_class = FastListSerializer
         fields = [
             "id",
             "date_verification",
@@ -69,11 +140,12 @@ class VerificationSerializer(serializers.ModelSerializer):
         return None
 
 
-class AnneeUniversitaireSerializer(serializers.ModelSerializer):
+class AnneeUniversitaireSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = AnneeUniversitaire
         fields = "__all__"
         read_only_fields = ['id']
+        list_serializer_class = FastListSerializer
     
     def validate_code_annee(self, value):
         """
@@ -160,8 +232,43 @@ class AnneeUniversitaireSerializer(serializers.ModelSerializer):
     
 
 
-class PVJurySerializer(serializers.ModelSerializer):
+class PVJurySerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    # {"320": url, "960": url} once the upload is processed (core/pv_images.py)
+    miniatures = serializers.SerializerMethodField()
+
     class Meta:
         model = PVJury
         fields = "__all__"
-        read_only_fields = ['id']
\ No newline at end of file
+        read_only_fields = ['id', 'traitement']
+        list_serializer_class = FastListSerializer
+
+    def validate_image_pv(self, value):
+        limit = getattr(settings, "PV_UPLOAD_MAX_SIZE", 20 * 1024 * 1024)
+        if value and value.size > limit:
+            raise serializers.ValidationError(f"Image trop volumineuse (max {limit // (1024 * 1024)} Mo)")
+        return value
+
+    def get_miniatures(self, obj):
+        request = self.context.get("request")
+        urls = {}
+        for size, name in (obj.miniatures or {}).items():
+            url = default_storage.url(name)
+            urls[size] = request.build_absolute_uri(url) if request else url
+        return urls
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    progress = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ImportJob
+        exclude = ["fichier"]
+        read_only_fields = ["id"]
+
+    def get_progress(self, obj):
+        """Percentage, once the number of rows is known (after validation)."""
+        if obj.status == "done":
+            return 100
+        if not obj.total_rows or obj.status != "running":
+            return None
+        return min(100, round(100 * obj.processed_rows / obj.total_rows))
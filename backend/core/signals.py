@@ -0,0 +1,135 @@
+# core/signals.py
+"""
+Keep the dashboard counters (core/counters.py) in sync with writes, and
+revoke the tokens of a user whose privileges change (core/authentication.py).
+"""
+from django.contrib.auth.models import User
+from django.db.models import DEFERRED
+from django.db.models.signals import post_init, pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .models import Etudiant, Diplome
+from . import authentication, counters
+
+
+# Only save() and delete() send these signals. QuerySet.update(), bulk_create()
+# and bulk_update() don't: code changing a counted field that way applies the
+# counters itself (core/student_import.py does), otherwise the counters drift
+# until `manage.py recompute_dashboard_counters`.
+
+def _loaded(instance, fields):
+    # Only fields actually loaded (never trigger a query for deferred ones)
+    return tuple(instance.__dict__.get(f, DEFERRED) for f in fields)
+
+
+def _fill_deferred(sender, instance, fields):
+    """
+    Fields deferred at load time (.only() / .defer()) have no snapshot: read
+    them from the row before save() or delete() changes it.
+    """
+    state = instance._counter_state
+    if DEFERRED not in state or instance.pk is None:
+        return
+    row = sender.objects.filter(pk=instance.pk).values_list(*fields).first()
+    if row is not None:
+        instance._counter_state = tuple(r if v is DEFERRED else v for v, r in zip(state, row))
+
+
+def _saved(instance, created, fields, keys):
+    old = instance._counter_state
+    # Still deferred after save(): not written, so unchanged
+    new = tuple(o if v is DEFERRED else v for v, o in zip(_loaded(instance, fields), old))
+    instance._counter_state = new
+    counters.apply_change(None if created else keys(old), keys(new))
+
+
+def _keys(function):
+    return lambda state: function(*(None if v is DEFERRED else v for v in state))
+
+
+# ===================== ETUDIANT =====================
+
+ETUDIANT_FIELDS = ("filiere_id", "annee_universitaire_id", "date_naissance")
+_student_keys = _keys(counters.student_keys)
+
+
+@receiver(post_init, sender=Etudiant)
+def etudiant_snapshot(sender, instance, **kwargs):
+    instance._counter_state = _loaded(instance, ETUDIANT_FIELDS)
+
+
+@receiver(pre_save, sender=Etudiant)
+@receiver(pre_delete, sender=Etudiant)
+def etudiant_changing(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _fill_deferred(sender, instance, ETUDIANT_FIELDS)
+
+
+@receiver(post_save, sender=Etudiant)
+def etudiant_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        _saved(instance, created, ETUDIANT_FIELDS, _student_keys)
+
+
+@receiver(post_delete, sender=Etudiant)
+def etudiant_deleted(sender, instance, **kwargs):
+    counters.apply_change(_student_keys(instance._counter_state), None)
+
+
+# ===================== DIPLOME (incl. cancellations) =====================
+
+DIPLOME_FIELDS = ("specialite_id", "annee_obtention", "est_annule")
+_diplome_keys = _keys(counters.diplome_keys)
+
+
+@receiver(post_init, sender=Diplome)
+def diplome_snapshot(sender, instance, **kwargs):
+    instance._counter_state = _loaded(instance, DIPLOME_FIELDS)
+
+
+@receiver(pre_save, sender=Diplome)
+@receiver(pre_delete, sender=Diplome)
+def diplome_changing(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _fill_deferred(sender, instance, DIPLOME_FIELDS)
+
+
+@receiver(post_save, sender=Diplome)
+def diplome_saved(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        _saved(instance, created, DIPLOME_FIELDS, _diplome_keys)
+
+
+@receiver(post_delete, sender=Diplome)
+def diplome_deleted(sender, instance, **kwargs):
+    counters.apply_change(_diplome_keys(instance._counter_state), None)
+
+
+# Verifications have no receiver: their dashboard figures come from the daily
+# rollups plus the raw rows not rolled up yet (core/counters.py), so a public
+# verification never writes to a shared counter row.
+
+
+# ===================== USER (token claims) =====================
+
+TOKEN_CLAIM_FIELDS = ("is_superuser", "is_staff", "is_active")
+
+
+@receiver(pre_save, sender=User)
+def user_privileges_changing(sender, instance, update_fields=None, raw=False, **kwargs):
+    instance._revoke_tokens = False
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and not set(update_fields) & set(TOKEN_CLAIM_FIELDS):
+        return  # e.g. last_login on every login: no extra query
+    old = User.objects.filter(pk=instance.pk).values(*TOKEN_CLAIM_FIELDS).first()
+    instance._revoke_tokens = old is not None and any(
+        old[f] != getattr(instance, f) for f in TOKEN_CLAIM_FIELDS
+    )
+
+
+@receiver(post_save, sender=User)
+def user_privileges_changed(sender, instance, created, raw=False, **kwargs):
+    # Tokens carry is_superuser / is_staff: issued before the change, they must go
+    if getattr(instance, "_revoke_tokens", False):
+        authentication.bump_token_version(instance)
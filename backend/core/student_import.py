@@ -0,0 +1,554 @@
+"""
+Student import (EtudiantViewSet.import_excel).
+
+Two passes over the streamed rows (openpyxl read-only mode):
+
+Rows come from .xlsx, .csv or gzip-compressed .csv files (iter_rows()),
+always streamed. CSV files are read as UTF-8, or cp1252 when their first
+bytes are not valid UTF-8 (csv_encoding(), detected once per file).
+
+1. validate_rows(): nothing is written. Rows are checked column-wise with
+   pandas, by chunks: required values, matricule / NNI formats, birth
+   dates, duplicates inside the file. Then one `IN` query per unique key
+   finds the rows already in the database. Any format error rejects the
+   whole file with the complete per-row report.
+2. import_students(): the valid rows are inserted chunk by chunk with
+   bulk_create; rows already in the database are reported as skipped,
+   or in upsert mode updated with bulk_update when their fingerprint
+   (Etudiant.empreinte) differs.
+
+bulk_create / bulk_update skip save()
+and the signals, so the search column and the dashboard counters are
+filled here, for the rows really inserted only.
+
+Large files go through ImportJob + run_import_job() in the background
+(core/background.py) and report their progress on the job row.
+"""
+import io
+import os
+import csv
+import gzip
+import codecs
+from collections import defaultdict
+from datetime import date, datetime
+
+import pandas as pd
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from openpyxl import load_workbook
+
+from .models import Etudiant, ImportJob, student_fingerprint
+from .text import search_value
+from . import counters
+
+
+COLUMNS = [
+    "nom_prenom_fr", "nom_prenom_ar", "matricule", "nni",
+    "date_naissance", "lieu_naissance_fr", "lieu_naissance_ar",
+    "mention_fr", "mention_ar",
+]
+
+CHUNK_SIZE = 1000
+VALIDATION_CHUNK_SIZE = 20000
+
+MAX_MATRICULE = 2147483647  # IntegerField
+
+
+class ImportFormatError(Exception):
+    pass
+
+
+def _check_header(names):
+    missing = [c for c in COLUMNS if c not in names]
+    if missing:
+        raise ImportFormatError(f"Colonnes manquantes : {', '.join(missing)}")
+
+
+def iter_rows(file, name, encoding=None):
+    """Rows of an .xlsx, .csv or .csv.gz file, by file name (encoding: see csv_encoding())."""
+    name = name.lower()
+    if name.endswith(".xlsx"):
+        return iter_xlsx_rows(file)
+    if name.endswith((".csv", ".csv.gz", ".gz")):
+        return iter_csv_rows(file, encoding)
+    raise ImportFormatError("Format non supporté (xlsx, csv ou csv.gz)")
+
+
+# Bytes looked at by csv_encoding()
+ENCODING_PREFIX = 64 * 1024
+
+
+def _csv_stream(file):
+    """The (decompressed) bytes of a CSV upload, from the start."""
+    raw = getattr(file, "file", file)
+    raw.seek(0)
+    if raw.read(2) == b"\x1f\x8b":
+        raw.seek(0)
+        return gzip.GzipFile(fileobj=raw, mode="rb")
+    raw.seek(0)
+    return raw
+
+
+def csv_encoding(file):
+    """
+    UTF-8 (with or without BOM), else cp1252 — what Excel writes for "CSV" on
+    Windows. Decided on the first ENCODING_PREFIX bytes only: call it once
+    and pass the result to every iter_rows() of the file. A file switching
+    encoding further down fails there with a row-numbered error.
+    """
+    raw = _csv_stream(file)
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(raw.read(ENCODING_PREFIX), final=False)
+        return "utf-8-sig"
+    except UnicodeDecodeError:
+        return "cp1252"
+    finally:
+        getattr(file, "file", file).seek(0)
+
+
+def iter_csv_rows(file, encoding=None):
+    """Yield (row_number, {column: value}) from a CSV file (optionally gzipped), streamed."""
+    if encoding is None:
+        encoding = csv_encoding(file)
+    raw = _csv_stream(file)
+
+    text = io.TextIOWrapper(raw, encoding=encoding, newline="")
+    number = 1
+    try:
+        header_line = text.readline()
+        delimiter = ";" if header_line.count(";") > header_line.count(",") else ","
+        names = [h.strip() for h in next(csv.reader([header_line], delimiter=delimiter), [])]
+        _check_header(names)
+
+        for number, values in enumerate(csv.reader(text, delimiter=delimiter), start=2):
+            if not any(v.strip() for v in values):
+                continue
+            yield number, {k: (v if v.strip() else None) for k, v in zip(names, values)}
+    except UnicodeDecodeError:
+        raise ImportFormatError(f"Encodage non supporté après la ligne {number} (enregistrez le CSV en UTF-8)")
+    finally:
+        # Leave the underlying file open (read twice: validation, then import)
+        text.detach()
+
+
+def iter_xlsx_rows(file):
+    """Yield (row_number, {column: value}) from the first sheet, streamed."""
+    if hasattr(file, "seek"):
+        file.seek(0)
+    wb = load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = wb.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [str(h).strip() if h is not None else "" for h in header]
+        _check_header(names)
+
+        for number, values in enumerate(rows, start=2):
+            if values is None or all(v is None or v == "" for v in values):
+                continue
+            yield number, dict(zip(names, values))
+    finally:
+        wb.close()
+
+
+# ===================== VALIDATION =====================
+
+class Validation:
+    """Result of the validation pass."""
+
+    def __init__(self):
+        self.rows = 0
+        self.errors = defaultdict(list)      # row number -> messages
+        self.matricules = {}                 # row number -> matricule as read
+        self.existing = set()                # row numbers already in the DB
+
+    def report(self):
+        return [
+            {"row": number, "matricule": self.matricules.get(number), "errors": messages}
+            for number, messages in sorted(self.errors.items())
+        ]
+
+
+def _text(series):
+    """Column as stripped strings; numbers read as floats lose their '.0'."""
+    text = series.astype("string").str.strip()
+    return text.str.replace(r"\.0$", "", regex=True)
+
+
+def _check_chunk(numbers, records, result, seen_matricules, seen_nnis):
+    """Vectorized checks of one chunk. Returns {matricule: row}, {nni: row} of well-formed keys."""
+    df = pd.DataFrame.from_records(records, index=numbers, columns=COLUMNS)
+
+    def fail(mask, message):
+        for number in df.index[mask.fillna(False).to_numpy(dtype=bool)]:
+            result.errors[number].append(message)
+
+    text = {col: _text(df[col]) for col in COLUMNS}
+    present = {col: text[col].notna() & text[col].ne("") for col in COLUMNS}
+    for col in COLUMNS:
+        fail(~present[col], f"{col} manquant")
+
+    matricule = pd.to_numeric(
+        text["matricule"].where(text["matricule"].str.fullmatch(r"\d{1,10}").fillna(False)),
+        errors="coerce",
+    )
+    mat_ok = matricule.le(MAX_MATRICULE).fillna(False).astype(bool)
+    fail(present["matricule"] & ~mat_ok, "matricule invalide")
+
+    nni = text["nni"]
+    nni_ok = nni.str.fullmatch(r"\d{1,20}").fillna(False).astype(bool)
+    fail(present["nni"] & ~nni_ok, "nni invalide")
+
+    dates = pd.to_datetime(df["date_naissance"], errors="coerce", format="ISO8601")
+    date_ok = dates.ge(pd.Timestamp("1900-01-01")) & dates.le(pd.Timestamp.today())
+    fail(present["date_naissance"] & ~date_ok, "date_naissance invalide (AAAA-MM-JJ)")
+
+    # Duplicates inside the file, also across chunks
+    fail(mat_ok & (matricule.duplicated(keep="first") | matricule.isin(seen_matricules)),
+         "matricule en double dans le fichier")
+    fail(nni_ok & (nni.duplicated(keep="first") | nni.isin(seen_nnis)),
+         "nni en double dans le fichier")
+
+    mats = dict(zip(matricule[mat_ok].astype("int64").tolist(), df.index[mat_ok.to_numpy()]))
+    nnis = dict(zip(nni[nni_ok].tolist(), df.index[nni_ok.to_numpy()]))
+    seen_matricules.update(mats)
+    seen_nnis.update(nnis)
+
+    result.rows += len(df)
+    result.matricules.update(text["matricule"].astype(object).where(present["matricule"], None).to_dict())
+    return mats, nnis
+
+
+def validate_rows(rows, email_domain, chunk_size=VALIDATION_CHUNK_SIZE, on_progress=None, check_db=True):
+    """
+    Check every row without writing. rows: iterable of (number, {column: value}).
+    on_progress(rows_checked) is called after each chunk. check_db=False
+    skips the lookup of rows already in the database (upsert).
+    """
+    result = Validation()
+    seen_matricules, seen_nnis = set(), set()
+    by_matricule, by_nni = {}, {}
+
+    def check(numbers, records):
+        mats, nnis = _check_chunk(numbers, records, result, seen_matricules, seen_nnis)
+        if on_progress:
+            on_progress(result.rows)
+        # First occurrence wins, later ones are already reported as duplicates
+        for k, v in mats.items():
+            by_matricule.setdefault(k, v)
+        for k, v in nnis.items():
+            by_nni.setdefault(k, v)
+
+    numbers, records = [], []
+    for number, row in rows:
+        numbers.append(number)
+        records.append(row)
+        if len(records) >= chunk_size:
+            check(numbers, records)
+            numbers, records = [], []
+    if records:
+        check(numbers, records)
+
+    if not check_db:
+        return result
+
+    # Already in the database: one IN query per key
+    by_email = {f"{m}{email_domain}": n for m, n in by_matricule.items()}
+    existing = (
+        [by_matricule[m] for m in Etudiant.objects.filter(matricule__in=list(by_matricule)).values_list("matricule", flat=True)]
+        + [by_nni[n] for n in Etudiant.objects.filter(nni__in=list(by_nni)).values_list("nni", flat=True)]
+        + [by_email[e] for e in Etudiant.objects.filter(email__in=list(by_email)).values_list("email", flat=True)]
+    )
+    result.existing.update(existing)
+    return result
+
+
+# ===================== INSERTION =====================
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    value = str(value).strip()
+    return parse_date(value) or datetime.fromisoformat(value).date()
+
+
+def _as_int(value):
+    if isinstance(value, float):
+        return int(value)
+    return int(str(value).strip())
+
+
+def _as_str(value):
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+
+def build_etudiant(row, filiere, annee, email_domain):
+    matricule = _as_int(row["matricule"])
+    etudiant = Etudiant(
+        nom_prenom_fr=_as_str(row["nom_prenom_fr"]),
+        nom_prenom_ar=_as_str(row["nom_prenom_ar"]),
+        matricule=matricule,
+        email=f"{matricule}{email_domain}",
+        nni=_as_str(row["nni"]),
+        date_naissance=_as_date(row["date_naissance"]),
+        lieu_naissance_fr=_as_str(row["lieu_naissance_fr"]),
+        lieu_naissance_ar=_as_str(row["lieu_naissance_ar"]),
+        mention_fr=_as_str(row["mention_fr"]),
+        mention_ar=_as_str(row["mention_ar"]),
+        filiere=filiere,
+        annee_universitaire=annee,
+    )
+    etudiant.nom_recherche = search_value(etudiant.nom_prenom_fr, etudiant.nom_prenom_ar)
+    return etudiant
+
+
+class StudentImport:
+    """
+    Accumulates rows, flushes them by chunks, builds the report.
+
+    mode="insert": students already in the database are skipped.
+    mode="upsert": they are matched on `key` (matricule or nni) and updated
+    with bulk_update when their fingerprint differs; identical rows are
+    left untouched.
+    """
+
+    UPDATE_FIELDS = [
+        "nom_prenom_fr", "nom_prenom_ar", "matricule", "nni", "email", "date_naissance",
+        "lieu_naissance_fr", "lieu_naissance_ar", "mention_fr", "mention_ar",
+        "filiere", "annee_universitaire", "nom_recherche", "empreinte",
+    ]
+    UNIQUE_KEYS = ("matricule", "nni", "email")
+
+    def __init__(self, filiere, annee, email_domain, existing=(), chunk_size=CHUNK_SIZE,
+                 on_progress=None, mode="insert", key="matricule"):
+        self.filiere = filiere
+        self.annee = annee
+        self.email_domain = email_domain
+        self.existing = existing
+        self.chunk_size = chunk_size
+        self.on_progress = on_progress
+        self.mode = mode
+        self.key = key
+
+        self.processed = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.skipped = []
+        self.seen_matricules = set()
+        self.seen_nnis = set()
+        self.pending = []
+
+    def skip(self, number, matricule, reason):
+        self.skipped.append({"row": number, "matricule": matricule, "reason": reason})
+
+    def add(self, number, row):
+        self.processed += 1
+        # Found in the database by validate_rows()
+        if number in self.existing:
+            self.skip(number, row.get("matricule"), "Déjà existant")
+            return
+        try:
+            etudiant = build_etudiant(row, self.filiere, self.annee, self.email_domain)
+        except (KeyError, TypeError, ValueError):
+            self.skip(number, row.get("matricule"), "Ligne invalide")
+            return
+        if etudiant.date_naissance is None:
+            self.skip(number, etudiant.matricule, "Ligne invalide")
+            return
+
+        # Duplicates inside the file
+        if etudiant.matricule in self.seen_matricules or etudiant.nni in self.seen_nnis:
+            self.skip(number, etudiant.matricule, "Déjà existant")
+            return
+        self.seen_matricules.add(etudiant.matricule)
+        self.seen_nnis.add(etudiant.nni)
+
+        etudiant.empreinte = student_fingerprint(etudiant)
+        self.pending.append((number, etudiant))
+        if len(self.pending) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        chunk, self.pending = self.pending, []
+
+        with transaction.atomic():
+            if self.mode == "upsert":
+                chunk = self.update_existing(chunk)
+            self.insert(chunk)
+
+        if self.on_progress:
+            self.on_progress(self.processed)
+
+    def insert(self, fresh):
+        if not fresh:
+            return
+        # Rows taken since validate_rows() (e.g. by a concurrent import) are
+        # skipped, not counted: one query before the insert finds them.
+        etudiants = [e for _, e in fresh]
+        taken = defaultdict(set)
+        for row in Etudiant.objects.filter(
+            Q(matricule__in=[e.matricule for e in etudiants])
+            | Q(nni__in=[e.nni for e in etudiants])
+            | Q(email__in=[e.email for e in etudiants])
+        ).values(*self.UNIQUE_KEYS):
+            for k in self.UNIQUE_KEYS:
+                taken[k].add(row[k])
+
+        rows = []
+        for number, e in fresh:
+            if any(getattr(e, k) in taken[k] for k in self.UNIQUE_KEYS):
+                self.skip(number, e.matricule, "Déjà existant")
+            else:
+                rows.append(e)
+        Etudiant.objects.bulk_create(rows, ignore_conflicts=True)
+        counters.students_created(rows)
+        self.created += len(rows)
+
+    def update_rows(self, changed):
+        """bulk_update `changed` [(number, e)], return the rows really updated."""
+        try:
+            with transaction.atomic():
+                Etudiant.objects.bulk_update([e for _, e in changed], self.UPDATE_FIELDS, batch_size=self.chunk_size)
+            return changed
+        except IntegrityError:
+            pass
+        # One row at a time to find the culprits (e.g. two rows swapping their
+        # NNI: each UPDATE checks the unique index immediately)
+        updated = []
+        for number, e in changed:
+            try:
+                with transaction.atomic():
+                    Etudiant.objects.bulk_update([e], self.UPDATE_FIELDS)
+            except IntegrityError:
+                self.skip(number, e.matricule, "Matricule, NNI ou email déjà utilisé par un autre étudiant")
+            else:
+                updated.append((number, e))
+        return updated
+
+    def update_existing(self, chunk):
+        """Update the students of `chunk` already in the database, return the new ones."""
+        key = self.key
+        current = {
+            k: (pk, fp)
+            for k, pk, fp in Etudiant.objects
+            .filter(**{f"{key}__in": [getattr(e, key) for _, e in chunk]})
+            .values_list(key, "id", "empreinte")
+        }
+
+        # The other unique columns must not belong to another student
+        taken = {}
+        for other in self.UNIQUE_KEYS:
+            if other == key:
+                continue
+            taken[other] = dict(
+                Etudiant.objects
+                .filter(**{f"{other}__in": [getattr(e, other) for _, e in chunk]})
+                .values_list(other, "id")
+            )
+
+        fresh, changed = [], []
+        for number, e in chunk:
+            pk, fp = current.get(getattr(e, key), (None, None))
+            conflict = next((o for o, ids in taken.items() if ids.get(getattr(e, o), pk) != pk), None)
+            if conflict:
+                self.skip(number, e.matricule, f"{conflict} déjà utilisé par un autre étudiant")
+            elif pk is None:
+                fresh.append((number, e))
+            elif fp == e.empreinte:
+                self.unchanged += 1
+            else:
+                e.pk = pk
+                changed.append((number, e))
+
+        if changed:
+            # Old values for the dashboard counters
+            before = {
+                o.pk: counters.student_keys(o.filiere_id, o.annee_universitaire_id, o.date_naissance)
+                for o in Etudiant.objects
+                .filter(pk__in=[e.pk for _, e in changed])
+                .only("id", "filiere_id", "annee_universitaire_id", "date_naissance")
+            }
+            changed = self.update_rows(changed)
+            for _, e in changed:
+                counters.apply_change(
+                    before.get(e.pk),
+                    counters.student_keys(e.filiere_id, e.annee_universitaire_id, e.date_naissance),
+                )
+            self.updated += len(changed)
+
+        return fresh
+
+    def report(self):
+        self.skipped.sort(key=lambda s: s["row"])
+        report = {"created": self.created, "skipped_count": len(self.skipped), "skipped": self.skipped}
+        if self.mode == "upsert":
+            report["updated"] = self.updated
+            report["unchanged"] = self.unchanged
+        return report
+
+
+def import_students(rows, filiere, annee, email_domain, existing=(), chunk_size=CHUNK_SIZE,
+                    on_progress=None, mode="insert", key="matricule"):
+    """
+    rows: iterable of (row_number, {column: value}), already validated;
+    existing: row numbers validate_rows() found in the database (insert mode).
+    Returns the report.
+    """
+    job = StudentImport(filiere, annee, email_domain, existing, chunk_size, on_progress, mode, key)
+    for number, row in rows:
+        job.add(number, row)
+    job.flush()
+    return job.report()
+
+
+# ===================== BACKGROUND JOBS =====================
+
+def run_import_job(job_id):
+    """Validate then import the file of an ImportJob, updating its progress."""
+    job = ImportJob.objects.select_related("filiere", "annee_universitaire").get(pk=job_id)
+    jobs = ImportJob.objects.filter(pk=job_id)
+
+    def progress(n):
+        jobs.update(processed_rows=n)
+
+    jobs.update(status="validating", started_at=timezone.now(), processed_rows=0, error="")
+    try:
+        with open(job.fichier, "rb") as f:
+            upsert = job.mode == "upsert"
+            encoding = csv_encoding(f)
+            validation = validate_rows(
+                iter_rows(f, job.nom_fichier, encoding), job.email_domain, on_progress=progress, check_db=not upsert
+            )
+            if validation.errors:
+                jobs.update(
+                    status="invalid",
+                    total_rows=validation.rows,
+                    report={"error_count": len(validation.errors), "errors": validation.report()},
+                    finished_at=timezone.now(),
+                )
+                return
+
+            jobs.update(status="running", total_rows=validation.rows, processed_rows=0)
+            report = import_students(
+                iter_rows(f, job.nom_fichier, encoding), job.filiere, job.annee_universitaire, job.email_domain,
+                existing=validation.existing, on_progress=progress, mode=job.mode, key=job.cle,
+            )
+        jobs.update(status="done", report=report, processed_rows=validation.rows, finished_at=timezone.now())
+    except ImportFormatError as e:
+        jobs.update(status="invalid", error=str(e), finished_at=timezone.now())
+    except Exception as e:
+        jobs.update(status="failed", error=str(e), finished_at=timezone.now())
+        raise
+    finally:
+        if os.path.exists(job.fichier):
+            os.remove(job.fichier)
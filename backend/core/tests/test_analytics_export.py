@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from django.test import TestCase
+
+from core import analytics_export
+from core.models import Verification
+
+
+def parquet_files(directory):
+    return sorted(
+        os.path.join(root, name)
+        for root, _, names in os.walk(directory) for name in names
+        if not name.startswith("_")
+    )
+
+
+@unittest.skipUnless(analytics_export.HAS_PYARROW, "pyarrow n'est pas installé")
+class ExportTests(TestCase):
+
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base)
+        self.output = os.path.join(self.base, "dataset")
+        for _ in range(5):
+            Verification.objects.create(statut="succes", adresse_ip="10.0.0.1")
+
+    def exported_ids(self):
+        import pyarrow.parquet as pq
+        return sorted(i for path in parquet_files(self.output) for i in pq.read_table(path)["id"].to_pylist())
+
+    def test_full_reexport_starts_a_new_dataset(self):
+        analytics_export.export_verifications(self.output, batch_size=2)
+        *_, archived = analytics_export.export_verifications(self.output, since_id=0, batch_size=3)
+
+        ids = list(Verification.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(self.exported_ids(), ids)
+        self.assertTrue(parquet_files(archived))
+
+    def test_incremental_run_keeps_the_dataset(self):
+        analytics_export.export_verifications(self.output)
+        Verification.objects.create(statut="echec", adresse_ip="10.0.0.2")
+        total, _, _, archived = analytics_export.export_verifications(self.output)
+
+        self.assertEqual((total, archived), (1, None))
+        self.assertEqual(len(self.exported_ids()), 6)
+
+    def test_failed_write_leaves_no_temporary_file(self):
+        with mock.patch.object(analytics_export.pq, "write_table", side_effect=OSError("disque plein")):
+            with self.assertRaises(OSError):
+                analytics_export.export_verifications(self.output)
+        self.assertEqual(parquet_files(self.output), [])
@@ -0,0 +1,51 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from core import offline_bundle
+from core.models import AnneeUniversitaire, AnnulationEvent, Diplome, Etudiant, Filiere
+
+
+class AnnulationTests(APITestCase):
+
+    def setUp(self):
+        filiere = Filiere.objects.create(code_filiere="INF", nom_filiere_fr="Informatique", nom_filiere_ar="")
+        etudiant = Etudiant.objects.create(
+            nom_prenom_fr="Etudiant", nom_prenom_ar="طالب", matricule=1, nni="100",
+            email="1@etu.univ.mr", date_naissance=date(2000, 1, 1),
+            lieu_naissance_fr="Atar", lieu_naissance_ar="أطار", mention_fr="Bien", mention_ar="حسن",
+            filiere=filiere, annee_universitaire=AnneeUniversitaire.objects.create(code_annee="2024-2025"),
+        )
+        self.diplome = Diplome.objects.create(
+            etudiant=etudiant, numero_diplome=1, specialite=filiere, type_diplome="Licence",
+            annee_obtention=2025, fichier_pdf="/tmp/1.pdf", hash_signature="a" * 64,
+        )
+        self.client.force_authenticate(get_user_model().objects.create_user("admin", password="secret"))
+
+    def annuler(self):
+        return self.client.post(f"/api/diplomes-annulation/{self.diplome.id}/annuler/", {"raison_annulation": "Fraude"})
+
+    def test_annuler_twice_records_one_event(self):
+        self.assertEqual(self.annuler().status_code, 200)
+        self.assertEqual(self.annuler().status_code, 400)
+        self.assertEqual(AnnulationEvent.objects.count(), 1)
+
+        url = f"/api/diplomes-annulation/{self.diplome.id}/unannuler/"
+        self.assertEqual(self.client.post(url).status_code, 200)
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(list(AnnulationEvent.objects.values_list("action", flat=True)), ["annule", "reactive"])
+
+    def test_public_feed_publishes_digests_only(self):
+        self.annuler()
+        self.client.force_authenticate(None)
+
+        response = self.client.get("/api/diplomes-annulation/feed/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn(self.diplome.verification_uuid, response.content.decode())
+        self.assertNotIn("Fraude", response.content.decode())
+        event, = response.json()["events"]
+        self.assertEqual(event["uuid"], offline_bundle.digest(f"uuid:{self.diplome.verification_uuid}"))
+        self.assertEqual(event["hash"], offline_bundle.digest(f"hash:{self.diplome.hash_signature}"))
+        self.assertEqual(event["action"], "annule")
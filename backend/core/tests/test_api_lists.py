@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from rest_framework.exceptions import ValidationError
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from core.filters import StableOrderingFilter
+from core.models import Filiere, Verification
+from core.pagination import KeysetCursorPagination
+
+
+class ListTestCase(APITestCase):
+
+    def setUp(self):
+        user = get_user_model().objects.create_user("admin", password="secret")
+        self.client.force_authenticate(user)
+
+
+class CursorPaginationTests(ListTestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            Filiere.objects.create(code_filiere=f"F{i}", nom_filiere_fr=f"Filière {i}", nom_filiere_ar="")
+
+    def test_lists_are_paginated_by_default(self):
+        page = self.client.get("/api/filieres/").json()
+        self.assertEqual(len(page["results"]), 5)
+        self.assertIsNone(page["next"])
+
+    def test_pages_are_stable_under_inserts(self):
+        page = self.client.get("/api/filieres/", {"page_size": 2}).json()
+        self.assertEqual(len(page["results"]), 2)
+        seen = [f["id"] for f in page["results"]]
+
+        # A row inserted between two pages does not shift them
+        Filiere.objects.create(code_filiere="F5", nom_filiere_fr="Filière 5", nom_filiere_ar="")
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            seen += [f["id"] for f in page["results"]]
+
+        self.assertEqual(seen, sorted(set(seen)))
+        self.assertEqual(seen, list(Filiere.objects.order_by("id").values_list("id", flat=True)))
+
+    def test_equal_values_are_neither_skipped_nor_repeated(self):
+        Filiere.objects.update(nom_filiere_fr="Même nom")
+        ids = []
+        page = self.client.get("/api/filieres/", {"page_size": 2, "ordering": "-nom_filiere_fr"}).json()
+        ids += [f["id"] for f in page["results"]]
+        while page["next"]:
+            page = self.client.get(page["next"]).json()
+            ids += [f["id"] for f in page["results"]]
+        self.assertEqual(ids, list(Filiere.objects.order_by("-id").values_list("id", flat=True)))
+
+        # And back with `previous`
+        back = [f["id"] for f in page["results"]]
+        while page["previous"]:
+            page = self.client.get(page["previous"]).json()
+            back = [f["id"] for f in page["results"]] + back
+        self.assertEqual(back, ids)
+
+    def test_nullable_ordering_is_refused(self):
+        view = type("View", (), {
+            "filter_backends": [StableOrderingFilter], "ordering": ["diplome"], "ordering_fields": ["diplome"],
+        })()
+        request = Request(APIRequestFactory().get("/api/verifications/"))
+        with self.assertRaises(ValidationError):
+            KeysetCursorPagination().paginate_queryset(Verification.objects.all(), request, view)
+
+    def test_page_size_is_capped(self):
+        page = self.client.get("/api/filieres/", {"page_size": 10000}).json()
+        self.assertEqual(len(page["results"]), 5)
+
+
+class VerificationFilterTests(ListTestCase):
+
+    def setUp(self):
+        super().setUp()
+        Verification.objects.create(statut="succes", adresse_ip="41.188.12.7")
+        Verification.objects.create(statut="echec", adresse_ip="10.0.0.1")
+
+    def test_filter_by_ip(self):
+        response = self.client.get("/api/verifications/", {"adresse_ip": " 41.188.12.7 "})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([v["adresse_ip"] for v in response.json()["results"]], ["41.188.12.7"])
+
+    def test_malformed_ip_is_a_400(self):
+        for value in ("abc", "999.1.1.1", "41.188.12.7/24"):
+            response = self.client.get("/api/verifications/", {"adresse_ip": value})
+            self.assertEqual(response.status_code, 400, value)
@@ -0,0 +1,39 @@
+from django.contrib.auth.models import User
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from core.authentication import bump_token_version, tokens_for
+
+
+class ClaimsAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", password="secret")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens_for(self.user)['access']}")
+
+    def me(self):
+        return self.client.get("/api/users/me/")
+
+    def test_claims(self):
+        self.assertEqual(self.me().json(), {"id": self.user.id, "username": "admin", "is_superuser": True})
+
+    def test_demotion_revokes_tokens(self):
+        self.user.is_superuser = False
+        self.user.save()
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_deactivation_revokes_tokens(self):
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.me().status_code, 401)
+
+    def test_unrelated_save_keeps_tokens(self):
+        self.user.last_login = timezone.now()
+        self.user.save(update_fields=["last_login"])
+        self.user.first_name = "Ahmed"
+        self.user.save()
+        self.assertEqual(self.me().status_code, 200)
+
+    def test_password_change_revokes_tokens(self):
+        bump_token_version(self.user)
+        self.assertEqual(self.me().status_code, 401)
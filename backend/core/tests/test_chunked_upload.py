@@ -0,0 +1,132 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core import chunked_upload
+from core.chunked_upload import UploadError
+from core.models import ChunkedUpload
+
+
+DATA = b"0123456789abcdefghij"  # 20 bytes, 3 chunks of 8
+
+
+class ChunkedUploadTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        override = override_settings(CHUNKED_UPLOAD_DIR=directory, CHUNKED_UPLOAD_CHUNK_SIZE=8)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.user = get_user_model().objects.create_user("admin", password="secret")
+        self.upload = chunked_upload.initiate(self.user, "pv.png", len(DATA), hashlib.sha256(DATA).hexdigest())
+
+    def put(self, offset, data, length=None, checksum=None):
+        return chunked_upload.write_chunk(
+            self.upload.id, self.user, offset, io.BytesIO(data),
+            len(data) if length is None else length, checksum,
+        )
+
+    def assertRefused(self, status, offset, fn, *args, **kwargs):
+        with self.assertRaises(UploadError) as cm:
+            fn(*args, **kwargs)
+        self.assertEqual((cm.exception.status, cm.exception.offset), (status, offset))
+
+    def upload_all(self):
+        for offset in range(0, len(DATA), 8):
+            self.put(offset, DATA[offset:offset + 8])
+
+    def test_offset_protocol(self):
+        self.assertEqual(chunked_upload.describe(self.upload)["offset"], 0)
+        self.assertRefused(409, 0, self.put, 8, DATA[8:16])
+
+        self.assertEqual(self.put(0, DATA[:8]).recu, 8)
+        # Same chunk sent again (lost response): told where to resume
+        self.assertRefused(409, 8, self.put, 0, DATA[:8])
+
+        self.put(8, DATA[8:16])
+        self.assertRefused(400, 16, self.put, 16, DATA[16:] + b"123")  # past the announced size
+        self.assertRefused(413, None, self.put, 16, b"x" * 9)
+        self.put(16, DATA[16:])
+
+        upload = chunked_upload.complete(self.upload.id, self.user)
+        self.assertEqual(upload.status, "complete")
+        with open(upload.fichier, "rb") as f:
+            self.assertEqual(f.read(), DATA)
+        self.assertRefused(409, 20, self.put, 20, b"x")
+
+    def test_incomplete_or_corrupted_chunk_keeps_offset(self):
+        self.assertRefused(400, 0, self.put, 0, DATA[:5], length=8)
+        self.assertRefused(400, 0, self.put, 0, DATA[:8], checksum="0" * 64)
+
+        # Claim released: the retry goes through
+        self.put(0, DATA[:8], checksum=hashlib.sha256(DATA[:8]).hexdigest())
+        self.upload.refresh_from_db()
+        self.assertEqual((self.upload.recu, self.upload.claim), (8, None))
+
+    def test_chunk_being_written_is_not_written_twice(self):
+        ChunkedUpload.objects.filter(pk=self.upload.pk).update(claim=self.upload.id, claimed_at=timezone.now())
+        self.assertRefused(409, 0, self.put, 0, DATA[:8])
+
+    @override_settings(CHUNKED_UPLOAD_CLAIM_TIMEOUT=60)
+    def test_stale_claim_expires(self):
+        ChunkedUpload.objects.filter(pk=self.upload.pk).update(
+            claim=self.upload.id, claimed_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertEqual(self.put(0, DATA[:8]).recu, 8)
+
+    def test_complete_checks_size_and_checksum(self):
+        self.put(0, DATA[:8])
+        self.assertRefused(409, 8, chunked_upload.complete, self.upload.id, self.user)
+
+        self.put(8, DATA[8:16])
+        self.put(16, b"corrupted!!!"[:4])
+        self.assertRefused(422, 0, chunked_upload.complete, self.upload.id, self.user)
+        self.upload.refresh_from_db()
+        self.assertEqual(self.upload.recu, 0)
+
+        self.upload_all()
+        self.assertEqual(chunked_upload.complete(self.upload.id, self.user).status, "complete")
+
+    def test_file_is_hashed_outside_the_lock(self):
+        self.upload_all()
+        seen = []
+
+        def sha256(path):
+            # Committed state while hashing: marked, claimed, not locked by a transaction
+            upload = ChunkedUpload.objects.get(pk=self.upload.pk)
+            seen.append((upload.status, upload.claim is not None))
+            self.assertRefused(409, 20, chunked_upload.complete, self.upload.id, self.user)
+            self.assertRefused(409, 20, self.put, 20, b"x")
+            return hashlib.sha256(DATA).hexdigest()
+
+        with mock.patch.object(chunked_upload, "_sha256", side_effect=sha256):
+            self.assertEqual(chunked_upload.complete(self.upload.id, self.user).status, "complete")
+        self.assertEqual(seen, [("completing", True)])
+
+    @override_settings(CHUNKED_UPLOAD_CLAIM_TIMEOUT=60)
+    def test_interrupted_completion_can_be_retried(self):
+        self.upload_all()
+        ChunkedUpload.objects.filter(pk=self.upload.pk).update(
+            status="completing", claim=self.upload.id, claimed_at=timezone.now() - timedelta(minutes=5),
+        )
+        self.assertEqual(chunked_upload.complete(self.upload.id, self.user).status, "complete")
+
+    def test_upload_belongs_to_its_creator(self):
+        other = get_user_model().objects.create_user("other", password="secret")
+        self.assertRefused(404, None, chunked_upload.get_upload, self.upload.id, other)
+        self.assertRefused(404, None, chunked_upload.get_upload, "not-a-uuid", self.user)
+
+    def test_purge(self):
+        self.assertEqual(chunked_upload.purge(hours=1), 0)
+        ChunkedUpload.objects.filter(pk=self.upload.pk).update(updated_at=timezone.now() - timedelta(hours=2))
+        self.assertEqual(chunked_upload.purge(hours=1), 1)
+        self.assertFalse(ChunkedUpload.objects.exists())
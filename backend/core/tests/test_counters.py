@@ -0,0 +1,75 @@
+from datetime import date, timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from core import counters, rollups
+from core.models import AnneeUniversitaire, DashboardCounter, Diplome, Etudiant, Filiere, Verification
+
+
+class VerificationCounterTests(TestCase):
+
+    def setUp(self):
+        self.verify(3, "succes")
+        self.verify(3, "succes")
+        self.verify(2, "echec")
+        self.verify(0, "succes")
+
+    def verify(self, days_ago, statut):
+        v = Verification.objects.create(statut=statut, adresse_ip="10.0.0.1")
+        Verification.objects.filter(pk=v.pk).update(date_verification=timezone.now() - timedelta(days=days_ago))
+
+    def statuts(self, rows):
+        return {row["statut"]: row["count"] for row in rows}
+
+    def test_dashboard_counts_each_verification_once(self):
+        rollups.rollup_pending_days()
+        counters.refresh_verification_counters()
+
+        stats = counters.dashboard_stats()
+        self.assertEqual(self.statuts(stats["status_counts"]), {"succes": 3, "echec": 1})
+        self.assertEqual(sum(r["total"] for r in stats["verifications_by_day"]), 4)
+
+    def test_verification_does_not_write_counters(self):
+        before = list(DashboardCounter.objects.values_list("name", "key", "value"))
+        self.verify(0, "succes")
+        self.assertEqual(list(DashboardCounter.objects.values_list("name", "key", "value")), before)
+
+
+class DiplomeCounterTests(TestCase):
+
+    def setUp(self):
+        self.filiere = Filiere.objects.create(code_filiere="INF", nom_filiere_fr="Informatique", nom_filiere_ar="")
+        etudiant = Etudiant.objects.create(
+            nom_prenom_fr="Etudiant", nom_prenom_ar="طالب", matricule=1, nni="100",
+            email="1@etu.univ.mr", date_naissance=date(2000, 1, 1),
+            lieu_naissance_fr="Atar", lieu_naissance_ar="أطار", mention_fr="Bien", mention_ar="حسن",
+            filiere=self.filiere, annee_universitaire=AnneeUniversitaire.objects.create(code_annee="2024-2025"),
+        )
+        self.diplome = Diplome.objects.create(
+            etudiant=etudiant, numero_diplome=1, specialite=self.filiere, type_diplome="Licence",
+            annee_obtention=2025, fichier_pdf="/tmp/1.pdf", hash_signature="a" * 64,
+        )
+
+    def counter(self, name, key):
+        row = DashboardCounter.objects.filter(name=name, key=str(key)).first()
+        return row.value if row else 0
+
+    def test_save_of_deferred_instance_keeps_counters_exact(self):
+        diplome = Diplome.objects.only("id", "est_annule").get(pk=self.diplome.pk)
+        diplome.est_annule = True
+        diplome.save()
+        self.assertEqual(self.counter(counters.DIPLOMES_BY_YEAR, 2025), 1)
+        self.assertEqual(self.counter(counters.DIPLOMES_BY_FILIERE, self.filiere.pk), 1)
+        self.assertEqual(self.counter(counters.DIPLOMES_ANNULES, ""), 1)
+
+        diplome = Diplome.objects.defer("annee_obtention").get(pk=self.diplome.pk)
+        diplome.annee_obtention = 2024
+        diplome.save()
+        self.assertEqual(self.counter(counters.DIPLOMES_BY_YEAR, 2025), 0)
+        self.assertEqual(self.counter(counters.DIPLOMES_BY_YEAR, 2024), 1)
+
+    def test_delete_of_deferred_instance(self):
+        Diplome.objects.only("id").get(pk=self.diplome.pk).delete()
+        self.assertEqual(self.counter(counters.DIPLOMES_BY_YEAR, 2025), 0)
+        self.assertEqual(self.counter(counters.DIPLOMES_BY_FILIERE, self.filiere.pk), 0)
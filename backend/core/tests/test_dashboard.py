@@ -0,0 +1,35 @@
+from datetime import date
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+
+from core import counters
+from core.models import AnneeUniversitaire, Etudiant, Filiere
+
+
+class DashboardTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("admin", password="secret"))
+        self.filiere = Filiere.objects.create(code_filiere="INF", nom_filiere_fr="Informatique", nom_filiere_ar="")
+        self.annee = AnneeUniversitaire.objects.create(code_annee="2024-2025")
+        today = date.today()
+        for matricule, years in ((1, 20), (2, 20), (3, 23)):
+            Etudiant.objects.create(
+                nom_prenom_fr="Etudiant", nom_prenom_ar="طالب", matricule=matricule, nni=str(matricule),
+                email=f"{matricule}@etu.univ.mr", date_naissance=date(today.year - years, 1, 1),
+                lieu_naissance_fr="Atar", lieu_naissance_ar="أطار", mention_fr="Bien", mention_ar="حسن",
+                filiere=self.filiere, annee_universitaire=self.annee,
+            )
+
+    def stats(self, **params):
+        return self.client.get("/api/dashboard-stats/", params)
+
+    def test_average_age(self):
+        self.assertEqual(self.stats(filiere=self.filiere.id).json()["avg_age"], 21)
+        _, avg = counters.age_stats()
+        self.assertEqual(avg, 21)
+
+    def test_unknown_annee_is_a_400(self):
+        self.assertEqual(self.stats(annee_universitaire=self.annee.id).status_code, 200)
+        self.assertEqual(self.stats(annee_universitaire=self.annee.id + 100).status_code, 400)
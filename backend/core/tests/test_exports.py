@@ -0,0 +1,29 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from rest_framework.test import APITestCase
+
+from core.models import AnneeUniversitaire, Verification
+
+
+class ExportTests(APITestCase):
+
+    def setUp(self):
+        self.client.force_authenticate(get_user_model().objects.create_user("admin", password="secret"))
+        for _ in range(3):
+            Verification.objects.create(statut="succes", adresse_ip="10.0.0.1")
+
+    @override_settings(EXPORT_XLSX_MAX_ROWS=2)
+    def test_large_xlsx_export_is_refused(self):
+        response = self.client.get("/api/exports/verifications/", {"file_type": "xlsx"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("csv", response.json()["error"])
+
+        response = self.client.get("/api/exports/verifications/", {"file_type": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 4)
+
+    def test_malformed_code_annee_matches_nothing(self):
+        annee = AnneeUniversitaire.objects.create(code_annee="2024")
+        response = self.client.get("/api/exports/diplomes/", {"annee_universitaire": annee.id})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 1)
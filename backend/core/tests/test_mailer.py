@@ -0,0 +1,237 @@
+import smtplib
+import socket
+import threading
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from aiosmtpd.controller import Controller
+from django.core import mail
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from core import mailer
+from core.models import OutboundEmail
+
+
+class FailingBackend(BaseEmailBackend):
+    """SMTP stand-in that refuses every message."""
+
+    def send_messages(self, messages):
+        raise smtplib.SMTPRecipientsRefused({"x@example.com": (550, b"refused")})
+
+
+class UnreachableBackend(BaseEmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError("connection refused")
+
+    def send_messages(self, messages):
+        raise AssertionError("must not be called")
+
+
+def outbound(**kwargs):
+    return OutboundEmail.objects.create(**{
+        "sujet": "Sujet", "corps": "Corps", "destinataires": ["x@example.com"], **kwargs,
+    })
+
+
+@override_settings(
+    EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    OUTBOX_MAX_ATTEMPTS=3,
+    OUTBOX_RETRY_DELAY=10,
+)
+class SendPendingTests(TestCase):
+
+    def setUp(self):
+        # Slightly ahead of the real clock: rows created with the default are due
+        self.now = timezone.now() + timedelta(minutes=1)
+        patcher = mock.patch("core.mailer.timezone.now", side_effect=lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_queue_mail_is_sent_on_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            email = mailer.queue_mail("Sujet", "Corps", "from@example.com", ["x@example.com"])
+        self.assertEqual(len(callbacks), 1)  # background send, not inline SMTP
+
+        self.assertEqual(mailer.send_pending(), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "sent")
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["x@example.com"])
+
+    def test_not_due_is_not_sent(self):
+        outbound(next_attempt_at=self.now + timedelta(seconds=5))
+        self.assertEqual(mailer.send_pending(), (0, 0))
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(EMAIL_BACKEND="core.tests.test_mailer.FailingBackend")
+    def test_retry_backoff_then_failed(self):
+        email = outbound(next_attempt_at=self.now)
+
+        for attempt, delay in [(1, 10), (2, 20)]:
+            self.assertEqual(mailer.send_pending(), (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.status, "pending")
+            self.assertEqual(email.attempts, attempt)
+            self.assertEqual(email.next_attempt_at, self.now + timedelta(seconds=delay))
+            self.assertIn("refused", email.last_error)
+
+            # Not retried before the delay
+            self.assertEqual(mailer.send_pending(), (0, 0))
+            self.now += timedelta(seconds=delay)
+
+        self.assertEqual(mailer.send_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual(email.status, "failed")
+        self.assertEqual(email.attempts, 3)
+
+        # Final state: never claimed again
+        self.now += timedelta(days=1)
+        self.assertEqual(mailer.send_pending(), (0, 0))
+
+    @override_settings(EMAIL_BACKEND="core.tests.test_mailer.UnreachableBackend")
+    def test_unreachable_server_retries_whole_batch(self):
+        emails = [outbound(), outbound()]
+        self.assertEqual(mailer.send_pending(), (0, 2))
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual((email.status, email.attempts), ("pending", 1))
+
+    def test_requeue_stale(self):
+        stale = outbound(status="sending", claimed_at=self.now - timedelta(minutes=30))
+        recent = outbound(status="sending", claimed_at=self.now)
+        self.assertEqual(mailer.requeue_stale(minutes=15), 1)
+        stale.refresh_from_db()
+        recent.refresh_from_db()
+        self.assertEqual(stale.status, "pending")
+        self.assertEqual(recent.status, "sending")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class RecordingHandler:
+    """aiosmtpd handler: keeps the accepted messages, refuses rejected@ recipients."""
+
+    def __init__(self):
+        self.messages = []
+        self.sessions = set()
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address.startswith("rejected@"):
+            return "550 5.1.1 Unknown user"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        self.sessions.add(id(session))
+        return "250 Message accepted"
+
+
+class SmtpServerTests(TestCase):
+    """Real SMTP dialogue with an in-process server (the local stand-in)."""
+
+    def setUp(self):
+        self.handler = RecordingHandler()
+        port = free_port()
+        self.server = Controller(self.handler, hostname="127.0.0.1", port=port)
+        self.server.start()
+        self.addCleanup(self.server.stop)
+
+        override = override_settings(
+            EMAIL_BACKEND="django.core.mail.backends.smtp.EmailBackend",
+            EMAIL_HOST="127.0.0.1", EMAIL_PORT=port, EMAIL_USE_TLS=False, EMAIL_USE_SSL=False,
+            EMAIL_HOST_USER="", EMAIL_HOST_PASSWORD="", EMAIL_TIMEOUT=5,
+            DEFAULT_FROM_EMAIL="noreply@example.com",
+            OUTBOX_MAX_ATTEMPTS=3, OUTBOX_RETRY_DELAY=10,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def test_batch_sent_over_one_connection(self):
+        emails = [outbound(), outbound(destinataires=["y@example.com"])]
+
+        self.assertEqual(mailer.send_pending(), (2, 0))
+
+        self.assertEqual(len(self.handler.messages), 2)
+        self.assertEqual(len(self.handler.sessions), 1)
+        self.assertEqual(self.handler.messages[1].rcpt_tos, ["y@example.com"])
+        self.assertIn(b"Subject: Sujet", self.handler.messages[0].content)
+        for email in emails:
+            email.refresh_from_db()
+            self.assertEqual(email.status, "sent")
+
+    def test_refused_recipient_is_retried_later(self):
+        refused = outbound(destinataires=["rejected@example.com"])
+        accepted = outbound()
+
+        self.assertEqual(mailer.send_pending(), (1, 1))
+
+        refused.refresh_from_db()
+        accepted.refresh_from_db()
+        self.assertEqual((refused.status, refused.attempts), ("pending", 1))
+        self.assertIn("Unknown user", refused.last_error)
+        self.assertGreater(refused.next_attempt_at, timezone.now())
+        self.assertEqual(accepted.status, "sent")
+        self.assertEqual(len(self.handler.messages), 1)
+
+    def test_server_down(self):
+        email = outbound()
+
+        with override_settings(EMAIL_PORT=free_port()):  # nothing listening
+            self.assertEqual(mailer.send_pending(), (0, 1))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), ("pending", 1))
+
+
+@skipUnless(connection.vendor == "postgresql", "SKIP LOCKED needs PostgreSQL")
+class ClaimConcurrencyTests(TransactionTestCase):
+
+    def claim_in_thread(self, limit, results, start=None):
+        try:
+            if start is not None:
+                start.wait()
+            results.append({e.id for e in mailer._claim(limit)})
+        finally:
+            connection.close()
+
+    def test_locked_row_is_skipped(self):
+        email = outbound()
+        results = []
+        with transaction.atomic():
+            # Another worker holds the row
+            OutboundEmail.objects.select_for_update().get(pk=email.pk)
+            worker = threading.Thread(target=self.claim_in_thread, args=(10, results))
+            worker.start()
+            worker.join(timeout=10)
+        self.assertFalse(worker.is_alive(), "claim blocked on a locked row")
+        self.assertEqual(results, [set()])
+
+        email.refresh_from_db()
+        self.assertEqual(email.status, "pending")
+
+    def test_two_workers_never_claim_the_same_message(self):
+        ids = {outbound().id for _ in range(40)}
+        results = []
+        start = threading.Barrier(2)
+        workers = [
+            threading.Thread(target=self.claim_in_thread, args=(40, results, start))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(timeout=10)
+
+        first, second = results
+        self.assertFalse(first & second)
+        self.assertEqual(first | second, ids)
+        self.assertEqual(OutboundEmail.objects.filter(status="sending").count(), 40)
@@ -0,0 +1,115 @@
+import base64
+import hashlib
+import json
+from datetime import date
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+
+from core import offline_bundle
+from core.models import AnneeUniversitaire, Diplome, Etudiant, Filiere
+from core.offline_bundle import BloomFilter
+
+
+def bloom_contains(bloom, item):
+    """Client-side lookup, written from the layout documented in core/offline_bundle.py."""
+    bits = base64.b64decode(bloom["bits"])
+    digest = hashlib.sha256(item.encode("utf-8")).digest()
+    h1 = int.from_bytes(digest[0:8], "big")
+    h2 = int.from_bytes(digest[8:16], "big") | 1
+    for i in range(bloom["k"]):
+        n = ((h1 + i * h2) % 2 ** 64) % bloom["m"]
+        if not bits[n // 8] >> (n % 8) & 1:
+            return False
+    return True
+
+
+class BloomFilterTests(SimpleTestCase):
+
+    def test_no_false_negatives_across_chunks(self):
+        items = [f"uuid:{i:032x}" for i in range(5000)]
+        bloom = BloomFilter(len(items), 1e-4)
+        for start in range(0, len(items), 1000):
+            bloom.add_many(items[start:start + 1000])
+
+        encoded = bloom.to_dict()
+        self.assertTrue(all(bloom_contains(encoded, item) for item in items))
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(5000, 1e-3)
+        bloom.add_many([f"hash:{i}" for i in range(5000)])
+        encoded = bloom.to_dict()
+
+        probes = 20000
+        false_positives = sum(bloom_contains(encoded, f"other:{i}") for i in range(probes))
+        self.assertLess(false_positives / probes, 5e-3)
+
+    def test_empty_filter(self):
+        bloom = BloomFilter(0, 1e-6)
+        bloom.add_many([])
+        encoded = bloom.to_dict()
+        self.assertGreaterEqual(encoded["m"], 64)
+        self.assertFalse(bloom_contains(encoded, "uuid:x"))
+
+
+class OfflineBundleViewTests(TestCase):
+
+    def test_rejects_since_outside_published_versions(self):
+        for since in ("1", "-1", "abc"):
+            response = self.client.get("/api/offline-bundle/", {"since": since})
+            self.assertEqual(response.status_code, 400, since)
+        # No diploma yet: the current version is 0
+        self.assertEqual(self.client.get("/api/offline-bundle/", {"since": "1"}).json()["version"], 0)
+
+
+@mock.patch("core.offline_bundle.sign_bytes", return_value=("ed25519", b"signature", "cert"))
+class BundleContentTests(TestCase):
+
+    def setUp(self):
+        filiere = Filiere.objects.create(code_filiere="INF", nom_filiere_fr="Informatique", nom_filiere_ar="")
+        annee = AnneeUniversitaire.objects.create(code_annee="2024-2025")
+        self.diplomes = []
+        for i in range(3):
+            etudiant = Etudiant.objects.create(
+                nom_prenom_fr=f"Etudiant {i}", nom_prenom_ar="طالب", matricule=i + 1, nni=str(100 + i),
+                email=f"{i + 1}@etu.univ.mr", date_naissance=date(2000, 1, 1),
+                lieu_naissance_fr="Atar", lieu_naissance_ar="أطار", mention_fr="Bien", mention_ar="حسن",
+                filiere=filiere, annee_universitaire=annee,
+            )
+            self.diplomes.append(Diplome.objects.create(
+                etudiant=etudiant, numero_diplome=i, specialite=filiere, type_diplome="Licence",
+                annee_obtention=2025, fichier_pdf=f"/tmp/{i}.pdf", hash_signature=f"{i:064x}",
+                est_annule=i == 2,
+            ))
+
+    def assertNoClearIdentifiers(self, bundle):
+        text = json.dumps(bundle)
+        for d in self.diplomes:
+            self.assertNotIn(d.verification_uuid, text)
+            self.assertNotIn(d.hash_signature, text)
+
+    def test_delta_lists_digests_only(self, _sign):
+        since = self.diplomes[0].id
+        bundle = offline_bundle.build_delta_bundle(since)
+
+        self.assertNoClearIdentifiers(bundle)
+        added = bundle["payload"]["added"]
+        self.assertEqual(added, [
+            {"uuid": offline_bundle.digest(f"uuid:{d.verification_uuid}"),
+             "hash": offline_bundle.digest(f"hash:{d.hash_signature}")}
+            for d in self.diplomes[1:]
+        ])
+        self.assertEqual(bundle["payload"]["annules"], [offline_bundle.digest(f"uuid:{self.diplomes[2].verification_uuid}")])
+
+    def test_full_bundle_lists_digests_only(self, _sign):
+        bundle = offline_bundle.build_full_bundle()
+        self.assertNoClearIdentifiers(bundle)
+        bloom = bundle["payload"]["bloom"]
+        self.assertTrue(all(bloom_contains(bloom, f"uuid:{d.verification_uuid}") for d in self.diplomes))
+
+    def test_old_since_gets_the_full_bundle(self, _sign):
+        version = self.diplomes[-1].id
+        with self.settings(OFFLINE_BUNDLE_MAX_DELTA=1):
+            response = self.client.get("/api/offline-bundle/", {"since": version - 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["payload"]["type"], "full")
@@ -0,0 +1,112 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+
+from core.security import pdf_verifier
+
+validate_file = pdf_verifier._validate_file
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "pdf-verifier-tests"}},
+    SIGNATURE_TRUST_VERSION="1",
+)
+class VerifierCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.cert = os.path.join(directory, "cert.pem")
+        self.write_cert(b"certificate 1")
+
+        for target, value in [
+            ("CERT_PATH", self.cert),
+            ("_load_roots", mock.Mock(side_effect=lambda: [object()])),
+            ("_validate_file", mock.Mock(side_effect=lambda path, roots: {"valid": True, "error": None})),
+        ]:
+            patcher = mock.patch.object(pdf_verifier, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.dict(pdf_verifier._trust, {"key": None, "fingerprint": None, "roots": None})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        cache.clear()
+
+    def write_cert(self, content, mtime=None):
+        with open(self.cert, "wb") as f:
+            f.write(content)
+        if mtime is not None:
+            os.utime(self.cert, (mtime, mtime))
+
+    def validate(self, pdf_hash="a" * 64):
+        return pdf_verifier.validate_signed_pdf("/tmp/unused.pdf", pdf_hash)
+
+    def test_result_memoized_by_hash(self):
+        first = self.validate()
+        second = self.validate()
+
+        self.assertFalse(first["cached"])
+        self.assertTrue(second["cached"])
+        self.assertEqual(first["validated_at"], second["validated_at"])
+        self.assertEqual(pdf_verifier._validate_file.call_count, 1)
+
+        self.assertFalse(self.validate("b" * 64)["cached"])
+        self.assertEqual(pdf_verifier._validate_file.call_count, 2)
+
+    def test_new_certificate_invalidates_cached_results(self):
+        self.validate()
+        before = pdf_verifier.trust_fingerprint()
+
+        self.write_cert(b"certificate 2", mtime=os.path.getmtime(self.cert) + 10)
+
+        self.assertNotEqual(pdf_verifier.trust_fingerprint(), before)
+        self.assertFalse(self.validate()["cached"])
+        self.assertEqual(pdf_verifier._validate_file.call_count, 2)
+
+    def test_trust_version_bump_invalidates_cached_results(self):
+        self.validate()
+        with override_settings(SIGNATURE_TRUST_VERSION="2"):
+            self.assertFalse(self.validate()["cached"])
+            self.assertTrue(self.validate()["cached"])
+        self.assertEqual(pdf_verifier._validate_file.call_count, 2)
+
+    def test_certificate_parsed_once_per_trust_configuration(self):
+        self.validate()
+        self.validate("b" * 64)
+        self.assertEqual(pdf_verifier._load_roots.call_count, 1)
+
+    def test_saturated_pool_still_serves_cached_results(self):
+        self.validate()
+        with override_settings(SIGNATURE_VALIDATION_WORKERS=0, SIGNATURE_VALIDATION_QUEUE=0):
+            self.assertTrue(self.validate()["cached"])
+            with self.assertRaises(pdf_verifier.ValidationBusy):
+                self.validate("c" * 64)
+
+    def test_each_validation_gets_its_own_context(self):
+        with mock.patch.object(pdf_verifier, "open_mapped", mock.MagicMock()), \
+                mock.patch.object(pdf_verifier, "_run_validation", side_effect=lambda stream, vc: vc):
+            contexts = [validate_file("/tmp/unused.pdf", []) for _ in range(2)]
+        self.assertIsNot(contexts[0], contexts[1])
+
+    def test_full_pool_refuses_instead_of_abandoning_work(self):
+        release = threading.Event()
+        pdf_verifier._validate_file.side_effect = lambda path, roots: release.wait() and {"valid": True, "error": None}
+
+        with override_settings(SIGNATURE_VALIDATION_WORKERS=1, SIGNATURE_VALIDATION_QUEUE=0):
+            running = threading.Thread(target=self.validate)
+            running.start()
+            while pdf_verifier.validation_queue_depth() < 1:
+                time.sleep(0.01)
+            with self.assertRaises(pdf_verifier.ValidationBusy):
+                self.validate("c" * 64)
+            release.set()
+            running.join()
+
+        self.assertEqual(pdf_verifier.validation_queue_depth(), 0)
+        self.assertTrue(self.validate()["cached"])
@@ -0,0 +1,62 @@
+import io
+import os
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase, TestCase, override_settings
+from PIL import Image
+
+from core import pv_images
+from core.serializers import PVJurySerializer
+
+
+def png(img, **options):
+    buf = io.BytesIO()
+    img.save(buf, "PNG", **options)
+    buf.seek(0)
+    return buf
+
+
+class OpenTests(SimpleTestCase):
+
+    def test_transparent_areas_become_white(self):
+        img = Image.new("RGBA", (4, 4), (0, 0, 0, 0))
+        img.putpixel((0, 0), (200, 0, 0, 255))
+
+        opened = pv_images._open(png(img), 100)
+
+        self.assertEqual(opened.mode, "RGB")
+        self.assertEqual(opened.getpixel((1, 1)), (255, 255, 255))
+        self.assertEqual(opened.getpixel((0, 0)), (200, 0, 0))
+
+    def test_grayscale_with_alpha_stays_grayscale(self):
+        opened = pv_images._open(png(Image.new("LA", (4, 4), (0, 0))), 100)
+        self.assertEqual((opened.mode, opened.getpixel((0, 0))), ("L", 255))
+
+    def test_palette_transparency(self):
+        img = Image.new("P", (4, 4), 0)
+        img.putpalette([0, 0, 0, 10, 20, 30])
+        img.putpixel((0, 0), 1)
+
+        opened = pv_images._open(png(img, transparency=0), 100)
+
+        self.assertEqual(opened.getpixel((1, 1)), (255, 255, 255))
+        self.assertEqual(opened.getpixel((0, 0)), (10, 20, 30))
+
+    def test_opaque_images_unchanged(self):
+        self.assertEqual(pv_images._open(png(Image.new("L", (4, 4), 7)), 100).getpixel((0, 0)), 7)
+        self.assertEqual(pv_images._open(png(Image.new("RGB", (4, 4), (1, 2, 3))), 100).getpixel((0, 0)), (1, 2, 3))
+
+
+class UploadLimitTests(TestCase):
+
+    @override_settings(PV_UPLOAD_MAX_SIZE=1024)
+    def test_pv_scan_has_its_own_size_limit(self):
+        def errors(img):
+            image = SimpleUploadedFile("pv.png", png(img).read(), "image/png")
+            serializer = PVJurySerializer(data={"image_pv": image})
+            serializer.is_valid()
+            return serializer.errors.get("image_pv", [])
+
+        self.assertEqual(errors(Image.new("L", (4, 4))), [])
+        noise = Image.frombytes("L", (64, 64), os.urandom(64 * 64))
+        self.assertEqual(len(errors(noise)), 1)
@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from core import rollups
+from core.models import Verification, VerificationDaily
+
+
+class IpPrefixTests(SimpleTestCase):
+
+    def test_prefixes(self):
+        self.assertEqual(rollups.ip_prefix("41.188.12.7"), "41.188.12.0/24")
+        self.assertEqual(rollups.ip_prefix("2001:db8:1:2::1"), "2001:db8:1::/48")
+        self.assertEqual(rollups.ip_prefix(None), "")
+        self.assertEqual(rollups.ip_prefix("not an ip"), "")
+
+
+class RollupTests(TestCase):
+
+    def setUp(self):
+        self.today = timezone.localdate()
+        self.verify(3, "succes", "41.188.12.7")
+        self.verify(3, "succes", "41.188.12.9")
+        self.verify(2, "echec", "10.0.0.1")
+        self.verify(0, "succes", "10.0.0.1")
+
+    def verify(self, days_ago, statut, ip):
+        v = Verification.objects.create(statut=statut, adresse_ip=ip)
+        Verification.objects.filter(pk=v.pk).update(date_verification=timezone.now() - timedelta(days=days_ago))
+
+    def statuts(self, rows):
+        return {row["statut"]: row["count"] for row in rows}
+
+    def test_rollup_complete_days_only(self):
+        done = dict(rollups.rollup_pending_days())
+
+        self.assertEqual(sorted(done), [self.today - timedelta(days=d) for d in (3, 2, 1)])
+        self.assertEqual(done[self.today - timedelta(days=3)], 2)
+        # Same /24: one rollup row
+        row = VerificationDaily.objects.get(day=self.today - timedelta(days=3))
+        self.assertEqual((row.ip_prefix, row.total), ("41.188.12.0/24", 2))
+        self.assertFalse(VerificationDaily.objects.filter(day=self.today).exists())
+
+        # Nothing left to roll until tomorrow
+        self.assertEqual(rollups.rollup_pending_days(), [])
+
+    def test_reads_merge_rollups_and_raw_tail(self):
+        rollups.rollup_pending_days()
+
+        per_day, per_statut = rollups.raw_tail()
+        self.assertEqual(dict(per_statut), {"succes": 1})
+        self.assertEqual(sum(per_day.values()), 1)
+
+        self.assertEqual(self.statuts(rollups.status_counts()), {"succes": 3, "echec": 1})
+        self.assertEqual(sum(r["total"] for r in rollups.verifications_by_day()), 4)
+
+    def test_purge_keeps_unrolled_days(self):
+        self.assertEqual(rollups.purge_raw_verifications(retention_days=0), 0)
+
+        rollups.rollup_pending_days()
+        self.assertEqual(rollups.purge_raw_verifications(retention_days=1, batch_size=1), 3)
+        self.assertEqual(Verification.objects.count(), 1)
+        # Totals unchanged: purged days are read from the rollups
+        self.assertEqual(self.statuts(rollups.status_counts()), {"succes": 3, "echec": 1})
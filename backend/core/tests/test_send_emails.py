@@ -0,0 +1,35 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.management.commands import send_emails
+from core.models import OutboundEmail
+
+
+@override_settings(EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class SendEmailsCommandTests(TestCase):
+
+    def test_loop_requeues_stale_messages_periodically(self):
+        sleeps = []
+        clock = iter(range(0, 1000, 30))  # each monotonic() call is 30 s later
+
+        def sleep(seconds):
+            sleeps.append(seconds)
+            if len(sleeps) == 3:
+                raise KeyboardInterrupt
+            if len(sleeps) == 1:
+                # Left behind by a worker that died after the first requeue pass
+                OutboundEmail.objects.create(
+                    sujet="Sujet", corps="Corps", destinataires=["x@example.com"],
+                    status="sending", claimed_at=timezone.now() - timedelta(hours=1),
+                )
+
+        with mock.patch.object(send_emails.time, "sleep", sleep), \
+                mock.patch.object(send_emails.time, "monotonic", lambda: next(clock)):
+            call_command("send_emails", "--loop", stdout=StringIO())
+
+        self.assertEqual(OutboundEmail.objects.get().status, "sent")
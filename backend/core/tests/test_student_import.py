@@ -0,0 +1,177 @@
+import gzip
+import io
+from datetime import date
+
+from django.test import SimpleTestCase, TestCase
+
+from core import counters
+from core.models import AnneeUniversitaire, Etudiant, Filiere
+from core.student_import import (
+    COLUMNS, ENCODING_PREFIX, ImportFormatError, StudentImport, csv_encoding, import_students, iter_csv_rows, validate_rows,
+)
+
+
+DOMAIN = "@etu.univ.mr"
+
+
+def row(matricule, nni, **values):
+    data = {
+        "nom_prenom_fr": "Ahmed Salem", "nom_prenom_ar": "أحمد سالم",
+        "matricule": str(matricule), "nni": str(nni), "date_naissance": "2001-04-12",
+        "lieu_naissance_fr": "Nouakchott", "lieu_naissance_ar": "نواكشوط",
+        "mention_fr": "Bien", "mention_ar": "حسن",
+    }
+    data.update(values)
+    return data
+
+
+def latin_row(matricule, nni, **values):
+    """A row cp1252 can encode (no Arabic)."""
+    return row(matricule, nni, nom_prenom_ar="-", lieu_naissance_ar="-", mention_ar="-", **values)
+
+
+def csv_bytes(rows, encoding="utf-8-sig", delimiter=";"):
+    lines = [delimiter.join(COLUMNS)]
+    lines += [delimiter.join(r[c] for c in COLUMNS) for r in rows]
+    return ("\r\n".join(lines) + "\r\n").encode(encoding)
+
+
+class ImportTestCase(TestCase):
+
+    def setUp(self):
+        self.filiere = Filiere.objects.create(code_filiere="INF", nom_filiere_fr="Informatique", nom_filiere_ar="")
+        self.annee = AnneeUniversitaire.objects.create(code_annee="2024-2025")
+
+    def existing_student(self, matricule, nni):
+        return Etudiant.objects.create(
+            nom_prenom_fr="Existant", nom_prenom_ar="موجود", matricule=matricule, nni=str(nni),
+            email=f"{matricule}{DOMAIN}", date_naissance=date(2000, 1, 1),
+            lieu_naissance_fr="Atar", lieu_naissance_ar="أطار", mention_fr="Passable", mention_ar="مقبول",
+            filiere=self.filiere, annee_universitaire=self.annee,
+        )
+
+
+class ImportTests(ImportTestCase):
+
+    def students_counted(self):
+        return counters.snapshot()[counters.STUDENTS_BY_FILIERE].get(str(self.filiere.id), 0)
+
+    def test_import_counts_created_rows(self):
+        rows = list(enumerate([row(1, 11), row(2, 12)], start=2))
+        report = import_students(rows, self.filiere, self.annee, DOMAIN)
+
+        self.assertEqual((report["created"], report["skipped_count"]), (2, 0))
+        etudiant = Etudiant.objects.get(matricule=1)
+        self.assertEqual(etudiant.email, f"1{DOMAIN}")
+        self.assertTrue(etudiant.nom_recherche)
+        self.assertEqual(len(etudiant.empreinte), 40)
+        self.assertEqual(self.students_counted(), 2)
+
+    def test_row_inserted_concurrently_is_not_counted(self):
+        rows = list(enumerate([row(1, 11), row(2, 12)], start=2))
+        validation = validate_rows(rows, DOMAIN)
+        self.assertFalse(validation.existing)
+
+        # Same student inserted by another import after the validation pass
+        self.existing_student(2, 12)
+        counted_before = self.students_counted()
+
+        report = import_students(rows, self.filiere, self.annee, DOMAIN, existing=validation.existing)
+
+        self.assertEqual(report["created"], 1)
+        self.assertEqual(report["skipped"], [{"row": 3, "matricule": 2, "reason": "Déjà existant"}])
+        self.assertEqual(self.students_counted(), counted_before + 1)
+        self.assertEqual(Etudiant.objects.get(matricule=2).nom_prenom_fr, "Existant")
+
+    def test_nni_taken_concurrently_is_skipped(self):
+        rows = list(enumerate([row(1, 11), row(2, 12)], start=2))
+        validation = validate_rows(rows, DOMAIN)
+        self.existing_student(50, 12)
+
+        report = import_students(rows, self.filiere, self.annee, DOMAIN, existing=validation.existing)
+
+        self.assertEqual(report["created"], 1)
+        self.assertEqual([s["row"] for s in report["skipped"]], [3])
+
+    def test_unique_conflict_on_update_is_a_row_error(self):
+        a, b = self.existing_student(1, 11), self.existing_student(2, 12)
+        a.nni, b.nni = "12", "11"  # swapped: each UPDATE hits the other row
+        importer = StudentImport(self.filiere, self.annee, DOMAIN, mode="upsert")
+
+        self.assertEqual(importer.update_rows([(2, a), (3, b)]), [])
+        self.assertEqual([s["row"] for s in importer.skipped], [2, 3])
+        self.assertEqual(Etudiant.objects.get(matricule=1).nni, "11")
+
+
+class ValidationTests(ImportTestCase):
+
+    def test_row_errors(self):
+        rows = list(enumerate([
+            row(1, 11),
+            row("12a", 12),
+            row(3, "NNI"),
+            row(4, 14, date_naissance="31/12/2001"),
+            row(5, 15, mention_fr=" "),
+            row(1, 16),
+            row(7, 11),
+        ], start=2))
+
+        result = validate_rows(rows, DOMAIN, chunk_size=3)  # duplicates across chunks too
+
+        self.assertEqual(result.rows, 7)
+        self.assertEqual(result.errors[3], ["matricule invalide"])
+        self.assertEqual(result.errors[4], ["nni invalide"])
+        self.assertEqual(result.errors[5], ["date_naissance invalide (AAAA-MM-JJ)"])
+        self.assertEqual(result.errors[6], ["mention_fr manquant"])
+        self.assertEqual(result.errors[7], ["matricule en double dans le fichier"])
+        self.assertEqual(result.errors[8], ["nni en double dans le fichier"])
+        self.assertNotIn(2, result.errors)
+
+    def test_rows_already_in_database(self):
+        self.existing_student(1, 99)
+        self.existing_student(50, 12)
+        rows = list(enumerate([row(1, 11), row(2, 12), row(3, 13)], start=2))
+
+        result = validate_rows(rows, DOMAIN)
+
+        self.assertFalse(result.errors)
+        self.assertEqual(result.existing, {2, 3})
+
+
+class CsvReaderTests(SimpleTestCase):
+
+    def read(self, data):
+        return list(iter_csv_rows(io.BytesIO(data)))
+
+    def test_utf8_with_bom(self):
+        (number, values), = self.read(csv_bytes([row(1, 11)]))
+        self.assertEqual(number, 2)
+        self.assertEqual(values["nom_prenom_ar"], "أحمد سالم")
+
+    def test_gzip_and_comma_delimiter(self):
+        data = gzip.compress(csv_bytes([row(1, 11), row(2, 12)], delimiter=","))
+        self.assertEqual([n for n, _ in self.read(data)], [2, 3])
+
+    def test_cp1252_fallback(self):
+        latin = latin_row(1, 11, nom_prenom_fr="Hélène Mint Ély")
+        (_, values), = self.read(csv_bytes([latin], encoding="cp1252"))
+        self.assertEqual(values["nom_prenom_fr"], "Hélène Mint Ély")
+
+    def test_encoding_is_decided_on_the_first_bytes(self):
+        data = csv_bytes([row(i, i) for i in range(1, 1000)])
+        self.assertGreater(len(data), ENCODING_PREFIX)
+        self.assertEqual(csv_encoding(io.BytesIO(gzip.compress(data))), "utf-8-sig")
+
+        late = data + csv_bytes([latin_row(1000, 1000, nom_prenom_fr="Hélène")], encoding="cp1252")
+        with self.assertRaises(ImportFormatError):
+            self.read(late)
+
+    def test_undecodable_bytes_are_a_format_error(self):
+        data = csv_bytes([latin_row(1, 11), latin_row(2, 12)], encoding="cp1252")
+        data = data.replace(b"Bien", b"Bi\x81n")  # undefined in cp1252
+        with self.assertRaises(ImportFormatError):
+            self.read(data)
+
+    def test_missing_column(self):
+        with self.assertRaises(ImportFormatError):
+            self.read(b"nom_prenom_fr;matricule\r\nA;1\r\n")
@@ -0,0 +1,55 @@
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import throttling
+
+
+@override_settings(TRUSTED_PROXIES=["10.0.0.0/8"])
+class ClientIpTests(SimpleTestCase):
+
+    def request(self, remote, forwarded=None):
+        meta = {"REMOTE_ADDR": remote}
+        if forwarded is not None:
+            meta["HTTP_X_FORWARDED_FOR"] = forwarded
+        return RequestFactory().get("/", **meta)
+
+    def test_forwarded_for_ignored_from_untrusted_peer(self):
+        request = self.request("203.0.113.7", "198.51.100.1")
+        self.assertEqual(throttling.client_ip(request), "203.0.113.7")
+
+    def test_client_behind_trusted_proxy(self):
+        # The left-most entry is whatever the client sent: not trusted
+        request = self.request("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.5")
+        self.assertEqual(throttling.client_ip(request), "198.51.100.1")
+        self.assertEqual(throttling.client_ip_key(request), "198.51.100.1")
+
+    def test_clients_behind_proxy_get_separate_buckets(self):
+        first = self.request("10.0.0.2", "198.51.100.1")
+        second = self.request("10.0.0.2", "198.51.100.2")
+        self.assertNotEqual(throttling.client_ip_key(first), throttling.client_ip_key(second))
+
+    def test_ipv6_grouped_per_64(self):
+        request = self.request("10.0.0.2", "2001:db8::1")
+        self.assertEqual(throttling.client_ip_key(request), "2001:db8::")
+
+
+class FailModeTests(SimpleTestCase):
+
+    def check(self, sensitive):
+        view = throttling.ratelimit(rate="5/m", sensitive=sensitive)(lambda request: request)
+        request = RequestFactory().get("/", REMOTE_ADDR="203.0.113.7")
+        with mock.patch.object(throttling, "connection", mock.Mock(**{"cursor.side_effect": DatabaseError})):
+            return view(request).limited
+
+    def test_public_routes_fail_open(self):
+        self.assertFalse(self.check(sensitive=False))
+
+    def test_sensitive_routes_fail_closed(self):
+        self.assertTrue(self.check(sensitive=True))
+
+    @override_settings(RATELIMIT_FAIL_OPEN=False, RATELIMIT_SENSITIVE_FAIL_OPEN=True)
+    def test_fail_mode_is_configurable(self):
+        self.assertTrue(self.check(sensitive=False))
+        self.assertFalse(self.check(sensitive=True))
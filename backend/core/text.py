@@ -0,0 +1,35 @@
+# core/text.py
+"""
+Text normalisation for search (French and Arabic names).
+"""
+import re
+import unicodedata
+
+
+# Harakat, Quranic annotation marks, superscript alef
+ARABIC_DIACRITICS = re.compile("[\u0610-\u061A\u064B-\u065F\u0670\u06D6-\u06ED]")
+TATWEEL = "\u0640"
+ARABIC_VARIANTS = str.maketrans({
+    "\u0623": "\u0627",  # أ -> ا
+    "\u0625": "\u0627",  # إ -> ا
+    "\u0622": "\u0627",  # آ -> ا
+    "\u0671": "\u0627",  # ٱ -> ا
+    "\u0649": "\u064A",  # ى -> ي
+    "\u0629": "\u0647",  # ة -> ه
+})
+
+
+def normalize_name(text):
+    """Lowercase, accents and Arabic diacritics stripped, letter variants unified."""
+    if not text:
+        return ""
+    text = ARABIC_DIACRITICS.sub("", str(text)).replace(TATWEEL, "")
+    text = text.translate(ARABIC_VARIANTS)
+    # é -> e + combining accent, dropped; also folds Arabic presentation forms
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return " ".join(text.lower().split())
+
+
+def search_value(nom_prenom_fr, nom_prenom_ar):
+    return f"{normalize_name(nom_prenom_fr)} {normalize_name(nom_prenom_ar)}".strip()
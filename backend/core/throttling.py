@@ -0,0 +1,179 @@
+"""
+Cluster-wide rate limiting for the public endpoints.
+
+django_ratelimit counts in the Django cache, which is per-process local
+memory here, so every gunicorn worker had its own counter. Buckets now
+live in the shared database (RateLimitBucket) and each check is a single
+atomic INSERT ... ON CONFLICT DO UPDATE ... RETURNING statement.
+
+Usage is the same as django_ratelimit:
+
+    @method_decorator(ratelimit(key="ip", rate="5/m", block=False))
+    def get(self, request): ...
+        if getattr(request, "limited", False): ...
+"""
+import time
+import logging
+import ipaddress
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection, DatabaseError
+from django_ratelimit.exceptions import Ratelimited
+
+from .models import RateLimitBucket
+
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"s": 1, "m": 60, "h": 60 * 60, "d": 24 * 60 * 60}
+
+
+def parse_rate(rate):
+    """'5/m' -> (5, 60). Also accepts '10/5m'."""
+    count, period = rate.split("/")
+    unit = period[-1]
+    multiplier = int(period[:-1]) if len(period) > 1 else 1
+    return int(count), PERIODS[unit] * multiplier
+
+
+def _trusted_proxies():
+    networks = []
+    for entry in getattr(settings, "TRUSTED_PROXIES", []):
+        try:
+            networks.append(ipaddress.ip_network(entry, strict=False))
+        except ValueError:
+            logger.warning("Ignoring invalid TRUSTED_PROXIES entry %r", entry)
+    return networks
+
+
+def _is_trusted(raw, networks):
+    try:
+        ip = ipaddress.ip_address(raw)
+    except ValueError:
+        return False
+    return any(ip in network for network in networks)
+
+
+def client_ip(request):
+    """
+    Client address, for logging and rate limiting alike.
+    X-Forwarded-For is only read when the connection comes from one of
+    TRUSTED_PROXIES; the client is then the right-most address not added
+    by a trusted proxy (entries further left are supplied by the client).
+    """
+    remote = (request.META.get("REMOTE_ADDR") or "").strip()
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+    networks = _trusted_proxies()
+
+    if not forwarded or not _is_trusted(remote, networks):
+        return remote
+
+    hops = [hop.strip() for hop in forwarded.split(",") if hop.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted(hop, networks):
+            return hop
+    return hops[0] if hops else remote
+
+
+def client_ip_key(request):
+    """Client address used as bucket key (IPv6 grouped per /64, as django_ratelimit)."""
+    raw = client_ip(request)
+    try:
+        ip = ipaddress.ip_address(raw)
+    except ValueError:
+        return raw or "unknown"
+    if ip.version == 6:
+        return str(ipaddress.ip_network(f"{ip}/64", strict=False).network_address)
+    return str(ip)
+
+
+def _upsert_sql():
+    table = connection.ops.quote_name(RateLimitBucket._meta.db_table)
+    least, greatest = ("LEAST", "GREATEST") if connection.vendor == "postgresql" else ("MIN", "MAX")
+
+    key, tokens, updated_at, allowed = (
+        connection.ops.quote_name(c) for c in ("key", "tokens", "updated_at", "allowed")
+    )
+
+    refilled = (
+        f"{least}(%(capacity)s, {table}.{tokens} + "
+        f"{greatest}(%(now)s - {table}.{updated_at}, 0) * %(refill)s)"
+    )
+    return f"""
+        INSERT INTO {table} ({key}, {tokens}, {updated_at}, {allowed})
+        VALUES (%(key)s, %(capacity)s - 1, %(now)s, TRUE)
+        ON CONFLICT ({key}) DO UPDATE SET
+            {tokens} = CASE WHEN {refilled} >= 1 THEN {refilled} - 1 ELSE {refilled} END,
+            {allowed} = {refilled} >= 1,
+            {updated_at} = %(now)s
+        RETURNING {allowed}
+    """
+
+
+def consume(key, rate, fail_open=True):
+    """
+    Take one token from the bucket `key`. Returns True if allowed.
+    Bucket capacity is the rate count, refilled continuously over the period.
+    If the database is unavailable the request is allowed when `fail_open`,
+    refused otherwise.
+    """
+    capacity, period = parse_rate(rate)
+    params = {
+        "key": key[:200],
+        "capacity": float(capacity),
+        "refill": capacity / period,
+        "now": time.time(),
+    }
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(_upsert_sql(), params)
+            return bool(cursor.fetchone()[0])
+    except DatabaseError:
+        logger.exception("Rate limit check failed for %s", key)
+        return fail_open
+
+
+def fail_open(sensitive=False):
+    """
+    What to do when the buckets can't be read: RATELIMIT_FAIL_OPEN for the
+    public lookups, RATELIMIT_SENSITIVE_FAIL_OPEN for the authentication and
+    upload routes (`sensitive`).
+    """
+    if sensitive:
+        return getattr(settings, "RATELIMIT_SENSITIVE_FAIL_OPEN", False)
+    return getattr(settings, "RATELIMIT_FAIL_OPEN", True)
+
+
+def ratelimit(key="ip", rate="5/m", block=False, group=None, sensitive=False):
+    """
+    Drop-in replacement for django_ratelimit.decorators.ratelimit backed by
+    the shared token buckets. Sets `request.limited`; raises Ratelimited
+    when `block` is True. `sensitive` marks authentication and upload
+    routes (see fail_open).
+    """
+    def decorator(fn):
+        bucket_group = group or f"{fn.__module__}.{fn.__qualname__}"
+
+        @wraps(fn)
+        def _wrapped(request, *args, **kwargs):
+            if key == "ip":
+                value = client_ip_key(request)
+            else:
+                value = key(bucket_group, request)
+
+            limited = not consume(f"{bucket_group}:{value}", rate, fail_open(sensitive))
+            request.limited = getattr(request, "limited", False) or limited
+
+            if limited and block:
+                raise Ratelimited()
+            return fn(request, *args, **kwargs)
+
+        return _wrapped
+
+    return decorator
+
+
+def purge_stale_buckets(max_age=24 * 60 * 60):
+    """Delete buckets untouched for `max_age` seconds (they are full anyway)."""
+    return RateLimitBucket.objects.filter(updated_at__lt=time.time() - max_age).delete()[0]
@@ -0,0 +1,40 @@
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler, StopUpload
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """
+    Spools every uploaded file to disk and hashes it chunk by chunk
+    while Django receives it, so the upload is never held in memory.
+
+    - The resulting file gets a `sha256` attribute (hex digest).
+    - The upload is aborted as soon as `max_size` bytes are exceeded;
+      `too_large` is then set so the view can answer 413.
+    """
+
+    def __init__(self, request=None, max_size=None):
+        super().__init__(request)
+        self.max_size = max_size
+        self.too_large = False
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+        self.received = 0
+
+    def receive_data_chunk(self, raw_data, start):
+        self.received += len(raw_data)
+
+        if self.max_size is not None and self.received > self.max_size:
+            self.too_large = True
+            # Stop reading the body right away (no need to drain it)
+            raise StopUpload(connection_reset=True)
+
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self.sha256.hexdigest()
+        return uploaded
@@ -1,5 +1,6 @@
 from django.urls import path
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .api_views import ( 
     EtudiantViewSet, 
     FiliereViewSet, 
@@ -21,7 +22,14 @@ from .api_views import (
     FinishPasswordResetView,
     DashboardStatsView,
     UserMeView,
-    PVJuryViewSet
+    PVJuryViewSet,
+    OfflineBundleView,
+    ImportJobViewSet,
+    ExportView,
+    AnalyticsExportView,
+    ChunkedUploadView,
+    ChunkedUploadDetailView,
+    ChunkedUploadCompleteView,
 )
 
 router = DefaultRouter()
@@ -33,6 +41,7 @@ router.register("verifications", VerificationViewSet)
 router.register("annee_universitaire", AnneUniversitaireViewSet)
 router.register("diplomes-annulation", DiplomeAnnulationViewSet, basename="diplome-annulation")
 router.register("pvs", PVJuryViewSet)
+router.register("import_jobs", ImportJobViewSet)
 
 
 urlpatterns = [
@@ -45,6 +54,11 @@ urlpatterns = [
     # Public verification endpoint (no auth required)
     path('verify/<str:verification_uuid>/', PublicVerificationView.as_view(), name='public-verify'),
     path("verify-file/", VerifyUploadedPdfView.as_view(), name="verify-file"),
+    path("offline-bundle/", OfflineBundleView.as_view(), name="offline-bundle"),
+
+    # Async (ASGI) public verification
+    path('async/verify/<str:verification_uuid>/', async_views.public_verify, name='async-public-verify'),
+    path('async/verify-hash/<str:pdf_hash>/', async_views.verify_hash, name='async-verify-hash'),
 
     # Profile and passwords
     path("profile/", ProfileView.as_view()),
@@ -57,6 +71,17 @@ urlpatterns = [
 
     #Statistics and visuals for the Dashboard
     path("dashboard-stats/", DashboardStatsView.as_view()),
+
+    # Streamed CSV / XLSX exports
+    path("exports/<str:kind>/", ExportView.as_view(), name="export"),
+
+    # Parquet export of the verification history (analytics, incremental)
+    path("analytics/verifications/", AnalyticsExportView.as_view(), name="analytics-verifications"),
+
+    # Resumable chunked uploads (PV scans, import files), then upload_id on pvs/ or import_*
+    path("uploads/", ChunkedUploadView.as_view(), name="upload-initiate"),
+    path("uploads/<uuid:upload_id>/", ChunkedUploadDetailView.as_view(), name="upload-detail"),
+    path("uploads/<uuid:upload_id>/complete/", ChunkedUploadCompleteView.as_view(), name="upload-complete"),
     
     # Include all router URLs
 ] + router.urls
@@ -79,6 +79,18 @@ api.interceptors.response.use(
   }
 );
 
+// List endpoints are paginated (cursor pages): follow `next` to the end.
+// Resolves like api.get, with res.data the whole array.
+export const getAll = async (url, params = {}) => {
+  let res = await api.get(url, { params: { page_size: 500, ...params } });
+  const data = [...res.data.results];
+  while (res.data.next) {
+    res = await api.get(res.data.next);
+    data.push(...res.data.results);
+  }
+  return { ...res, data };
+};
+
 export const publicApi = axios.create({
   baseURL : API_BASE_URL,
 });
@@ -72,11 +72,17 @@ export default function ChangePasswordModal({ open, onClose }) {
     }
 
     try {
-      await api.post("change-password/", {
+      const res = await api.post("change-password/", {
         old_password: oldPass,
         new_password: newPass,
       });
 
+      // Older tokens are revoked by the password change: keep the new pair
+      if (res.data?.access) {
+        localStorage.setItem("access", res.data.access);
+        localStorage.setItem("refresh", res.data.refresh);
+      }
+
       setAlert({ type: "success", msg: "Mot de passe modifié avec succès" });
 
       setOldPass("");
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 
 export default function EtudiantFormModal({ open, onClose, refresh, etudiant }) {
   const isEdit = Boolean(etudiant);
@@ -26,8 +26,8 @@ export default function EtudiantFormModal({ open, onClose, refresh, etudiant })
   useEffect(() => {
     const fetchData = async () => {
       const [f, a] = await Promise.all([
-        api.get("filieres/"),
-        api.get("annee_universitaire/")
+        getAll("filieres/"),
+        getAll("annee_universitaire/")
       ]);
       setFilieres(f.data);
       setAnnees(a.data);
@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faPlus, faEdit, faTrash } from "@fortawesome/free-solid-svg-icons";
 import AnneeFormModal from "../components/AnneeFormModal";
@@ -24,7 +24,7 @@ export default function Annees() {
 
   const fetchAnnees = async () => {
     try {
-      const res = await api.get("/annee_universitaire/");
+      const res = await getAll("/annee_universitaire/");
       setAnnees(res.data);
     } catch (err) {
       console.error(err);
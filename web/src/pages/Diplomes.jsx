@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 import MainLayout from "../components/Layout/MainLayout";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { DOMAIN } from "../api/axios";
@@ -52,10 +52,10 @@ function Diplomes() {
         setUser(userRes.data);
 
         const [dRes, eRes, fRes, aRes] = await Promise.all([
-          api.get("diplomes/"),
-          api.get("etudiants/"),
-          api.get("filieres/"),
-          api.get("annee_universitaire/"),
+          getAll("diplomes/"),
+          getAll("etudiants/"),
+          getAll("filieres/"),
+          getAll("annee_universitaire/"),
         ]);
         setDiplomes(dRes.data);
         setEtudiants(eRes.data);
@@ -71,7 +71,7 @@ function Diplomes() {
   }, []);
 
   const refreshDiplomes = async () => {
-    const res = await api.get("diplomes/");
+    const res = await getAll("diplomes/");
     setDiplomes(res.data);
   };
 
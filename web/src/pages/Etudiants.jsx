@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 import MainLayout from "../components/Layout/MainLayout";
 import EtudiantFormModal from "../components/EtudiantFormModal";
 import EtudiantDetailsModal from "../components/EtudiantDetailsModal";
@@ -54,10 +54,10 @@ export default function Etudiants() {
       setUser(userRes.data);
 
       const [eRes, fRes, dRes, aRes] = await Promise.all([
-        api.get("etudiants/"),
-        api.get("filieres/"),
-        api.get("diplomes/"),
-        api.get("annee_universitaire/")
+        getAll("etudiants/"),
+        getAll("filieres/"),
+        getAll("diplomes/"),
+        getAll("annee_universitaire/")
       ]);
 
       setEtudiants(eRes.data);
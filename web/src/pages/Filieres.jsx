@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faPlus, faEdit, faTrash } from "@fortawesome/free-solid-svg-icons";
 import FiliereFormModal from "../components/FiliereFormModal";
@@ -17,7 +17,7 @@ export default function Filieres() {
 
   const fetchFilieres = async () => {
     try {
-      const res = await api.get("filieres/");
+      const res = await getAll("filieres/");
       setFilieres(res.data);
     } catch {
       setError("Impossible de charger les filières");
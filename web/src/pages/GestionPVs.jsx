@@ -1,5 +1,5 @@
 import { useState, useEffect } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 import MainLayout from "../components/Layout/MainLayout";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faCloudUploadAlt, faCheckCircle, faSpinner, faTrash } from "@fortawesome/free-solid-svg-icons";
@@ -18,9 +18,9 @@ export default function GestionPVs() {
   const loadData = async () => {
     try {
       const [a, f, p] = await Promise.all([
-        api.get("annee_universitaire/"), 
-        api.get("filieres/"),
-        api.get("pvs/") 
+        getAll("annee_universitaire/"), 
+        getAll("filieres/"),
+        getAll("pvs/") 
       ]);
       setAnnees(a.data);
       setFilieres(f.data);
@@ -94,6 +94,15 @@ export default function GestionPVs() {
               {existingPV ? (
                 <div className="mt-4 p-3 bg-green-50 rounded border border-green-100 flex flex-col items-center gap-2">
                   <span className="text-green-700 font-bold text-sm">PV Validé</span>
+
+                  {existingPV.miniatures?.["320"] && (
+                    <img
+                      src={existingPV.miniatures["320"]}
+                      alt={`PV ${f.code_filiere}`}
+                      loading="lazy"
+                      className="max-h-40 rounded border border-green-100"
+                    />
+                  )}
                   
                   <div className="flex gap-4 items-center w-full justify-center">
                     <a 
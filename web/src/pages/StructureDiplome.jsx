@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/axios";
+import api, { getAll } from "../api/axios";
 import { BACKEND_URL } from "../api/axios";
 import MainLayout from "../components/Layout/MainLayout";
 import StructureDiplomeModal from "../components/StructureDiplomeModal";
@@ -13,7 +13,7 @@ export default function StructureDiplome() {
 
   const fetchStructure = async () => {
     try {
-      const res = await api.get("/structure_diplome/");
+      const res = await getAll("/structure_diplome/");
       setStructure(res.data.length > 0 ? res.data[0] : null);
     } catch (err) {
       console.error("Erreur lors du chargement:", err);
@@ -1,5 +1,5 @@
 import { useEffect, useState } from "react";
-import api from "../api/axios";
+import { getAll } from "../api/axios";
 import MainLayout from "../components/Layout/MainLayout";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import VerificationDetailsModal from "../components/VerificationDetailsModal";
@@ -40,7 +40,7 @@ export default function Verifications() {
 
 
   const loadLogs = async () => {
-    const res = await api.get("verifications/");
+    const res = await getAll("verifications/");
     setLogs(res.data.reverse()); // newest first
     setLoading(false);
   };